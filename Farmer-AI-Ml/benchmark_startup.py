@@ -0,0 +1,90 @@
+"""Cold-start and first-query latency of the agricultural knowledge base.
+
+Each run starts a fresh interpreter and reports:
+  * import time of the vector store module,
+  * construction time of AgriculturalKnowledgeBase,
+  * first query (opens ChromaDB, loads the embedding model, seeds an empty store),
+  * warm query latency,
+  * construction and first query of a second knowledge base in the same
+    process, which reuses the shared embedding model.
+
+Provision the model first with provision_embedding_model.py.
+
+Usage:
+    python benchmark_startup.py --model-dir ./models/embedding_model --runs 3
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+RUN_SCRIPT = """
+import json, time
+start = time.perf_counter()
+from retrieval.vector_store import AgriculturalKnowledgeBase
+timings = {{'import_ms': (time.perf_counter() - start) * 1000}}
+
+def timed(label, function):
+    start = time.perf_counter()
+    result = function()
+    timings[label] = (time.perf_counter() - start) * 1000
+    return result
+
+kb = timed('construct_ms', lambda: AgriculturalKnowledgeBase({persist_directory!r}))
+results = timed('first_query_ms', lambda: kb.search_knowledge("How to treat leaf spot in paddy?"))
+warm = []
+for query in ["What fertilizer for banana?", "Tomato leaf curl control", "Water requirements for paddy"] * 5:
+    start = time.perf_counter()
+    kb.search_knowledge(query)
+    warm.append((time.perf_counter() - start) * 1000)
+timings['warm_query_ms'] = sorted(warm)[len(warm) // 2]
+second = timed('second_construct_ms', lambda: AgriculturalKnowledgeBase({persist_directory!r}))
+timed('second_first_query_ms', lambda: second.search_knowledge("Rice blast disease treatment"))
+timings['model_load_ms'] = (kb.embedding_function.load_seconds or 0) * 1000
+timings['results'] = len(results)
+print(json.dumps(timings))
+"""
+
+METRICS = ['import_ms', 'construct_ms', 'first_query_ms', 'model_load_ms', 'warm_query_ms',
+           'second_construct_ms', 'second_first_query_ms']
+
+def run_once(persist_directory: str, model_dir: str) -> dict:
+    env = dict(os.environ, FARMER_EMBEDDING_MODEL_DIR=os.path.abspath(model_dir))
+    result = subprocess.run([sys.executable, '-c', RUN_SCRIPT.format(persist_directory=persist_directory)],
+                            capture_output=True, text=True, env=env,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(f"Benchmark run failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure knowledge base cold start and first-query latency")
+    parser.add_argument('--model-dir', default=os.getenv("FARMER_EMBEDDING_MODEL_DIR", "./models/embedding_model"))
+    parser.add_argument('--persist-directory', help="Existing ChromaDB directory (default: a fresh one per run)")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--output', help="Optional JSON report path")
+    args = parser.parse_args()
+
+    runs = []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as temp_directory:
+            runs.append(run_once(args.persist_directory or temp_directory, args.model_dir))
+
+    print(f"📊 Knowledge base startup over {args.runs} runs ({'existing' if args.persist_directory else 'empty'} store)")
+    report = {}
+    for metric in METRICS:
+        values = np.array([run[metric] for run in runs])
+        report[metric] = {'median': float(np.median(values)), 'max': float(values.max())}
+        print(f"   {metric:<24} median {report[metric]['median']:>9.1f}   max {report[metric]['max']:>9.1f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'config': vars(args), 'runs': runs, 'summary': report}, f, indent=2)
+        print(f"✅ Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Put the embedding model where the knowledge base loads it from.
+
+The knowledge base never downloads its embedding model at query time; it
+loads it from models/embedding_model (or FARMER_EMBEDDING_MODEL_DIR). This
+script fills that directory with the all-MiniLM-L6-v2 ONNX export, the model
+Chroma embedded with by default, so existing collections stay valid:
+
+  * from Chroma's cache (~/.cache/chroma/onnx_models/all-MiniLM-L6-v2/onnx),
+    or any other directory given with --source,
+  * with --download, fetching it into Chroma's cache first (needs network,
+    run once at build/deploy time).
+
+It then loads the copied model and embeds a test sentence.
+
+Usage:
+    python provision_embedding_model.py
+    python provision_embedding_model.py --download
+    python provision_embedding_model.py --source /path/to/onnx --target ./models/embedding_model
+"""
+import argparse
+import os
+import shutil
+import sys
+
+from retrieval.embedding import CHROMA_ONNX_DIR, DEFAULT_MODEL_DIR, LocalEmbeddingFunction
+
+MODEL_FILES = ["model.onnx", "tokenizer.json", "tokenizer_config.json", "special_tokens_map.json",
+               "vocab.txt", "config.json"]
+
+def download_to_chroma_cache():
+    """Let Chroma fetch its ONNX export into its cache"""
+    from chromadb.utils.embedding_functions.onnx_mini_lm_l6_v2 import ONNXMiniLM_L6_V2
+
+    print("⬇️ Downloading all-MiniLM-L6-v2 ONNX export into Chroma's cache...")
+    ONNXMiniLM_L6_V2()(["warm up"])
+
+def provision(source: str, target: str):
+    source_directory = LocalEmbeddingFunction._onnx_directory(source)
+    if source_directory is None:
+        raise FileNotFoundError(f"No model.onnx in {source}; use --download or --source")
+
+    os.makedirs(target, exist_ok=True)
+    copied = []
+    for file_name in MODEL_FILES:
+        source_path = os.path.join(source_directory, file_name)
+        if os.path.exists(source_path):
+            shutil.copy2(source_path, os.path.join(target, file_name))
+            copied.append(file_name)
+    print(f"📦 Copied {', '.join(copied)} from {source_directory} to {target}")
+
+    embedding_function = LocalEmbeddingFunction(target)
+    vector = embedding_function(["Leaf spot in paddy"])[0]
+    print(f"✅ Embedding model ready in {target} ({len(vector)} dimensions)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Provision the local embedding model for the knowledge base")
+    parser.add_argument('--source', default=CHROMA_ONNX_DIR, help="Directory holding model.onnx and tokenizer.json")
+    parser.add_argument('--target', default=os.getenv("FARMER_EMBEDDING_MODEL_DIR", DEFAULT_MODEL_DIR))
+    parser.add_argument('--download', action='store_true', help="Download the model into Chroma's cache first")
+    args = parser.parse_args()
+
+    if args.download:
+        download_to_chroma_cache()
+    try:
+        provision(args.source, args.target)
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
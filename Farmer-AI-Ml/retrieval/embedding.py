@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+from typing import List, Dict, Optional
+
+import numpy as np
+
+# Directory holding the bundled model; override with FARMER_EMBEDDING_MODEL_DIR.
+# Fill it with: python provision_embedding_model.py
+DEFAULT_MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                 "models", "embedding_model")
+
+# Where Chroma caches the all-MiniLM-L6-v2 ONNX export it used to embed with by default
+CHROMA_ONNX_DIR = os.path.join(os.path.expanduser("~"), ".cache", "chroma", "onnx_models",
+                               "all-MiniLM-L6-v2", "onnx")
+
+class LocalEmbeddingFunction:
+    """Embedding function that loads its model from a local directory, never from the network.
+
+    The directory holds either an ONNX export (``model.onnx`` and
+    ``tokenizer.json``, directly or under ``onnx/``) or a sentence-transformers
+    model. With Chroma's all-MiniLM-L6-v2 ONNX export the vectors match
+    Chroma's default embedding function, so existing collections stay valid.
+    When the directory holds no model, the copy Chroma cached under
+    ``~/.cache/chroma/onnx_models/all-MiniLM-L6-v2/onnx`` is used if present.
+    The model is loaded on the first call, not on construction.
+    """
+
+    def __init__(self, model_dir: str = None, num_threads: int = None, batch_size: int = 32,
+                 max_length: int = 256):
+        self.model_dir = model_dir or os.getenv("FARMER_EMBEDDING_MODEL_DIR", DEFAULT_MODEL_DIR)
+        threads = num_threads or os.getenv("FARMER_EMBEDDING_THREADS")
+        self.num_threads = int(threads) if threads else None
+        self.batch_size = batch_size
+        self.max_length = max_length
+
+        self._session = None
+        self._tokenizer = None
+        self._input_names = set()
+        self._model = None
+        self._load_lock = threading.Lock()
+        self.loaded_from = None
+        self.load_seconds = None
+        self.calls = 0
+        self.texts_embedded = 0
+
+    @staticmethod
+    def name() -> str:
+        return "farmer_local"
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._session is not None or self._model is not None
+
+    @staticmethod
+    def _onnx_directory(model_dir: str) -> Optional[str]:
+        for directory in (model_dir, os.path.join(model_dir, "onnx")):
+            if os.path.exists(os.path.join(directory, "model.onnx")):
+                return directory
+        return None
+
+    def load(self):
+        """Load the model once per instance; safe to call from several threads"""
+        if self.is_loaded:
+            return
+        with self._load_lock:
+            if self.is_loaded:
+                return
+            start = time.perf_counter()
+            onnx_directory = self._onnx_directory(self.model_dir)
+            has_sentence_transformer = os.path.exists(os.path.join(self.model_dir, "modules.json"))
+            if not onnx_directory and not has_sentence_transformer:
+                # Nothing provisioned: reuse the model Chroma cached, which existing collections were embedded with
+                onnx_directory = self._onnx_directory(CHROMA_ONNX_DIR)
+            if onnx_directory:
+                self._load_onnx(onnx_directory)
+                self.loaded_from = onnx_directory
+            elif has_sentence_transformer:
+                self._load_sentence_transformer()
+                self.loaded_from = self.model_dir
+            else:
+                raise FileNotFoundError(
+                    f"No embedding model in {self.model_dir} or {CHROMA_ONNX_DIR}: run "
+                    f"provision_embedding_model.py, or set FARMER_EMBEDDING_MODEL_DIR to an ONNX export "
+                    f"(model.onnx, tokenizer.json) or a sentence-transformers model"
+                )
+            self.load_seconds = time.perf_counter() - start
+            print(f"🧠 Embedding model loaded from {self.loaded_from} in {self.load_seconds:.2f}s")
+
+    def _load_onnx(self, directory: str):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        options = ort.SessionOptions()
+        if self.num_threads:
+            options.intra_op_num_threads = self.num_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        session = ort.InferenceSession(os.path.join(directory, "model.onnx"), options,
+                                       providers=["CPUExecutionProvider"])
+
+        tokenizer = Tokenizer.from_file(os.path.join(directory, "tokenizer.json"))
+        tokenizer.enable_truncation(max_length=self.max_length)
+        # Pad to the longest text in the batch; pooling ignores padding, so results match fixed-length padding
+        tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+        self._tokenizer = tokenizer
+        self._input_names = {model_input.name for model_input in session.get_inputs()}
+        self._session = session
+
+    def _load_sentence_transformer(self):
+        from sentence_transformers import SentenceTransformer
+
+        if self.num_threads:
+            import torch
+            torch.set_num_threads(self.num_threads)
+        # A local path never triggers a download
+        self._model = SentenceTransformer(self.model_dir, device="cpu")
+
+    def _encode_onnx(self, texts: List[str]) -> np.ndarray:
+        encodings = self._tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        onnx_input = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            onnx_input["token_type_ids"] = np.zeros_like(input_ids)
+
+        last_hidden_state = self._session.run(None, onnx_input)[0]
+        # Mean pooling over real tokens, then L2 normalisation
+        mask = attention_mask[:, :, None].astype(np.float32)
+        embeddings = (last_hidden_state * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return embeddings / np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+
+    def __call__(self, input: List[str]) -> List[List[float]]:
+        """Embed texts; same call signature as a Chroma embedding function"""
+        self.load()
+        self.calls += 1
+        self.texts_embedded += len(input)
+        if not input:
+            return []
+        if self._session is not None:
+            embeddings = np.vstack([self._encode_onnx(input[start:start + self.batch_size])
+                                    for start in range(0, len(input), self.batch_size)])
+        else:
+            embeddings = self._model.encode(list(input), batch_size=self.batch_size, convert_to_numpy=True,
+                                            normalize_embeddings=True, show_progress_bar=False)
+        return embeddings.astype(np.float32).tolist()
+
+    def get_stats(self) -> Dict:
+        return {
+            "model_dir": self.model_dir,
+            "loaded": self.is_loaded,
+            "loaded_from": self.loaded_from,
+            "load_seconds": self.load_seconds,
+            "calls": self.calls,
+            "texts_embedded": self.texts_embedded
+        }
+
+_shared_functions: Dict[str, LocalEmbeddingFunction] = {}
+_shared_lock = threading.Lock()
+
+def get_shared_embedding_function(model_dir: str = None) -> LocalEmbeddingFunction:
+    """One embedding function per model directory per process, so every processor shares one loaded model"""
+    model_dir = os.path.abspath(model_dir or os.getenv("FARMER_EMBEDDING_MODEL_DIR", DEFAULT_MODEL_DIR))
+    with _shared_lock:
+        if model_dir not in _shared_functions:
+            _shared_functions[model_dir] = LocalEmbeddingFunction(model_dir)
+        return _shared_functions[model_dir]
@@ -0,0 +1,142 @@
+import math
+import re
+import threading
+from collections import Counter
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+# Words, with Malayalam vowel signs kept inside the word, plus compounds like "12:32:16"
+TERM_PATTERN = re.compile(r"[\w\u0D00-\u0D7F]+(?:[:.,/\-][\w\u0D00-\u0D7F]+)*")
+
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "for", "from", "how", "i", "in", "is",
+    "it", "my", "of", "on", "or", "the", "to", "what", "when", "which", "with", "should", "use"
+}
+
+def normalize_term(term: str) -> str:
+    """Fold simple English plurals ("fungicides" -> "fungicide"), so queries match either form"""
+    if len(term) > 3 and term.endswith("s") and not term.endswith("ss") and term.isascii():
+        return term[:-1]
+    return term
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased index terms without stop words"""
+    return [normalize_term(term) for term in TERM_PATTERN.findall(text.lower()) if term not in STOP_WORDS]
+
+class KeywordIndex:
+    """In-memory BM25 inverted index over knowledge documents.
+
+    Postings keep raw term frequencies, so documents can be added at any time;
+    IDF and length normalisation use the current corpus statistics at query
+    time. Each term's postings are cached as numpy arrays until the term gets
+    new documents, so scoring is a few vector operations per query term.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Tuple[List[int], List[int]]] = {}  # term -> (doc indices, term frequencies)
+        self.lengths: List[int] = []
+        self.items: List[Dict] = []
+        self.positions: Dict[str, int] = {}  # document id -> doc index
+        # Category and crop stored as integer codes, so filters are array comparisons
+        self.codes: Dict[str, Dict[str, int]] = {"category": {}, "crop": {}}
+        self.field_codes: Dict[str, List[int]] = {"category": [], "crop": []}
+
+        self._term_arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def add_many(self, ids: List[str], documents: List[str], metadatas: List[Dict]) -> int:
+        """Index documents with their metadata (category, crop, original_text); returns how many were new"""
+        added = 0
+        with self._lock:
+            for doc_id, document, metadata in zip(ids, documents, metadatas):
+                if doc_id in self.positions:
+                    continue
+                doc_index = len(self.items)
+                counts = Counter(tokenize(document or ""))
+                for term, count in counts.items():
+                    doc_indices, frequencies = self.postings.setdefault(term, ([], []))
+                    doc_indices.append(doc_index)
+                    frequencies.append(count)
+                    self._term_arrays.pop(term, None)
+                self.lengths.append(sum(counts.values()))
+
+                metadata = metadata or {}
+                self.items.append({
+                    "text": metadata.get("original_text", document),
+                    "category": metadata.get("category"),
+                    "crop": metadata.get("crop")
+                })
+                for field, codes in self.codes.items():
+                    self.field_codes[field].append(codes.setdefault(metadata.get(field), len(codes)))
+                self.positions[doc_id] = doc_index
+                added += 1
+            if added:
+                self._arrays = {}
+        return added
+
+    def _array(self, name: str, values: List[int], dtype) -> np.ndarray:
+        if name not in self._arrays:
+            self._arrays[name] = np.asarray(values, dtype=dtype)
+        return self._arrays[name]
+
+    def _postings_arrays(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        if term not in self._term_arrays:
+            if term not in self.postings:
+                return None
+            doc_indices, frequencies = self.postings[term]
+            self._term_arrays[term] = (np.asarray(doc_indices, dtype=np.int64),
+                                       np.asarray(frequencies, dtype=np.float32))
+        return self._term_arrays[term]
+
+    def search(self, query: str, category: str = None, top_k: int = 3, crop: str = None) -> List[Dict]:
+        """Best BM25 matches; similarity is the score relative to a perfect match, capped at 0.8"""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        # Held while scoring, so concurrent add_many calls do not change the arrays mid-query
+        with self._lock:
+            total = len(self.items)
+            if not total:
+                return []
+            lengths = self._array("lengths", self.lengths, np.float32)
+            average_length = float(lengths.mean()) or 1.0
+            scores = np.zeros(total, dtype=np.float32)
+            best_possible = 0.0
+            for term in terms:
+                arrays = self._postings_arrays(term)
+                if arrays is None:
+                    continue
+                doc_indices, frequencies = arrays
+                idf = math.log(1 + (total - len(doc_indices) + 0.5) / (len(doc_indices) + 0.5))
+                best_possible += idf * (self.k1 + 1)
+                norms = self.k1 * (1 - self.b + self.b * lengths[doc_indices] / average_length)
+                # A term lists each document once, so fancy-indexed += is safe
+                scores[doc_indices] += idf * frequencies * (self.k1 + 1) / (frequencies + norms)
+
+            for field, value in (("category", category), ("crop", crop)):
+                if value:
+                    code = self.codes[field].get(value)
+                    if code is None:
+                        return []
+                    scores[self._array(field, self.field_codes[field], np.int32) != code] = 0
+
+            candidates = np.flatnonzero(scores)
+            if len(candidates) > top_k:
+                candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+            ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+            results = []
+            for doc_index in ranked:
+                result = self.items[doc_index].copy()
+                # Keyword matches rank below confident vector matches, as the old fallback did
+                result["similarity"] = min(0.8, 0.8 * float(scores[doc_index]) / best_possible)
+                results.append(result)
+            return results
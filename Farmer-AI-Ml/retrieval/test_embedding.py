@@ -0,0 +1,50 @@
+import pytest
+
+from retrieval import embedding
+from retrieval.embedding import LocalEmbeddingFunction, get_shared_embedding_function
+from retrieval.vector_store import AgriculturalKnowledgeBase
+
+@pytest.fixture
+def no_chroma_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedding, "CHROMA_ONNX_DIR", str(tmp_path / "chroma-cache"))
+
+def test_construction_does_not_load_the_model(tmp_path):
+    function = LocalEmbeddingFunction(str(tmp_path / "missing"))
+
+    assert not function.is_loaded
+    assert function.get_stats()["loaded_from"] is None
+
+def test_missing_model_raises_a_helpful_error(tmp_path, no_chroma_cache):
+    function = LocalEmbeddingFunction(str(tmp_path / "missing"))
+
+    with pytest.raises(FileNotFoundError, match="provision_embedding_model.py"):
+        function(["paddy"])
+    assert function.calls == 0
+
+def test_onnx_exports_are_found_directly_or_under_onnx(tmp_path):
+    (tmp_path / "flat").mkdir()
+    (tmp_path / "flat" / "model.onnx").touch()
+    (tmp_path / "nested" / "onnx").mkdir(parents=True)
+    (tmp_path / "nested" / "onnx" / "model.onnx").touch()
+
+    assert LocalEmbeddingFunction._onnx_directory(str(tmp_path / "flat")) == str(tmp_path / "flat")
+    assert LocalEmbeddingFunction._onnx_directory(str(tmp_path / "nested")) == str(tmp_path / "nested" / "onnx")
+    assert LocalEmbeddingFunction._onnx_directory(str(tmp_path)) is None
+
+def test_one_shared_function_per_model_directory(tmp_path):
+    first = get_shared_embedding_function(str(tmp_path / "a"))
+
+    assert get_shared_embedding_function(str(tmp_path / "a") + "/") is first
+    assert get_shared_embedding_function(str(tmp_path / "b")) is not first
+
+def test_knowledge_base_without_a_model_answers_from_keywords(tmp_path, no_chroma_cache):
+    function = LocalEmbeddingFunction(str(tmp_path / "missing"))
+    kb = AgriculturalKnowledgeBase(str(tmp_path / "db"), embedding_function=function)
+
+    results = kb.search_knowledge("banana fertilizer npk")
+
+    assert kb.collection.count() == 0
+    assert results and results[0]["crop"] == "banana"
+    assert results[0]["similarity"] <= 0.8
+    # Seeding is retried by the next instance once a model is provisioned
+    assert str(tmp_path / "db") not in AgriculturalKnowledgeBase._seeded_directories
@@ -0,0 +1,70 @@
+import threading
+
+from retrieval.keyword_index import KeywordIndex, tokenize
+
+def make_index():
+    index = KeywordIndex()
+    index.add_many(
+        ["blast", "leaf-spot", "npk", "compost"],
+        ["Rice blast is controlled with fungicides like tricyclazole",
+         "Leaf spot in paddy: spray tricyclazole",
+         "Banana needs NPK 12:32:16 fertilizer",
+         "Banana grows well with compost manure"],
+        [{"category": "pest_control", "crop": "paddy", "original_text": "blast"},
+         {"category": "pest_control", "crop": "paddy", "original_text": "leaf spot"},
+         {"category": "fertilizer_advice", "crop": "banana", "original_text": "npk"},
+         {"category": "fertilizer_advice", "crop": "banana"}]
+    )
+    return index
+
+def test_tokenizer_drops_stop_words_and_folds_plurals():
+    assert tokenize("What fungicides should I use for the leaves?") == ["fungicide", "leave"]
+    assert tokenize("NPK 12:32:16 grass") == ["npk", "12:32:16", "grass"]
+    assert tokenize("നെല്ലിന്റെ രോഗങ്ങൾ") == ["നെല്ലിന്റെ", "രോഗങ്ങൾ"]
+
+def test_search_ranks_by_bm25_and_caps_similarity():
+    results = make_index().search("tricyclazole fungicide for rice", top_k=3)
+
+    assert [result["text"] for result in results] == ["blast", "leaf spot"]
+    assert results[0]["similarity"] > results[1]["similarity"] > 0
+    assert all(result["similarity"] <= 0.8 for result in results)
+
+def test_filters_and_unknown_values():
+    index = make_index()
+
+    assert [result["text"] for result in index.search("banana", crop="banana", category="fertilizer_advice")] == \
+        ["npk", "Banana grows well with compost manure"]
+    assert index.search("banana", category="pest_control") == []
+    assert index.search("banana", crop="mango") == []
+    assert index.search("the and of") == []
+
+def test_documents_added_later_are_searchable_and_duplicates_skipped():
+    index = make_index()
+    index.search("banana")
+
+    assert index.add_many(["npk", "mite"], ["duplicate", "Coconut mite needs neem oil"],
+                          [{}, {"category": "pest_control", "crop": "coconut"}]) == 1
+    assert len(index) == 5
+    assert index.search("coconut mite")[0]["crop"] == "coconut"
+
+def test_concurrent_adds_and_searches():
+    index = make_index()
+    errors = []
+
+    def add(worker):
+        try:
+            for i in range(50):
+                index.add_many([f"{worker}-{i}"], [f"pepper wilt note {i}"], [{"crop": "pepper"}])
+                index.search("pepper wilt", top_k=5)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=add, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert len(index) == 204
+    assert len(index.search("pepper", crop="pepper", top_k=300)) == 200
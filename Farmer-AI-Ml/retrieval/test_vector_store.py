@@ -0,0 +1,71 @@
+import hashlib
+
+import numpy as np
+
+from retrieval.vector_store import AgriculturalKnowledgeBase
+
+class WordEmbedding:
+    """Deterministic bag-of-words embedding; counts how many texts it embeds"""
+
+    def __init__(self, missing_model: bool = False):
+        self.missing_model = missing_model
+        self.embedded = 0
+
+    def __call__(self, texts):
+        if self.missing_model:
+            raise FileNotFoundError("no local embedding model")
+        self.embedded += len(texts)
+        vectors = np.zeros((len(texts), 64), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, int(hashlib.md5(word.encode()).hexdigest(), 16) % 64] += 1.0
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+        return vectors.tolist()
+
+def test_seed_knowledge_is_added_once_and_searchable(tmp_path):
+    embedding = WordEmbedding()
+    kb = AgriculturalKnowledgeBase(str(tmp_path), embedding_function=embedding)
+
+    results = kb.search_knowledge("rice blast tricyclazole", top_k=2)
+    again = AgriculturalKnowledgeBase(str(tmp_path), embedding_function=embedding)
+
+    assert kb.collection.count() == len(AgriculturalKnowledgeBase.SEED_KNOWLEDGE)
+    assert results[0]["text"].startswith("Rice blast")
+    assert again.collection.count() == kb.collection.count()
+    # Seeding the second instance found every item already stored
+    assert embedding.embedded == len(AgriculturalKnowledgeBase.SEED_KNOWLEDGE) + 1
+
+def test_bulk_add_skips_duplicates_and_stored_items(tmp_path):
+    embedding = WordEmbedding()
+    kb = AgriculturalKnowledgeBase(str(tmp_path), embedding_function=embedding)
+    kb.collection  # seed
+    items = [{"text": f"Coconut tip {i}: apply salt to the basin", "category": "fertilizer_advice", "crop": "coconut"}
+             for i in range(5)]
+    before = embedding.embedded
+
+    assert kb.add_knowledge_many(items + items[:2], batch_size=2) == 5
+    assert kb.add_knowledge_many(items) == 0
+    assert not kb.add_knowledge(items[0]["text"].upper(), "fertilizer_advice", "coconut")
+    assert embedding.embedded - before == 5
+
+def test_content_ids_ignore_case_and_whitespace():
+    first = AgriculturalKnowledgeBase.knowledge_id("Neem  oil spray", "pest_control", "tomato")
+
+    assert first == AgriculturalKnowledgeBase.knowledge_id("neem oil SPRAY", "pest_control", "tomato")
+    assert first != AgriculturalKnowledgeBase.knowledge_id("neem oil spray", "pest_control", "banana")
+
+def test_filters_are_applied_in_the_query(tmp_path):
+    kb = AgriculturalKnowledgeBase(str(tmp_path), embedding_function=WordEmbedding())
+
+    results = kb.search_knowledge("fungicide for leaf disease", category="pest_control", crop="paddy", top_k=3)
+
+    assert len(results) == 2
+    assert all(result["crop"] == "paddy" and result["category"] == "pest_control" for result in results)
+
+def test_new_items_reach_the_keyword_fallback(tmp_path):
+    kb = AgriculturalKnowledgeBase(str(tmp_path), embedding_function=WordEmbedding())
+    kb.add_knowledge("Arecanut mahali disease needs Bordeaux mixture", "pest_control", "arecanut")
+
+    results = kb._fallback_keyword_search("mahali bordeaux")
+
+    assert results[0]["crop"] == "arecanut"
@@ -1,118 +1,164 @@
 import chromadb
 from chromadb.config import Settings
 import numpy as np
-from typing import List, Dict
+from typing import List, Dict, Optional
+import hashlib
 import re
+import threading
+from retrieval.embedding import get_shared_embedding_function
+from retrieval.keyword_index import KeywordIndex
 
 class AgriculturalKnowledgeBase:
-    def __init__(self):
-        # Initialize ChromaDB client with new API
-        try:
-            # Try new API first
-            self.client = chromadb.PersistentClient(path="./.chromadb")
-        except:
-            # Fallback to old API
-            self.client = chromadb.Client(Settings(
-                chroma_db_impl="duckdb+parquet",
-                persist_directory="./.chromadb"
-            ))
-        
-        # Create or get collection
-        self.collection = self.client.get_or_create_collection(
-            name="agricultural_knowledge",
-            metadata={"hnsw:space": "cosine"}
-        )
-        
-        self._initialize_knowledge_base()
-        print("✅ Agricultural knowledge base loaded with ChromaDB vector store")
+    # Persist directories already checked for seed data in this process
+    _seeded_directories = set()
+    _open_lock = threading.Lock()
+    # Keyword fallback index per persist directory, built from the whole collection
+    _keyword_indexes = {}
+    _seed_index = None
     
-    def _initialize_knowledge_base(self):
-        """Initialize with agricultural knowledge"""
-        knowledge_items = [
-            {
-                "text": "Leaf spot in paddy can be treated with Tricyclazole or Isoprothiolane fungicides. Apply at first sign of disease.",
-                "category": "pest_control",
-                "crop": "paddy",
-                "keywords": "leaf spot paddy fungicide tricyclazole isoprothiolane"
-            },
-            {
-                "text": "Banana plants require NPK 12:32:16 fertilizer during growth stage. Apply 500g per plant every 3 months.",
-                "category": "fertilizer_advice", 
-                "crop": "banana",
-                "keywords": "banana fertilizer npk 12:32:16 growth stage"
-            },
-            {
-                "text": "Tomato leaf curl virus can be controlled by using resistant varieties and neem oil spray. Remove infected plants.",
-                "category": "pest_control",
-                "crop": "tomato",
-                "keywords": "tomato leaf curl neem oil resistant varieties virus"
-            },
-            {
-                "text": "Paddy requires 2-3 cm water depth during vegetative stage. Maintain proper water management for good yield.",
-                "category": "irrigation_advice",
-                "crop": "paddy",
-                "keywords": "paddy water irrigation vegetative stage water depth"
-            },
-            {
-                "text": "Rice blast disease can be controlled with fungicides like Tricyclazole. Use resistant varieties for prevention.",
-                "category": "pest_control",
-                "crop": "paddy",
-                "keywords": "rice blast paddy fungicide tricyclazole resistant"
-            },
-            {
-                "text": "For banana plants, use organic manure like compost along with chemical fertilizers for better soil health.",
-                "category": "fertilizer_advice",
-                "crop": "banana",
-                "keywords": "banana organic compost manure soil health"
-            }
-        ]
-        
+    # Built-in knowledge, stored when the collection is empty
+    SEED_KNOWLEDGE = [
+        {
+            "text": "Leaf spot in paddy can be treated with Tricyclazole or Isoprothiolane fungicides. Apply at first sign of disease.",
+            "category": "pest_control",
+            "crop": "paddy",
+            "keywords": "leaf spot paddy fungicide tricyclazole isoprothiolane"
+        },
+        {
+            "text": "Banana plants require NPK 12:32:16 fertilizer during growth stage. Apply 500g per plant every 3 months.",
+            "category": "fertilizer_advice", 
+            "crop": "banana",
+            "keywords": "banana fertilizer npk 12:32:16 growth stage"
+        },
+        {
+            "text": "Tomato leaf curl virus can be controlled by using resistant varieties and neem oil spray. Remove infected plants.",
+            "category": "pest_control",
+            "crop": "tomato",
+            "keywords": "tomato leaf curl neem oil resistant varieties virus"
+        },
+        {
+            "text": "Paddy requires 2-3 cm water depth during vegetative stage. Maintain proper water management for good yield.",
+            "category": "irrigation_advice",
+            "crop": "paddy",
+            "keywords": "paddy water irrigation vegetative stage water depth"
+        },
+        {
+            "text": "Rice blast disease can be controlled with fungicides like Tricyclazole. Use resistant varieties for prevention.",
+            "category": "pest_control",
+            "crop": "paddy",
+            "keywords": "rice blast paddy fungicide tricyclazole resistant"
+        },
+        {
+            "text": "For banana plants, use organic manure like compost along with chemical fertilizers for better soil health.",
+            "category": "fertilizer_advice",
+            "crop": "banana",
+            "keywords": "banana organic compost manure soil health"
+        }
+    ]
+    
+    def __init__(self, persist_directory: str = "./.chromadb", embedding_function=None):
+        # Construction stays cheap: the store opens and the model loads on first use
+        self.persist_directory = persist_directory
+        self.embedding_function = embedding_function or get_shared_embedding_function()
+        self.client = None
+        self._collection = None
+        print("✅ Agricultural knowledge base ready (ChromaDB opens on first query)")
+    
+    @property
+    def collection(self):
+        if self._collection is None:
+            self._open_collection()
+        return self._collection
+    
+    def _open_collection(self):
+        """Open the ChromaDB collection and seed it, at most once per directory per process"""
+        with self._open_lock:
+            if self._collection is not None:
+                return
+            # Initialize ChromaDB client with new API
+            try:
+                # Try new API first
+                client = chromadb.PersistentClient(path=self.persist_directory)
+            except:
+                # Fallback to old API
+                client = chromadb.Client(Settings(
+                    chroma_db_impl="duckdb+parquet",
+                    persist_directory=self.persist_directory
+                ))
+            
+            # Embeddings are computed here, so Chroma never loads (or downloads) its default model
+            collection = client.get_or_create_collection(
+                name="agricultural_knowledge",
+                metadata={"hnsw:space": "cosine"},
+                embedding_function=None
+            )
+            self.client = client
+            self._collection = collection
+            
+            if self.persist_directory not in self._seeded_directories:
+                try:
+                    # Without a local embedding model nothing is added: searches fall back to keywords
+                    # and the next instance retries seeding
+                    if self._initialize_knowledge_base():
+                        self._seeded_directories.add(self.persist_directory)
+                        print("✅ Agricultural knowledge base loaded with ChromaDB vector store")
+                except Exception as e:
+                    print(f"⚠️ Could not seed knowledge base: {e}")
+            
+            if self.persist_directory not in self._keyword_indexes:
+                self._keyword_indexes[self.persist_directory] = self._build_keyword_index()
+    
+    def _build_keyword_index(self, page_size: int = 5000) -> KeywordIndex:
+        """Index every document in the collection for the keyword fallback"""
+        index = KeywordIndex()
+        offset = 0
+        while True:
+            page = self._collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+            if not page["ids"]:
+                break
+            index.add_many(page["ids"], page["documents"], page["metadatas"])
+            offset += len(page["ids"])
+        print(f"🔎 Keyword index built over {len(index)} knowledge items")
+        return index
+    
+    def _initialize_knowledge_base(self) -> bool:
+        """Initialize with agricultural knowledge; returns whether the store holds any"""
         # Check if collection is empty before adding
         existing_count = self.collection.count()
         if existing_count == 0:
             print("📝 Adding knowledge items to vector store...")
-            
-            documents = []
-            metadatas = []
-            ids = []
-            
-            for i, item in enumerate(knowledge_items):
-                # Combine text and keywords for better embedding
-                document_text = f"{item['text']} {item['keywords']}"
-                documents.append(document_text)
-                metadatas.append({
-                    "category": item["category"],
-                    "crop": item["crop"],
-                    "original_text": item["text"]
-                })
-                ids.append(f"knowledge_{i}")
-            
-            self.collection.add(
-                documents=documents,
-                metadatas=metadatas,
-                ids=ids
-            )
-            print(f"✅ Added {len(knowledge_items)} knowledge items")
-        else:
-            print(f"📊 Using existing knowledge base with {existing_count} items")
+            added = self.add_knowledge_many(self.SEED_KNOWLEDGE)
+            print(f"✅ Added {added} knowledge items")
+            return added > 0
+        print(f"📊 Using existing knowledge base with {existing_count} items")
+        return True
     
-    def search_knowledge(self, query: str, category: str = None, top_k: int = 3) -> List[Dict]:
+    @staticmethod
+    def _build_where(category: str = None, crop: str = None) -> Optional[Dict]:
+        """Metadata filter evaluated inside the collection query"""
+        conditions = []
+        if category:
+            conditions.append({"category": category})
+        if crop:
+            conditions.append({"crop": crop})
+        if not conditions:
+            return None
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+    
+    def search_knowledge(self, query: str, category: str = None, top_k: int = 3, crop: str = None) -> List[Dict]:
         """Search agricultural knowledge base using vector similarity"""
         try:
-            # Query the collection
+            # Category and crop filters are pushed into the query, so top_k matching items come back
             results = self.collection.query(
-                query_texts=[query],
-                n_results=top_k * 2,  # Get extra for filtering
+                query_embeddings=self.embedding_function([query]),
+                n_results=top_k,
+                where=self._build_where(category, crop),
                 include=["metadatas", "distances"]
             )
             
             filtered_results = []
             if results["metadatas"] and results["distances"]:
-                for i, (metadata, distance) in enumerate(zip(results["metadatas"][0], results["distances"][0])):
-                    # Filter by category if specified
-                    if category and metadata["category"] != category:
-                        continue
-                    
+                for metadata, distance in zip(results["metadatas"][0], results["distances"][0]):
                     # Convert distance to similarity (cosine distance → similarity)
                     similarity = 1 - distance
                     
@@ -125,84 +171,96 @@ class AgriculturalKnowledgeBase:
                     }
                     
                     filtered_results.append(result)
-                    
-                    if len(filtered_results) >= top_k:
-                        break
             
             return sorted(filtered_results, key=lambda x: x["similarity"], reverse=True)
             
         except Exception as e:
             print(f"Vector search error: {e}")
-            return self._fallback_keyword_search(query, category, top_k)
+            return self._fallback_keyword_search(query, category, top_k, crop)
     
-    def _fallback_keyword_search(self, query: str, category: str = None, top_k: int = 3) -> List[Dict]:
-        """Fallback to keyword search if vector search fails"""
-        query_lower = query.lower()
-        results = []
-        
-        # Simple keyword matching fallback
-        knowledge_items = [
-            {
-                "text": "Leaf spot in paddy can be treated with Tricyclazole or Isoprothiolane fungicides.",
-                "category": "pest_control",
-                "crop": "paddy"
-            },
-            {
-                "text": "Banana plants require NPK 12:32:16 fertilizer during growth stage.",
-                "category": "fertilizer_advice", 
-                "crop": "banana"
-            },
-            {
-                "text": "Tomato leaf curl virus can be controlled by using resistant varieties and neem oil spray.",
-                "category": "pest_control",
-                "crop": "tomato"
-            },
-            {
-                "text": "Paddy requires 2-3 cm water depth during vegetative stage.",
-                "category": "irrigation_advice",
-                "crop": "paddy"
-            }
-        ]
-        
-        for item in knowledge_items:
-            if category and item["category"] != category:
-                continue
-            
-            # Simple keyword matching
-            score = 0
-            if item["crop"] in query_lower:
-                score += 2
-            if any(keyword in query_lower for keyword in ["leaf spot", "fungicide", "treatment", "control"]):
-                score += 1
-            if any(keyword in query_lower for keyword in ["fertilizer", "npk", "manure", "compost"]):
-                score += 1
-            if any(keyword in query_lower for keyword in ["water", "irrigation", "depth"]):
-                score += 1
-            
-            if score > 0:
-                result = item.copy()
-                result["similarity"] = min(0.8, score / 5.0)
-                results.append(result)
-        
-        return sorted(results, key=lambda x: x["similarity"], reverse=True)[:top_k]
+    def _fallback_keyword_search(self, query: str, category: str = None, top_k: int = 3,
+                                 crop: str = None) -> List[Dict]:
+        """Fallback to BM25 keyword search over the stored knowledge if vector search fails"""
+        index = self._keyword_indexes.get(self.persist_directory)
+        if index is None or len(index) == 0:
+            # The store could not be opened or is still empty: search the built-in knowledge instead
+            index = self._get_seed_index()
+        return index.search(query, category, top_k, crop)
+    
+    @classmethod
+    def _get_seed_index(cls) -> KeywordIndex:
+        if cls._seed_index is None:
+            index = KeywordIndex()
+            index.add_many(
+                [cls.knowledge_id(item["text"], item["category"], item["crop"]) for item in cls.SEED_KNOWLEDGE],
+                [f"{item['text']} {item.get('keywords', '')}".strip() for item in cls.SEED_KNOWLEDGE],
+                [{"category": item["category"], "crop": item["crop"], "original_text": item["text"]}
+                 for item in cls.SEED_KNOWLEDGE]
+            )
+            cls._seed_index = index
+        return cls._seed_index
+    
+    @staticmethod
+    def knowledge_id(text: str, category: str, crop: str) -> str:
+        """Stable id from the item's content, so re-adding the same knowledge is a no-op"""
+        normalized = " ".join(text.lower().split())
+        digest = hashlib.sha1(f"{category}|{crop}|{normalized}".encode("utf-8")).hexdigest()
+        return f"knowledge_{digest[:20]}"
     
     def add_knowledge(self, text: str, category: str, crop: str, keywords: str = ""):
         """Add new knowledge to the database"""
-        # Get current count for ID
-        count = self.collection.count()
-        
-        document_text = f"{text} {keywords}"
-        metadata = {
+        return self.add_knowledge_many([{
+            "text": text,
             "category": category,
             "crop": crop,
-            "original_text": text
-        }
+            "keywords": keywords
+        }]) > 0
+    
+    def add_knowledge_many(self, items: List[Dict], batch_size: int = 1000) -> int:
+        """Add many knowledge items in batched collection calls; returns how many were new.
+        
+        Each item needs text, category and crop (keywords optional). Items get
+        content-hash ids, so duplicates in the input and items already stored
+        are skipped instead of being embedded again. Without a local embedding
+        model nothing more is added and the count so far is returned.
+        """
+        unique = {}
+        for item in items:
+            unique.setdefault(self.knowledge_id(item["text"], item["category"], item["crop"]), item)
+        ids = list(unique)
         
-        self.collection.add(
-            documents=[document_text],
-            metadatas=[metadata],
-            ids=[f"knowledge_{count}"]
-        )
+        added = 0
+        for start in range(0, len(ids), batch_size):
+            batch_ids = ids[start:start + batch_size]
+            existing = set(self.collection.get(ids=batch_ids, include=[])["ids"])
+            new_ids = [item_id for item_id in batch_ids if item_id not in existing]
+            if not new_ids:
+                continue
+            
+            # Combine text and keywords for better embedding
+            documents = [f"{unique[item_id]['text']} {unique[item_id].get('keywords', '')}".strip()
+                         for item_id in new_ids]
+            metadatas = [{
+                "category": unique[item_id]["category"],
+                "crop": unique[item_id]["crop"],
+                "original_text": unique[item_id]["text"]
+            } for item_id in new_ids]
+            try:
+                embeddings = self.embedding_function(documents)
+            except FileNotFoundError as e:
+                print(f"⚠️ Could not add knowledge without an embedding model: {e}")
+                return added
+            self.collection.add(
+                documents=documents,
+                embeddings=embeddings,
+                metadatas=metadatas,
+                ids=new_ids
+            )
+            keyword_index = self._keyword_indexes.get(self.persist_directory)
+            if keyword_index is not None:
+                keyword_index.add_many(new_ids, documents, metadatas)
+            added += len(new_ids)
+        return added
 
 # Test the ChromaDB knowledge base
 def test_knowledge_base():
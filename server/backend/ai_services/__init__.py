@@ -5,6 +5,12 @@ Minimal integration with existing MERN stack
 
 __version__ = "1.0.0"
 
-from .chatbot_service import ChatbotService
+__all__ = ['ChatbotService']
 
-__all__ = ['ChatbotService']
\ No newline at end of file
+def __getattr__(name):
+    # Imported on first access: the chatbot stack pulls in Gemini and speech SDKs,
+    # which would otherwise load for every ai_services submodule import
+    if name == 'ChatbotService':
+        from .chatbot_service import ChatbotService
+        return ChatbotService
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
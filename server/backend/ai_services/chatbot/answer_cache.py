@@ -0,0 +1,135 @@
+import copy
+import os
+import time
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+import numpy as np
+
+class SemanticAnswerCache:
+    """Cache of generated answers looked up by query-embedding similarity.
+
+    Answers are partitioned by language, rule-based intent and key user context
+    fields (crop, location), so a cached answer is only reused for a farmer in
+    the same situation. Within a partition the closest cached query is found
+    with one matrix-vector product and reused when its cosine similarity clears
+    ``similarity_threshold``. Entries expire after ``ttl_seconds`` and the whole
+    cache is dropped whenever ``version_provider`` reports a new knowledge base
+    version.
+    """
+
+    def __init__(self, similarity_threshold: float = 0.95, ttl_seconds: float = 6 * 3600,
+                 max_entries_per_partition: int = 1000,
+                 context_fields: Tuple[str, ...] = ('crop', 'location'),
+                 version_provider: Optional[Callable[[], str]] = None,
+                 version_check_interval: float = 30.0):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_partition = max_entries_per_partition
+        self.context_fields = context_fields
+        self.version_provider = version_provider
+        self.version_check_interval = version_check_interval
+
+        # partition key -> {'vectors': (n, dim) float32, 'entries': [(stored_at, response)]}
+        self._partitions: Dict[Tuple, Dict[str, Any]] = {}
+        self._kb_version = None
+        self._kb_version = self._read_version()
+        self._last_version_check = time.monotonic()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _read_version(self) -> Optional[str]:
+        if not self.version_provider:
+            return None
+        try:
+            return self.version_provider()
+        except Exception as e:
+            print(f"Error reading knowledge base version: {str(e)}")
+            return self._kb_version
+
+    def _check_version(self):
+        now = time.monotonic()
+        if not self.version_provider or now - self._last_version_check < self.version_check_interval:
+            return
+        self._last_version_check = now
+        version = self._read_version()
+        if version != self._kb_version:
+            self._kb_version = version
+            self.invalidate()
+
+    def partition_key(self, language: str, intent: str, user_context: Dict[str, Any]) -> Tuple:
+        context_values = tuple(str(user_context.get(field) or '').strip().lower() for field in self.context_fields)
+        return (language, intent) + context_values
+
+    def lookup(self, query_embedding: List[float], partition: Tuple) -> Optional[Dict[str, Any]]:
+        """Return a copy of the closest cached answer above the threshold, if any."""
+        self._check_version()
+        bucket = self._partitions.get(partition)
+        if not bucket or not bucket['entries']:
+            self.misses += 1
+            return None
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            self.misses += 1
+            return None
+
+        similarities = bucket['vectors'] @ (query / norm)
+        best = int(np.argmax(similarities))
+        stored_at, response = bucket['entries'][best]
+
+        if similarities[best] < self.similarity_threshold or time.time() - stored_at > self.ttl_seconds:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        cached = copy.deepcopy(response)
+        cached.setdefault('metadata', {}).update({
+            'answer_cache_hit': True,
+            'answer_cache_similarity': float(similarities[best])
+        })
+        return cached
+
+    def store(self, query_embedding: List[float], partition: Tuple, response: Dict[str, Any]):
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return
+
+        bucket = self._partitions.setdefault(partition, {'vectors': None, 'entries': []})
+        now = time.time()
+
+        # Drop expired entries and the oldest ones beyond the size bound
+        keep = [i for i, (stored_at, _) in enumerate(bucket['entries']) if now - stored_at <= self.ttl_seconds]
+        keep = keep[-(self.max_entries_per_partition - 1):] if self.max_entries_per_partition > 1 else []
+        entries = [bucket['entries'][i] for i in keep]
+        vectors = bucket['vectors'][keep] if keep else np.empty((0, query.shape[0]), dtype=np.float32)
+
+        entries.append((now, copy.deepcopy(response)))
+        bucket['entries'] = entries
+        bucket['vectors'] = np.vstack([vectors, (query / norm)[None, :]])
+
+    def invalidate(self):
+        """Drop every cached answer, e.g. after the knowledge base changed."""
+        self._partitions.clear()
+        self.invalidations += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'partitions': len(self._partitions),
+            'entries': sum(len(bucket['entries']) for bucket in self._partitions.values()),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'invalidations': self.invalidations,
+            'kb_version': self._kb_version
+        }
+
+def file_mtime_version(path: str) -> Callable[[], str]:
+    """Version provider that changes whenever the given file is rewritten."""
+    def version() -> str:
+        return str(os.path.getmtime(path)) if os.path.exists(path) else 'missing'
+    return version
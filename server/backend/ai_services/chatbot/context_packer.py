@@ -0,0 +1,113 @@
+from typing import Dict, List, Any, Optional
+
+from ..rag_pipeline.chunker import SentenceChunker
+from ..rag_pipeline.token_estimator import WORD_PATTERN, estimate_tokens, estimate_word_tokens
+
+# Whole-prompt token budgets; spoken channels get less context so generation starts sooner
+CHANNEL_BUDGETS = {'web': 3000, 'voice': 1200, 'ivr': 800}
+
+def parse_channel_budgets(spec: Optional[str]) -> Dict[str, int]:
+    """Parse overrides such as ``"web=4000,ivr=600"`` on top of the default budgets."""
+    budgets = dict(CHANNEL_BUDGETS)
+    for item in (spec or '').split(','):
+        if '=' in item:
+            channel, budget = item.split('=', 1)
+            budgets[channel.strip().lower()] = int(budget)
+    return budgets
+
+class ContextPacker:
+    """Fit retrieved documents into a per-channel prompt token budget.
+
+    Documents are taken in the order given (relevance order from the
+    retriever) and packed whole while they fit. A document that does not fit
+    is truncated at the last sentence boundary within the remaining budget (at
+    a word boundary if it has no usable sentence break), or dropped when less
+    than ``min_fragment_tokens`` remain. Tokens are estimated with the same
+    heuristic the chunker uses, so no tokenizer is loaded.
+    """
+
+    def __init__(self, channel_budgets: Optional[Dict[str, int]] = None, default_channel: str = 'web',
+                 min_fragment_tokens: int = 32):
+        self.channel_budgets = channel_budgets or dict(CHANNEL_BUDGETS)
+        self.default_channel = default_channel
+        # Truncated fragments shorter than this are dropped rather than packed
+        self.min_fragment_tokens = min_fragment_tokens
+        self._sentences = SentenceChunker()
+
+    def budget_for(self, channel: Optional[str]) -> int:
+        channel = (channel or self.default_channel).lower()
+        return self.channel_budgets.get(channel, self.channel_budgets[self.default_channel])
+
+    @staticmethod
+    def format_reference(index: int, doc: Dict[str, Any]) -> str:
+        source = (doc.get('metadata') or {}).get('file_name', 'Knowledge Base')
+        return f"[Reference {index} - {source}]:\n{doc['content']}"
+
+    def _truncate(self, text: str, budget: int) -> str:
+        """Longest prefix of ``text`` within ``budget`` tokens, ending on a sentence boundary if possible."""
+        used, kept_end = 0, 0
+        for _, end, sentence, _ in self._sentences.iter_sentences([text]):
+            cost = estimate_tokens(sentence)
+            if used + cost > budget:
+                break
+            used, kept_end = used + cost, end
+        if kept_end:
+            return text[:kept_end].rstrip()
+
+        # One oversized sentence (stored chunks often have no punctuation left): cut between words
+        for match in WORD_PATTERN.finditer(text):
+            used += estimate_word_tokens(match.group())
+            if used > budget - 1:
+                break
+            kept_end = match.end()
+        return f"{text[:kept_end]} ..." if kept_end else ''
+
+    def pack(self, documents: List[Dict[str, Any]], channel: Optional[str] = None,
+             reserved_tokens: int = 0) -> Dict[str, Any]:
+        """Pack documents into the channel budget minus ``reserved_tokens`` (the rest of the prompt).
+
+        Returns the packed documents and formatted context text along with a
+        report of how many tokens and documents were truncated or dropped.
+        """
+        budget = self.budget_for(channel)
+        available = max(0, budget - reserved_tokens)
+        packed: List[Dict[str, Any]] = []
+        input_tokens = used = truncated = dropped = 0
+
+        for doc in documents:
+            content_tokens = estimate_tokens(doc['content'])
+            input_tokens += content_tokens
+            header_tokens = estimate_tokens(self.format_reference(len(packed) + 1, dict(doc, content='')))
+            remaining = available - used - header_tokens
+
+            if content_tokens <= remaining:
+                packed.append(doc)
+                used += header_tokens + content_tokens
+                continue
+
+            fragment = self._truncate(doc['content'], remaining) if remaining >= self.min_fragment_tokens else ''
+            if not fragment:
+                dropped += 1
+                continue
+            fragment_tokens = estimate_tokens(fragment)
+            packed.append(dict(doc, content=fragment, truncated=True))
+            used += header_tokens + fragment_tokens
+            truncated += 1
+
+        packed_tokens = sum(estimate_tokens(doc['content']) for doc in packed)
+        return {
+            'documents': packed,
+            'text': "\n\n".join(self.format_reference(i, doc) for i, doc in enumerate(packed, 1)),
+            'report': {
+                'channel': (channel or self.default_channel).lower(),
+                'budget': budget,
+                'reserved_tokens': reserved_tokens,
+                'context_tokens': used,
+                'input_tokens': input_tokens,
+                'dropped_tokens': input_tokens - packed_tokens,
+                'documents_in': len(documents),
+                'documents_packed': len(packed),
+                'documents_truncated': truncated,
+                'documents_dropped': dropped
+            }
+        }
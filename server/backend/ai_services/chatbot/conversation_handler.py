@@ -1,51 +1,98 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Awaitable, Callable
 import asyncio
+import time
 from .response_generator import ResponseGenerator
 from .context_manager import ConversationContextManager
+from ..rag_pipeline.retriever import DocumentRetriever
+
+# Seconds each pre-generation stage may take before its fallback is used
+DEFAULT_STAGE_TIMEOUTS = {'context': 1.0, 'embedding': 2.0, 'answer_cache': 0.5, 'retrieval': 3.0, 'intent': 4.0}
 
 class ConversationHandler:
     def __init__(self, response_generator: ResponseGenerator, 
-                 context_manager: ConversationContextManager):
+                 context_manager: ConversationContextManager,
+                 retriever: Optional[DocumentRetriever] = None,
+                 top_k: int = 5, similarity_threshold: float = 0.7,
+                 stage_timeouts: Optional[Dict[str, float]] = None):
         self.response_generator = response_generator
         self.context_manager = context_manager
+        self.retriever = retriever or response_generator.retriever
+        self.top_k = top_k
+        self.similarity_threshold = similarity_threshold
+        self.stage_timeouts = {**DEFAULT_STAGE_TIMEOUTS, **(stage_timeouts or {})}
+        self.stage_stats = {stage: {'runs': 0, 'timeouts': 0, 'errors': 0} for stage in self.stage_timeouts}
         
         # Simple language detection patterns
         self.malayalam_pattern = r'[\u0D00-\u0D7F]'
     
     async def handle_user_message(self, user_id: str, message: str, 
-                                 user_profile: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Handle a complete user message and generate response."""
+                                 user_profile: Dict[str, Any] = None,
+                                 channel: str = 'web') -> Dict[str, Any]:
+        """Handle a complete user message and generate response.
+
+        The semantic answer cache is checked before retrieval and intent
+        classification, so a hit skips both. ``channel`` (web, voice or ivr)
+        selects the prompt token budget.
+        """
         try:
             # Detect language
             detected_language = self._detect_language(message)
             
-            # Get user context
-            user_context = await self.context_manager.get_user_context(user_id)
-            
-            # Update context with user profile if provided
-            if user_profile:
-                user_context.update(user_profile)
-            
-            # Extract additional context from the message
-            message_context = await self.context_manager.extract_context_from_query(message, user_context)
-            if message_context:
-                user_context = await self.context_manager.update_user_context(user_id, message_context)
-            
-            # Classify intent
-            intent_info = self._classify_intent(message, detected_language)
-            
-            # Get relevant context (simplified - no RAG retrieval)
-            context_docs = self._get_simple_context(message, intent_info)
+            # The query embedding is computed alongside context loading; the query cache shares it
+            # with the answer cache lookup and retrieval
+            stage_timings: Dict[str, float] = {}
+            user_context, _ = await asyncio.gather(
+                self._run_stage(
+                    'context', lambda: self._load_user_context(user_id, message, user_profile),
+                    lambda: dict(user_profile or {}), stage_timings
+                ),
+                self._run_stage(
+                    'embedding', lambda: self.retriever.embed_query(message), lambda: None, stage_timings
+                )
+            )
             
-            # Generate response - FIXED: Pass arguments correctly
-            response_data = await self.response_generator.generate_response(
-                query=message,
-                context_docs=context_docs,
-                user_context=user_context,
-                language=detected_language,
-                intent_info=intent_info  # Pass as keyword argument
+            # A cache hit needs neither retrieval nor the LLM intent call
+            cache_lookup = await self._run_stage(
+                'answer_cache',
+                lambda: self.response_generator.lookup_cached_answer(message, user_context, detected_language),
+                lambda: None, stage_timings
             )
             
+            start = time.perf_counter()
+            if cache_lookup and cache_lookup[0]:
+                response_data = cache_lookup[0]
+            else:
+                # Retrieval and intent classification are independent, so run them together:
+                # latency before generation is the slower stage rather than their sum
+                context_docs, intent_info = await asyncio.gather(
+                    self._run_stage(
+                        'retrieval', lambda: self.retriever.retrieve_relevant_documents(
+                            message, detected_language, top_k=self.top_k,
+                            similarity_threshold=self.similarity_threshold
+                        ),
+                        lambda: self._get_simple_context(message, self._classify_intent(message, detected_language)),
+                        stage_timings
+                    ),
+                    self._run_stage(
+                        'intent', lambda: self.response_generator.classify_intent(message, detected_language),
+                        lambda: self.response_generator.intent_classifier.classify_intent_rule_based(message),
+                        stage_timings
+                    )
+                )
+                
+                # Generate response
+                start = time.perf_counter()
+                response_data = await self.response_generator.generate_response(
+                    query=message,
+                    context_docs=context_docs,
+                    user_context=user_context,
+                    language=detected_language,
+                    channel=channel,
+                    intent_info=intent_info,  # Pass as keyword argument
+                    cache_lookup=cache_lookup
+                )
+            stage_timings['generation'] = (time.perf_counter() - start) * 1000
+            
             # Add to conversation history
             await self.context_manager.add_to_conversation_history(user_id, {
                 'type': 'user',
@@ -75,7 +122,9 @@ class ConversationHandler:
                     'intent': response_data['intent'],
                     'confidence': response_data['confidence'],
                     'sources_count': response_data['sources_used'],
-                    'user_context': user_context
+                    'user_context': user_context,
+                    'answer_cache_hit': bool(cache_lookup and cache_lookup[0]),
+                    'stage_timings_ms': stage_timings
                 },
                 'suggestions': await self._get_follow_up_suggestions(
                     response_data['intent'], detected_language, user_context
@@ -86,6 +135,44 @@ class ConversationHandler:
             print(f"Conversation handling error: {str(e)}")
             return await self._handle_error(user_id, message, str(e))
     
+    async def _load_user_context(self, user_id: str, message: str,
+                                 user_profile: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Stored user context merged with the profile and anything the message reveals."""
+        user_context = await self.context_manager.get_user_context(user_id)
+        
+        # Update context with user profile if provided
+        if user_profile:
+            user_context.update(user_profile)
+        
+        # Extract additional context from the message
+        message_context = await self.context_manager.extract_context_from_query(message, user_context)
+        if message_context:
+            user_context = await self.context_manager.update_user_context(user_id, message_context)
+        return user_context
+    
+    async def _run_stage(self, stage: str, run: Callable[[], Awaitable[Any]], fallback: Callable[[], Any],
+                         timings: Dict[str, float]) -> Any:
+        """Run one stage under its timeout, using the fallback result if it times out or fails."""
+        stats = self.stage_stats[stage]
+        stats['runs'] += 1
+        start = time.perf_counter()
+        try:
+            return await asyncio.wait_for(run(), timeout=self.stage_timeouts[stage])
+        except asyncio.TimeoutError:
+            stats['timeouts'] += 1
+            print(f"Stage {stage} timed out after {self.stage_timeouts[stage]}s, using fallback")
+        except Exception as e:
+            stats['errors'] += 1
+            print(f"Error in {stage} stage, using fallback: {str(e)}")
+        finally:
+            timings[stage] = (time.perf_counter() - start) * 1000
+        return fallback()
+    
+    def get_stage_stats(self) -> Dict[str, Any]:
+        """Per-stage run, timeout and error counts with the configured timeouts."""
+        return {stage: {**stats, 'timeout_seconds': self.stage_timeouts[stage]}
+                for stage, stats in self.stage_stats.items()}
+    
     def _detect_language(self, text: str) -> str:
         """Simple language detection."""
         import re
@@ -149,7 +236,7 @@ class ConversationHandler:
         }
     
     def _get_simple_context(self, message: str, intent_info: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Get simple context without RAG pipeline."""
+        """Minimal built-in context, used only when retrieval times out or fails."""
         # Basic agricultural knowledge
         knowledge_base = {
             'rice': {
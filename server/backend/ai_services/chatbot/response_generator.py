@@ -3,8 +3,6 @@ from typing import Dict, List, Any, Optional, Tuple
 import json
 import asyncio
 import re
-import speech_recognition as sr
-from gtts import gTTS
 import io
 import tempfile
 import os
@@ -12,16 +10,24 @@ import os
 from ..rag_pipeline.retriever import DocumentRetriever
 from ..nlp_services.translator import MultilingualTranslator
 from ..nlp_services.intent_classifier import IntentClassifier
+from .answer_cache import SemanticAnswerCache
+from .context_packer import ContextPacker
+from ..rag_pipeline.token_estimator import estimate_tokens
 
 class ResponseGenerator:
     def __init__(self, gemini_api_key: str, retriever: DocumentRetriever, 
-                 translator: MultilingualTranslator, intent_classifier: IntentClassifier):
+                 translator: MultilingualTranslator, intent_classifier: IntentClassifier,
+                 answer_cache: Optional[SemanticAnswerCache] = None,
+                 context_packer: Optional[ContextPacker] = None):
         genai.configure(api_key=gemini_api_key)
         self.model = genai.GenerativeModel('gemini-1.5-flash')
         self.retriever = retriever
         self.translator = translator
         self.intent_classifier = intent_classifier
-        self.recognizer = sr.Recognizer()
+        self.answer_cache = answer_cache
+        self.context_packer = context_packer or ContextPacker()
+        # Speech dependencies are only loaded by the voice path
+        self._recognizer = None
         
         # Response templates by intent
         self.response_templates = {
@@ -56,7 +62,8 @@ class ResponseGenerator:
     
     async def process_voice_input(self, audio_data: bytes, audio_format: str, 
                                 query: str, context_docs: List[Dict[str, Any]],
-                                user_context: Dict[str, Any], language: str = 'en') -> Dict[str, Any]:
+                                user_context: Dict[str, Any], language: str = 'en',
+                                channel: str = 'voice') -> Dict[str, Any]:
         """Process voice input and return both text and audio response"""
         try:
             print(f"DEBUG: Processing voice input, audio size: {len(audio_data)} bytes")
@@ -71,7 +78,7 @@ class ResponseGenerator:
             
             # Generate text response using existing method
             text_response = await self.generate_response(
-                transcript, context_docs, user_context, detected_lang
+                transcript, context_docs, user_context, detected_lang, channel=channel
             )
             
             # Convert text response to speech
@@ -101,8 +108,16 @@ class ResponseGenerator:
                 'detected_language': language
             }
     
+    @property
+    def recognizer(self):
+        if self._recognizer is None:
+            import speech_recognition as sr
+            self._recognizer = sr.Recognizer()
+        return self._recognizer
+    
     async def _speech_to_text(self, audio_data: bytes, audio_format: str) -> Tuple[str, str]:
         """Convert audio to text using Google Speech Recognition"""
+        import speech_recognition as sr
         try:
             # Create temporary audio file
             with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{audio_format}') as tmp:
@@ -139,6 +154,8 @@ class ResponseGenerator:
     async def _text_to_speech(self, text: str, language: str) -> bytes:
         """Convert text to speech using gTTS"""
         try:
+            from gtts import gTTS
+            
             if language == 'ml':
                 # Malayalam TTS
                 tts = gTTS(text=text, lang='ml')
@@ -177,22 +194,28 @@ class ResponseGenerator:
         context_docs: List[Dict[str, Any]],
         user_context: Dict[str, Any],
         language: str = 'en',
+        channel: str = 'web',
         **kwargs
     ) -> Dict[str, Any]:
-        """Generate a comprehensive response using RAG and LLM."""
+        """Generate a comprehensive response using RAG and LLM.
+
+        Retrieved documents are packed into the token budget of ``channel``
+        (web, voice or ivr) so prompt size, latency and cost stay bounded.
+        """
         try:
             print(f"DEBUG: Starting response generation for query: {query}")
             
-            # Classify intent
-            print("DEBUG: About to classify intent...")
-            try:
-                intent_info = await self.intent_classifier.classify_intent_hybrid(query, language)
-                print(f"DEBUG: Intent classified using hybrid method: {intent_info}")
-            except Exception as intent_error:
-                print(f"DEBUG: Hybrid intent classification failed: {str(intent_error)}")
-                print("DEBUG: Falling back to simple intent classification...")
-                intent_info = self._simple_intent_classification(query)
-                print(f"DEBUG: Intent classified using fallback: {intent_info}")
+            # Serve near-duplicate questions from the semantic answer cache, unless the caller looked it up
+            if 'cache_lookup' in kwargs:
+                cache_lookup = kwargs['cache_lookup']
+            else:
+                cache_lookup = await self.lookup_cached_answer(query, user_context, language)
+            if cache_lookup and cache_lookup[0]:
+                print("DEBUG: Answer served from semantic cache")
+                return cache_lookup[0]
+            
+            # Classify intent, unless the caller already did so concurrently with retrieval
+            intent_info = kwargs.get('intent_info') or await self.classify_intent(query, language)
             
             intent = intent_info['primary_intent'] if 'primary_intent' in intent_info else intent_info.get('intent', 'general')
             
@@ -200,9 +223,15 @@ class ResponseGenerator:
             template = self.response_templates.get(intent, self.response_templates['general'])
             print(f"DEBUG: Using template for intent: {intent}")
             
-            # Format context from retrieved documents
-            context_text = self._format_context(context_docs)
-            print(f"DEBUG: Context formatted, length: {len(context_text)}")
+            # Pack retrieved documents into what the channel budget leaves after the rest of the prompt
+            prompt_frame = await self._build_response_prompt(
+                query, "", template, user_context, language, intent
+            )
+            packed_context = self.context_packer.pack(context_docs, channel, estimate_tokens(prompt_frame))
+            packing_report = packed_context['report']
+            context_text = packed_context['text'] or self._format_context([])
+            print(f"DEBUG: Context packed: {packing_report['documents_packed']}/{packing_report['documents_in']} docs, "
+                  f"{packing_report['dropped_tokens']} tokens dropped for channel {packing_report['channel']}")
             
             # Build comprehensive prompt
             print("DEBUG: Building response prompt...")
@@ -213,7 +242,7 @@ class ResponseGenerator:
             
             # Generate response using Gemini
             print("DEBUG: About to call Gemini API...")
-            response = await self._safe_generate_content(response_prompt)
+            response, llm_answered = await self._safe_generate_content(response_prompt)
             generated_text = response.strip()
             print(f"DEBUG: Gemini response received, length: {len(generated_text)}")
             
@@ -224,42 +253,96 @@ class ResponseGenerator:
             )
             print("DEBUG: Response post-processed successfully")
             
-            return {
+            response_data = {
                 'response': processed_response['text'],
                 'intent': intent,
                 'confidence': intent_info.get('confidence', 0.8),
                 'language': language,
-                'sources_used': len(context_docs),
+                'sources_used': len(packed_context['documents']),
                 'metadata': {
                     'intent_info': intent_info,
-                    'context_docs': context_docs,
+                    'context_docs': packed_context['documents'],
+                    'context_packing': packing_report,
                     'user_context': user_context,
                     'processing_info': processed_response['metadata']
                 }
             }
             
+            # A canned fallback from an LLM outage would otherwise be served for the whole TTL
+            if cache_lookup and llm_answered:
+                self._store_cached_answer(cache_lookup[1], cache_lookup[2], response_data)
+            
+            return response_data
+            
         except Exception as e:
             print(f"DEBUG: Exception in generate_response: {str(e)}")
             import traceback
             traceback.print_exc()
             return await self._generate_fallback_response(query, language, str(e))
 
-    async def _safe_generate_content(self, prompt: str) -> str:
-        """Safely generate content with Gemini, with fallbacks"""
+    async def classify_intent(self, query: str, language: str = 'en') -> Dict[str, Any]:
+        """Hybrid rule/LLM intent classification with a keyword fallback."""
+        print("DEBUG: About to classify intent...")
+        try:
+            intent_info = await self.intent_classifier.classify_intent_hybrid(query, language)
+            print(f"DEBUG: Intent classified using hybrid method: {intent_info}")
+        except Exception as intent_error:
+            print(f"DEBUG: Hybrid intent classification failed: {str(intent_error)}")
+            print("DEBUG: Falling back to simple intent classification...")
+            intent_info = self._simple_intent_classification(query)
+            print(f"DEBUG: Intent classified using fallback: {intent_info}")
+        return intent_info
+
+    async def lookup_cached_answer(self, query: str, user_context: Dict[str, Any], 
+                                    language: str) -> Optional[Tuple[Optional[Dict[str, Any]], List[float], Tuple]]:
+        """Look the query up in the answer cache.
+
+        Returns (cached_response_or_None, query_embedding, partition), or None when
+        caching is disabled or unavailable. The partition uses the rule-based intent
+        so a lookup never pays for an LLM intent call.
+        """
+        if not self.answer_cache:
+            return None
+        try:
+            intent = self.intent_classifier.classify_intent_rule_based(query)['primary_intent']
+            partition = self.answer_cache.partition_key(language, intent, user_context)
+            query_embedding = await self.retriever.embed_query(query)
+            return self.answer_cache.lookup(query_embedding, partition), query_embedding, partition
+        except Exception as e:
+            print(f"DEBUG: Answer cache lookup failed: {str(e)}")
+            return None
+
+    def _store_cached_answer(self, query_embedding: List[float], partition: Tuple, 
+                             response_data: Dict[str, Any]):
+        # Per-user context never goes into a shared cache entry
+        cacheable = {key: value for key, value in response_data.items() if key != 'metadata'}
+        cacheable['metadata'] = {
+            key: value for key, value in response_data['metadata'].items() if key != 'user_context'
+        }
+        self.answer_cache.store(query_embedding, partition, cacheable)
+
+    async def _safe_generate_content(self, prompt: str) -> Tuple[str, bool]:
+        """Safely generate content with Gemini, with fallbacks.
+
+        Returns (text, llm_answered); llm_answered is False when the text is a
+        canned fallback, which must not be cached as an answer.
+        """
         try:
             # Try async first
             response = await asyncio.to_thread(self.model.generate_content, prompt)
             if response and hasattr(response, 'text'):
-                return response.text
+                return response.text, True
             else:
                 print("DEBUG: No text in Gemini response, trying sync...")
                 # Fallback to sync call
                 response = self.model.generate_content(prompt)
-                return response.text if response else "I apologize, but I couldn't generate a proper response."
+                if response:
+                    return response.text, True
+                return "I apologize, but I couldn't generate a proper response.", False
         except Exception as e:
             print(f"DEBUG: Gemini API call failed: {str(e)}")
             # Return a basic response based on intent
-            return self._generate_basic_response(prompt)
+            return self._generate_basic_response(prompt), False
 
     def _generate_basic_response(self, prompt: str) -> str:
         """Generate a basic response when Gemini fails"""
@@ -336,9 +419,7 @@ RESPONSE:
             return "No relevant information found in knowledge base."
         formatted_context = []
         for i, doc in enumerate(context_docs, 1):
-            content = doc['content']
-            source = doc['metadata'].get('file_name', 'Knowledge Base')
-            formatted_context.append(f"[Reference {i} - {source}]:\n{content}")
+            formatted_context.append(self.context_packer.format_reference(i, doc))
         return "\n\n".join(formatted_context)
 
     async def _post_process_response(self, response_text: str, language: str, 
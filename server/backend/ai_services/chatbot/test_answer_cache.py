@@ -0,0 +1,77 @@
+import pytest
+
+from . import answer_cache
+from .answer_cache import SemanticAnswerCache, file_mtime_version
+
+RICE = ('en', 'pest_control', 'rice', 'kottayam')
+
+class FakeClock:
+    def __init__(self):
+        self.wall = 1_000_000.0
+        self.mono = 1000.0
+
+    def time(self):
+        return self.wall
+
+    def monotonic(self):
+        return self.mono
+
+    def advance(self, seconds):
+        self.wall += seconds
+        self.mono += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(answer_cache.time, 'time', fake.time)
+    monkeypatch.setattr(answer_cache.time, 'monotonic', fake.monotonic)
+    return fake
+
+def test_partition_keys_normalise_the_user_context():
+    cache = SemanticAnswerCache()
+
+    assert cache.partition_key('en', 'pest_control', {'crop': ' Rice ', 'location': 'Kottayam'}) == RICE
+    assert cache.partition_key('en', 'general', {}) == ('en', 'general', '', '')
+
+def test_similar_queries_reuse_a_copy_of_the_answer(clock):
+    cache = SemanticAnswerCache(similarity_threshold=0.95)
+    cache.store([1.0, 0.0, 0.0], RICE, {'response': 'Spray tricyclazole', 'metadata': {}})
+
+    hit = cache.lookup([0.99, 0.05, 0.0], RICE)
+    hit['response'] = 'changed'
+
+    assert hit['metadata']['answer_cache_hit'] is True
+    assert cache.lookup([1.0, 0.0, 0.0], RICE)['response'] == 'Spray tricyclazole'
+    assert cache.lookup([0.0, 1.0, 0.0], RICE) is None
+    assert cache.lookup([1.0, 0.0, 0.0], ('en', 'pest_control', 'banana', 'kottayam')) is None
+    assert cache.get_stats()['hits'] == 2 and cache.get_stats()['misses'] == 2
+
+def test_entries_expire_and_partitions_stay_bounded(clock):
+    cache = SemanticAnswerCache(ttl_seconds=60, max_entries_per_partition=2)
+    for i in range(3):
+        cache.store([1.0, float(i)], RICE, {'response': str(i)})
+
+    assert cache.get_stats()['entries'] == 2
+    assert cache.lookup([1.0, 0.0], RICE) is None
+
+    clock.advance(61)
+    assert cache.lookup([1.0, 2.0], RICE) is None
+
+def test_knowledge_base_version_change_drops_every_answer(clock):
+    version = {'value': 'v1'}
+    cache = SemanticAnswerCache(version_provider=lambda: version['value'], version_check_interval=30)
+    cache.store([1.0, 0.0], RICE, {'response': 'old advice'})
+
+    version['value'] = 'v2'
+    assert cache.lookup([1.0, 0.0], RICE) is not None  # not rechecked yet
+    clock.advance(31)
+    assert cache.lookup([1.0, 0.0], RICE) is None
+    assert cache.get_stats()['kb_version'] == 'v2' and cache.invalidations == 1
+
+def test_file_mtime_version_tracks_rewrites(tmp_path):
+    path = tmp_path / 'manifest.json'
+    version = file_mtime_version(str(path))
+
+    assert version() == 'missing'
+    path.write_text('{}')
+    assert version() != 'missing'
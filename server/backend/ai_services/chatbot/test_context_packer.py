@@ -0,0 +1,55 @@
+from ..rag_pipeline.token_estimator import estimate_tokens
+from .context_packer import CHANNEL_BUDGETS, ContextPacker, parse_channel_budgets
+
+def doc(content, file_name='rice.txt'):
+    return {'id': file_name, 'content': content, 'metadata': {'file_name': file_name}}
+
+SENTENCES = " ".join(f"Sentence {i} explains how to manage water in the paddy field." for i in range(40))
+
+def test_channel_budgets_parse_overrides_and_fall_back_to_the_default():
+    budgets = parse_channel_budgets("web=4000, IVR=600,bogus")
+    packer = ContextPacker(budgets)
+
+    assert budgets == {**CHANNEL_BUDGETS, 'web': 4000, 'ivr': 600}
+    assert packer.budget_for('IVR') == 600
+    assert packer.budget_for('sms') == packer.budget_for(None) == 4000
+
+def test_documents_that_fit_are_packed_whole_in_order():
+    packer = ContextPacker()
+
+    result = packer.pack([doc("Flood the field to 5 cm.", 'a.txt'), doc("Drain before harvest.", 'b.txt')])
+
+    assert [d['id'] for d in result['documents']] == ['a.txt', 'b.txt']
+    assert result['text'] == ("[Reference 1 - a.txt]:\nFlood the field to 5 cm.\n\n"
+                              "[Reference 2 - b.txt]:\nDrain before harvest.")
+    assert result['report']['documents_truncated'] == result['report']['documents_dropped'] == 0
+
+def test_overflowing_document_is_cut_at_a_sentence_boundary():
+    packer = ContextPacker({'voice': 120, 'web': 3000}, min_fragment_tokens=16)
+
+    result = packer.pack([doc(SENTENCES)], channel='voice', reserved_tokens=20)
+
+    packed = result['documents'][0]
+    assert packed['truncated'] is True
+    assert packed['content'].endswith("paddy field.")
+    assert SENTENCES.startswith(packed['content'])
+    assert result['report']['context_tokens'] <= 100
+    assert result['report']['dropped_tokens'] == estimate_tokens(SENTENCES) - estimate_tokens(packed['content'])
+
+def test_unpunctuated_text_is_cut_between_words():
+    packer = ContextPacker({'web': 60}, min_fragment_tokens=8)
+    content = " ".join(["irrigation"] * 100)
+
+    packed = packer.pack([doc(content)])['documents'][0]
+
+    assert packed['content'].endswith("irrigation ...")
+    assert estimate_tokens(packed['content']) <= 60
+
+def test_documents_are_dropped_when_too_little_budget_remains():
+    packer = ContextPacker({'ivr': 80, 'web': 3000}, min_fragment_tokens=32)
+
+    result = packer.pack([doc(" ".join(["word"] * 60), 'a.txt'), doc(SENTENCES, 'b.txt')], channel='ivr')
+
+    assert [d['id'] for d in result['documents']] == ['a.txt']
+    assert result['report']['documents_dropped'] == 1
+    assert result['report']['channel'] == 'ivr'
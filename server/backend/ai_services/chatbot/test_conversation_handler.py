@@ -0,0 +1,90 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from .context_manager import ConversationContextManager
+from .conversation_handler import ConversationHandler
+
+CACHED = {'response': 'Spray tricyclazole at 0.6 g/l.', 'intent': 'pest_control', 'confidence': 0.9,
+          'sources_used': 2, 'metadata': {'answer_cache_hit': True}}
+
+class FakeRetriever:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.retrievals = 0
+
+    async def embed_query(self, query):
+        return [1.0, 0.0]
+
+    async def retrieve_relevant_documents(self, query, language, top_k, similarity_threshold):
+        self.retrievals += 1
+        await asyncio.sleep(self.delay)
+        return [{'id': 'rice-blast', 'content': 'Rice blast advice', 'metadata': {}}]
+
+class FakeResponseGenerator:
+    def __init__(self, retriever, cached=None, intent_delay=0.0):
+        self.retriever = retriever
+        self.cached = cached
+        self.intent_delay = intent_delay
+        self.intent_calls = 0
+        self.generated = []
+        self.intent_classifier = SimpleNamespace(
+            classify_intent_rule_based=lambda message: {'intent': 'general', 'confidence': 0.1})
+
+    async def lookup_cached_answer(self, query, user_context, language):
+        return self.cached, [1.0, 0.0], (language, 'pest_control', '', '')
+
+    async def classify_intent(self, query, language):
+        self.intent_calls += 1
+        await asyncio.sleep(self.intent_delay)
+        return {'intent': 'pest_control', 'confidence': 0.8}
+
+    async def generate_response(self, query, context_docs, user_context, language, channel, intent_info,
+                                cache_lookup):
+        self.generated.append({'context_docs': context_docs, 'intent_info': intent_info, 'channel': channel})
+        return {'response': 'Generated advice', 'intent': intent_info['intent'],
+                'confidence': intent_info['confidence'], 'sources_used': len(context_docs)}
+
+def make_handler(retriever, generator, **kwargs):
+    return ConversationHandler(generator, ConversationContextManager(), retriever=retriever, **kwargs)
+
+def test_answer_cache_hit_skips_retrieval_intent_and_generation():
+    retriever = FakeRetriever()
+    generator = FakeResponseGenerator(retriever, cached=CACHED)
+
+    result = asyncio.run(make_handler(retriever, generator).handle_user_message('farmer-1', "How to treat rice blast?"))
+
+    assert result['success'] and result['response'] == CACHED['response']
+    assert result['metadata']['answer_cache_hit'] is True
+    assert retriever.retrievals == generator.intent_calls == 0
+    assert not generator.generated
+
+def test_retrieval_and_intent_run_concurrently_on_a_miss():
+    retriever = FakeRetriever(delay=0.2)
+    generator = FakeResponseGenerator(retriever, intent_delay=0.2)
+
+    start = time.perf_counter()
+    result = asyncio.run(make_handler(retriever, generator).handle_user_message('farmer-1', "rice blast spray",
+                                                                                channel='voice'))
+
+    assert time.perf_counter() - start < 0.35
+    assert result['response'] == 'Generated advice'
+    assert result['metadata']['answer_cache_hit'] is False
+    assert generator.generated[0]['channel'] == 'voice'
+    assert generator.generated[0]['intent_info']['intent'] == 'pest_control'
+
+def test_slow_stages_fall_back_and_are_counted():
+    retriever = FakeRetriever(delay=1.0)
+    generator = FakeResponseGenerator(retriever, intent_delay=1.0)
+    handler = make_handler(retriever, generator, stage_timeouts={'retrieval': 0.05, 'intent': 0.05})
+
+    message = "When to apply fertilizer for coconut?"
+    result = asyncio.run(handler.handle_user_message('farmer-1', message))
+
+    assert result['success']
+    assert generator.generated[0]['intent_info'] == {'intent': 'general', 'confidence': 0.1}
+    assert generator.generated[0]['context_docs'] == handler._get_simple_context(
+        message, handler._classify_intent(message, 'en'))
+    stats = handler.get_stage_stats()
+    assert stats['retrieval']['timeouts'] == stats['intent']['timeouts'] == 1
+    assert stats['answer_cache']['timeouts'] == 0
@@ -1,29 +1,18 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, BackgroundTasks
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, List
 import os
 from dotenv import load_dotenv
 import asyncio
 import base64
+import time
 from datetime import datetime
 
-# ✅ AI services
-from ai_services.chatbot.conversation_handler import ConversationHandler
-from ai_services.chatbot.response_generator import ResponseGenerator
-from ai_services.chatbot.context_manager import ConversationContextManager
-
-from ai_services.nlp_services.language_detector import LanguageDetector
-from ai_services.nlp_services.translator import MultilingualTranslator
-from ai_services.nlp_services.intent_classifier import IntentClassifier
-
-from ai_services.rag_pipeline.retriever import DocumentRetriever
-from ai_services.rag_pipeline.embeddings_manager import EmbeddingsManager
-from ai_services.rag_pipeline.vector_store import VectorStore
-
-# ✅ Voice services from updated_voice/services/
-from ai_services.chatbot.response_generator import ResponseGenerator as VoiceChatResponse 
-from ai_services.services.voice_storage_service import VoiceStorageService
+# ✅ AI services are imported and built lazily by their factories below, so importing this
+# module stays cheap and the Gemini, Chroma and speech dependencies load in parallel at startup
+from ai_services.service_registry import ServiceRegistry
 
 # Load environment variables
 load_dotenv()
@@ -40,13 +29,17 @@ app.add_middleware(
 )
 
 # Initialize services
-ai_services = {}
+services = ServiceRegistry()
+# Built services by name; a service missing here has not been built yet
+ai_services = services.services
 voice_storage_service = None
+startup_task = None
 
 class ChatRequest(BaseModel):
     user_id: str
     message: str
     language: Optional[str] = "en"
+    channel: Optional[str] = "web"
 
 class ChatResponse(BaseModel):
     success: bool
@@ -66,83 +59,188 @@ class VoiceChatResponse(BaseModel):
     intent: str
     confidence: float
 
+# Service factories run in worker threads; each imports its own dependencies
+def build_language_detector():
+    from ai_services.nlp_services.language_detector import LanguageDetector
+    return LanguageDetector()
+
+def build_translator():
+    from ai_services.nlp_services.translator import MultilingualTranslator
+    return MultilingualTranslator(os.getenv("GEMINI_API_KEY"))
+
+def build_intent_classifier():
+    from ai_services.nlp_services.intent_classifier import IntentClassifier
+    return IntentClassifier(os.getenv("GEMINI_API_KEY"))
+
+def build_embeddings_manager():
+    from ai_services.rag_pipeline.embeddings_manager import EmbeddingsManager
+    from ai_services.rag_pipeline.embedding_cache import EmbeddingCache
+    from ai_services.rag_pipeline.local_embedder import local_embedder_from_env
+    # EMBEDDING_BACKEND=local embeds in-process; the index must be built with the same backend
+    local_embedder = local_embedder_from_env()
+    if local_embedder:
+        # Load the model now, during startup, instead of on the first chat
+        local_embedder.load()
+    return EmbeddingsManager(os.getenv("GEMINI_API_KEY"), cache=EmbeddingCache(), embedding_backend=local_embedder)
+
+def build_vector_store():
+    from ai_services.rag_pipeline.vector_store import VectorStore
+    return VectorStore(
+        backend=os.getenv("VECTOR_STORE_BACKEND", "chroma"),
+        faiss_index_factory=os.getenv("FAISS_INDEX_FACTORY", "Flat"),
+        partition_collections=os.getenv("PARTITION_COLLECTIONS", "").lower() == "true"
+    )
+
+def build_async_vector_store(vector_store):
+    from ai_services.rag_pipeline.async_vector_store import AsyncVectorStore
+    # Chroma calls run on their own bounded pool, e.g. VECTOR_STORE_WORKERS=8
+    return AsyncVectorStore(
+        vector_store,
+        max_workers=int(os.getenv("VECTOR_STORE_WORKERS", "4")),
+        max_concurrency=int(os.getenv("VECTOR_STORE_CONCURRENCY", "0")) or None
+    )
+
+def build_retriever(embeddings_manager, async_vector_store):
+    from ai_services.rag_pipeline.retriever import DocumentRetriever
+    return DocumentRetriever(embeddings_manager, async_vector_store.store, async_vector_store=async_vector_store)
+
+def build_response_generator(retriever, translator, intent_classifier):
+    from ai_services.chatbot.response_generator import ResponseGenerator
+    from ai_services.chatbot.answer_cache import SemanticAnswerCache
+    from ai_services.chatbot.context_packer import ContextPacker, parse_channel_budgets
+    return ResponseGenerator(
+        os.getenv("GEMINI_API_KEY"),
+        retriever,
+        translator,
+        intent_classifier,
+        answer_cache=SemanticAnswerCache(
+            # Re-ingestion or a switch to a rebuilt index invalidates cached answers
+            version_provider=retriever.vector_store.index_version
+        ),
+        # Per-channel prompt budgets, e.g. CONTEXT_TOKEN_BUDGETS="web=4000,voice=1200,ivr=600"
+        context_packer=ContextPacker(parse_channel_budgets(os.getenv("CONTEXT_TOKEN_BUDGETS")))
+    )
+
+def build_context_manager():
+    from ai_services.chatbot.context_manager import ConversationContextManager
+    return ConversationContextManager()
+
+def build_conversation_handler(response_generator, context_manager, retriever):
+    from ai_services.chatbot.conversation_handler import ConversationHandler
+    return ConversationHandler(response_generator, context_manager, retriever=retriever)
+
+def build_voice_storage():
+    # from ai_services.services.voice_storage_service import VoiceStorageService
+    # from database.mongodb import get_database
+    # return VoiceStorageService(get_database())
+    return voice_storage_service
+
+services.register('language_detector', build_language_detector)
+services.register('translator', build_translator)
+services.register('intent_classifier', build_intent_classifier)
+services.register('embeddings_manager', build_embeddings_manager)
+services.register('vector_store', build_vector_store)
+services.register('async_vector_store', build_async_vector_store, ['vector_store'])
+services.register('retriever', build_retriever, ['embeddings_manager', 'async_vector_store'])
+services.register('response_generator', build_response_generator,
+                  ['retriever', 'translator', 'intent_classifier'])
+services.register('context_manager', build_context_manager)
+# Chat is the critical path: the service reports ready once it (and what it needs) is built
+services.register('conversation_handler', build_conversation_handler,
+                  ['response_generator', 'context_manager', 'retriever'], critical=True)
+services.register('voice_storage', build_voice_storage)
+
+async def warm_up_services():
+    started = time.perf_counter()
+    print("🤖 Initializing AI services...")
+    if await services.start():
+        print(f"✅ Chat services ready in {time.perf_counter() - started:.2f}s")
+    else:
+        print(f"❌ Chat services failed to initialize: {services.errors}")
+    # Everything else is built on first use unless WARM_ALL_SERVICES=true
+    if os.getenv("WARM_ALL_SERVICES", "").lower() == "true":
+        await services.start(services.status()['services'].keys())
+
 @app.on_event("startup")
 async def startup_event():
-    global ai_services, voice_storage_service
+    global startup_task
     
-    gemini_api_key = os.getenv("GEMINI_API_KEY")
-    if not gemini_api_key:
+    if not os.getenv("GEMINI_API_KEY"):
         raise Exception("GEMINI_API_KEY not found in environment variables")
     
+    # Build in the background so the server accepts connections (and answers /ready) immediately
+    startup_task = asyncio.create_task(warm_up_services())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if startup_task and not startup_task.done():
+        startup_task.cancel()
+    if 'async_vector_store' in services:
+        ai_services['async_vector_store'].close()
+
+async def run_until_disconnected(http_request: Request, coroutine, poll_interval: float = 0.25):
+    """Await ``coroutine``, cancelling it if the client disconnects first.
+
+    Cancellation propagates into queued vector store and LLM calls, so work
+    for an abandoned request stops instead of holding pool slots.
+    """
+    task = asyncio.ensure_future(coroutine)
     try:
-        # Initialize core services
-        print("🤖 Initializing AI services...")
-        
-        # NLP Services
-        language_detector = LanguageDetector()
-        translator = MultilingualTranslator(gemini_api_key)
-        intent_classifier = IntentClassifier(gemini_api_key)
-        
-        # RAG Service
-        embeddings_manager = EmbeddingsManager(gemini_api_key)
-        vector_store = VectorStore()
-        retriever = DocumentRetriever(embeddings_manager, vector_store)
-        
-        # Chatbot Services  
-        response_generator = ResponseGenerator(
-            gemini_api_key,
-            retriever,
-            translator,
-            intent_classifier
-        )
-        context_manager = ConversationContextManager()
-        conversation_handler = ConversationHandler(response_generator, context_manager)
-        
-        # Voice Storage Service
-       # from database.mongodb import get_database
-       # voice_storage_service = VoiceStorageService(get_database())
-        
-        # Store services
-        ai_services = {
-            'language_detector': language_detector,
-            'translator': translator,
-            'intent_classifier': intent_classifier,
-            'retriever': retriever,
-            'response_generator': response_generator,
-            'context_manager': context_manager,
-            'conversation_handler': conversation_handler,
-            'voice_storage': voice_storage_service
-        }
-        
-        print("✅ All AI services initialized successfully")
-        
-    except Exception as e:
-        print(f"❌ Error initializing AI services: {str(e)}")
-        raise e
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                task.cancel()
+                raise HTTPException(status_code=499, detail="Client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
+
+async def require_chat_services():
+    """Raise 503 unless the chat path is built, retrying critical builds that failed."""
+    if services.ready:
+        return
+    if not services.failed:
+        raise HTTPException(status_code=503, detail="AI services initializing")
+    # The registry rate-limits retries, so a burst of requests does not rebuild in a loop
+    if not await services.start():
+        raise HTTPException(status_code=503, detail=f"AI services unavailable: {services.errors}")
 
 @app.get("/health")
 async def health_check():
-    return {
-        "status": "healthy", 
+    """Liveness: 503 while a critical service is failing to build, so the orchestrator can restart us."""
+    failed = services.failed
+    content = {
+        "status": "unhealthy" if failed else "healthy",
         "service": "Krishi Seva AI",
+        "ready": services.ready,
         "services_loaded": len(ai_services),
-        "available_services": list(ai_services.keys())
+        "available_services": list(ai_services.keys()),
+        "failed_services": {name: services.errors.get(name) for name in failed}
     }
+    return JSONResponse(status_code=503 if failed else 200, content=content)
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 200 once the chat path is initialized, 503 until then."""
+    await require_chat_services()
+    return {"ready": True, "build_seconds": services.build_seconds}
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(request: ChatRequest, http_request: Request):
     try:
-        if not ai_services:
-            raise HTTPException(status_code=503, detail="AI services not initialized")
+        await require_chat_services()
         
         conversation_handler = ai_services['conversation_handler']
         
         # Process the conversation
-        result = await conversation_handler.handle_user_message(
+        result = await run_until_disconnected(http_request, conversation_handler.handle_user_message(
             user_id=request.user_id,
             message=request.message,
-            user_profile={'preferred_language': request.language}
-        )
+            user_profile={'preferred_language': request.language},
+            channel=request.channel or "web"
+        ))
         
         if not result.get('success', False):
             raise HTTPException(status_code=500, detail=result.get('error', 'Processing failed'))
@@ -170,11 +268,11 @@ async def voice_chat_endpoint(
     user_id: str = Form(...),
     audio_file: UploadFile = File(...),
     language: Optional[str] = Form("auto"),
-    query: Optional[str] = Form("")
+    query: Optional[str] = Form(""),
+    channel: Optional[str] = Form("voice")  # "ivr" for telephone calls
 ):
     try:
-        if not ai_services:
-            raise HTTPException(status_code=503, detail="AI services not initialized")
+        await require_chat_services()
         
         # Read audio file
         audio_data = await audio_file.read()
@@ -188,7 +286,7 @@ async def voice_chat_endpoint(
         response_generator = ai_services['response_generator']
         voice_result = await response_generator.process_voice_input(
             audio_data, audio_format, query, context_docs, 
-            {'preferred_language': language}, language
+            {'preferred_language': language}, language, channel=channel or "voice"
         )
         
         if not voice_result['success']:
@@ -219,7 +317,7 @@ async def store_voice_conversation(user_id: str, audio_data: bytes,
                                  audio_format: str, voice_result: Dict):
     """Background task to store voice conversation"""
     try:
-        voice_storage = ai_services['voice_storage']
+        voice_storage = await services.get('voice_storage')
         
         # Generate filename
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -251,7 +349,7 @@ async def store_voice_conversation(user_id: str, audio_data: bytes,
 async def get_voice_history(user_id: str, limit: int = 10):
     """Get user's voice conversation history"""
     try:
-        voice_storage = ai_services['voice_storage']
+        voice_storage = await services.get('voice_storage')
         history = await voice_storage.get_user_voice_history(user_id, limit)
         
         return {
@@ -265,8 +363,7 @@ async def get_voice_history(user_id: str, limit: int = 10):
 @app.get("/conversation/{user_id}")
 async def get_conversation_history(user_id: str):
     try:
-        if not ai_services:
-            raise HTTPException(status_code=503, detail="AI services not initialized")
+        await require_chat_services()
         
         conversation_handler = ai_services['conversation_handler']
         summary = await conversation_handler.get_conversation_summary(user_id)
@@ -291,14 +388,11 @@ async def translate_endpoint(
     context: str = "agricultural"
 ):
     try:
-        if not ai_services:
-            raise HTTPException(status_code=503, detail="AI services not initialized")
-        
-        translator = ai_services['translator']
+        translator = await services.get('translator')
         
         # Detect language if auto
         if from_lang == "auto":
-            language_detector = ai_services['language_detector']
+            language_detector = await services.get('language_detector')
             lang_info = language_detector.detect_language(text)
             from_lang = lang_info['language']
         
@@ -321,10 +415,7 @@ async def translate_endpoint(
 @app.post("/classify-intent")
 async def classify_intent_endpoint(text: str, language: str = "en"):
     try:
-        if not ai_services:
-            raise HTTPException(status_code=503, detail="AI services not initialized")
-        
-        intent_classifier = ai_services['intent_classifier']
+        intent_classifier = await services.get('intent_classifier')
         
         # Classify using rule-based approach
         result = intent_classifier.classify_intent_rule_based(text)
@@ -345,10 +436,7 @@ async def classify_intent_endpoint(text: str, language: str = "en"):
 @app.get("/language/detect")
 async def detect_language_endpoint(text: str):
     try:
-        if not ai_services:
-            raise HTTPException(status_code=503, detail="AI services not initialized")
-        
-        language_detector = ai_services['language_detector']
+        language_detector = await services.get('language_detector')
         result = language_detector.detect_language(text)
         
         return {
@@ -365,30 +453,26 @@ async def detect_language_endpoint(text: str):
 
 @app.get("/health/services")
 async def service_health_check():
-    health_status = {}
-    
-    for service_name, service in ai_services.items():
-        try:
-            if hasattr(service, '__class__'):
-                health_status[service_name] = {
-                    "status": "healthy",
-                    "type": service.__class__.__name__
-                }
-            else:
-                health_status[service_name] = {
-                    "status": "unknown",
-                    "type": "unknown"
-                }
-        except Exception as e:
-            health_status[service_name] = {
-                "status": "unhealthy",
-                "error": str(e)
-            }
+    """Build state and time of every service; lazy ones are built on first use."""
+    status = services.status()
+    failed = [name for name, service in status['services'].items() if service['status'] == 'failed']
+    return {
+        "overall_status": "healthy" if status['ready'] and not failed else "degraded",
+        "ready": status['ready'],
+        "services": status['services'],
+        "total_services": len(status['services'])
+    }
+
+@app.get("/health/cache")
+async def cache_stats_endpoint():
+    """Query, embedding and answer cache statistics, for tuning cache sizes."""
+    await require_chat_services()
     
+    answer_cache = ai_services['response_generator'].answer_cache
     return {
-        "overall_status": "healthy" if all(s.get("status") == "healthy" for s in health_status.values()) else "degraded",
-        "services": health_status,
-        "total_services": len(health_status)
+        "success": True,
+        "retrieval": ai_services['retriever'].get_cache_stats(),
+        "answers": answer_cache.get_stats() if answer_cache else None
     }
 
 if __name__ == "__main__":
@@ -0,0 +1,133 @@
+from typing import List, Dict, Any, Optional, Callable
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import time
+
+from .vector_store import VectorStore
+
+class AsyncVectorStore:
+    """Awaitable facade over VectorStore for use from the event loop.
+
+    Chroma calls are synchronous, so every call is run on a dedicated,
+    bounded thread pool instead of blocking the loop that serves all other
+    chats. At most ``max_concurrency`` calls run at once; the rest wait on a
+    semaphore, and that queue is reported by get_stats(). A caller cancelled
+    while queued (e.g. the client disconnected) never reaches the store. A
+    call that has already started runs to completion in its thread, but its
+    result is discarded and its slot is only freed when the thread finishes.
+    """
+
+    def __init__(self, vector_store: VectorStore, max_workers: int = 4,
+                 max_concurrency: Optional[int] = None):
+        self.store = vector_store
+        self.max_workers = max_workers
+        # Never admit more calls than there are threads, so admitted calls start immediately
+        self.max_concurrency = min(max_concurrency or max_workers, max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='vector-store')
+        self._semaphore = None
+        self._semaphore_loop = None
+
+        self.queued = 0
+        self.running = 0
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.total_wait_ms = 0.0
+        self.total_run_ms = 0.0
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def _release(self, semaphore: asyncio.Semaphore):
+        self.running -= 1
+        semaphore.release()
+
+    async def run(self, function: Callable, *args, **kwargs) -> Any:
+        """Run ``function(*args, **kwargs)`` on the store's thread pool."""
+        semaphore = self._get_semaphore()
+        self.queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queued)
+        queued_at = time.perf_counter()
+        try:
+            await semaphore.acquire()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.queued -= 1
+        self.total_wait_ms += (time.perf_counter() - queued_at) * 1000
+
+        self.running += 1
+        started = time.perf_counter()
+        future = self._executor.submit(function, *args, **kwargs)
+        release_now = True
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            if not future.cancel():
+                # Already running in a thread: keep the slot until the thread is free again
+                loop = asyncio.get_running_loop()
+                future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release, semaphore))
+                release_now = False
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            if release_now:
+                self._release(semaphore)
+                self.completed += 1
+                self.total_run_ms += (time.perf_counter() - started) * 1000
+
+    async def search(self, query_embedding: List[float], n_results: int = 5,
+                     language_filter: Optional[str] = None, category_filter: Optional[str] = None) -> Dict[str, Any]:
+        return await self.run(self.store.search, query_embedding, n_results, language_filter, category_filter)
+
+    async def search_many(self, query_embeddings: List[List[float]], n_results: int = 5,
+                          language_filter: Optional[str] = None,
+                          category_filter: Optional[str] = None) -> List[Dict[str, Any]]:
+        return await self.run(self.store.search_many, query_embeddings, n_results, language_filter, category_filter)
+
+    async def get_embeddings(self, ids: List[str]):
+        return await self.run(self.store.get_embeddings, ids)
+
+    async def add_documents(self, documents: List[Dict[str, Any]], embeddings: List[List[float]]) -> bool:
+        return await self.run(self.store.add_documents, documents, embeddings)
+
+    async def upsert_documents(self, documents: List[Dict[str, Any]], embeddings: List[List[float]]) -> bool:
+        return await self.run(self.store.upsert_documents, documents, embeddings)
+
+    async def delete_documents(self, doc_ids: List[str]) -> bool:
+        return await self.run(self.store.delete_documents, doc_ids)
+
+    async def delete_by_source(self, source: str) -> bool:
+        return await self.run(self.store.delete_by_source, source)
+
+    async def get_collection_stats(self) -> Dict[str, Any]:
+        return await self.run(self.store.get_collection_stats)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool size, current queue depth and per-call wait/run averages."""
+        finished = max(self.completed, 1)
+        return {
+            'max_workers': self.max_workers,
+            'max_concurrency': self.max_concurrency,
+            'queue_depth': self.queued,
+            'max_queue_depth': self.max_queue_depth,
+            'running': self.running,
+            'completed': self.completed,
+            'failed': self.failed,
+            'cancelled': self.cancelled,
+            'avg_wait_ms': self.total_wait_ms / finished,
+            'avg_run_ms': self.total_run_ms / finished
+        }
+
+    def close(self):
+        """Stop the thread pool; queued calls still waiting in the pool are cancelled."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
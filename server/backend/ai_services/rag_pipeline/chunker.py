@@ -0,0 +1,155 @@
+import re
+from typing import List, Iterable, Iterator, Tuple
+
+from .token_estimator import WORD_PATTERN, estimate_tokens
+
+# A paragraph break, or sentence punctuation (including the Indic danda used in
+# some Malayalam text) optionally followed by closing quotes/brackets, then whitespace
+BOUNDARY_PATTERN = re.compile(
+    r'(?P<para>\n[ \t]*\n\s*)|(?P<sent>[.!?\u0964\u0965][\"\'\u201d\u2019)\]]*\s+)'
+)
+ABBREVIATIONS = {'dr', 'mr', 'mrs', 'ms', 'vs', 'e.g', 'i.e', 'approx', 'fig', 'viz', 'etc', 'ഡോ'}
+# Abbreviations only before a number ("No. 5"); otherwise ordinary words ending a sentence ("... no.")
+NUMBER_ABBREVIATIONS = {'no'}
+
+# (start, end, text) of a piece of source text
+Span = Tuple[int, int, str]
+
+class SentenceChunker:
+    """Pack whole sentences into chunks that fit a token budget.
+
+    Sentences are split on English and Malayalam sentence punctuation and on
+    paragraph breaks, so chunks never cut a sentence in half unless that
+    sentence alone exceeds the budget. A chunk is closed early at a paragraph
+    break once it holds at least ``min_tokens``. Every chunk records its
+    character offsets in the source stream.
+    """
+
+    def __init__(self, max_tokens: int = 256, min_tokens: int = None, overlap_sentences: int = 0,
+                 max_sentence_chars: int = 20000):
+        self.max_tokens = max_tokens
+        self.min_tokens = min_tokens if min_tokens is not None else max_tokens // 4
+        self.overlap_sentences = overlap_sentences
+        # Unpunctuated text is cut at whitespace after this many characters to bound memory
+        self.max_sentence_chars = max_sentence_chars
+
+    def _is_abbreviation(self, text: str, dot_position: int, next_position: int) -> bool:
+        if text[dot_position] != '.':
+            return False
+        word_start = dot_position
+        while word_start > 0 and not text[word_start - 1].isspace():
+            word_start -= 1
+        word = text[word_start:dot_position].lower().lstrip('(')
+        if word in NUMBER_ABBREVIATIONS:
+            return next_position < len(text) and text[next_position].isdigit()
+        return word in ABBREVIATIONS
+
+    def iter_sentences(self, blocks: Iterable[str]) -> Iterator[Tuple[int, int, str, bool]]:
+        """Yield (start, end, text, ends_paragraph) sentences from a stream of text blocks.
+
+        ``text`` includes the trailing whitespace, so consecutive sentence texts
+        concatenate back to the exact source.
+        """
+        buffer = ''
+        buffer_start = 0
+
+        def split(final: bool) -> Iterator[Tuple[int, int, str, bool]]:
+            nonlocal buffer, buffer_start
+            position = 0
+            for match in BOUNDARY_PATTERN.finditer(buffer):
+                # A boundary touching the end of the buffer may still be growing
+                if match.end() == len(buffer) and not final:
+                    break
+                if match.group('sent') and self._is_abbreviation(buffer, match.start(), match.end()):
+                    continue
+                ends_paragraph = bool(match.group('para')) or '\n\n' in match.group().replace('\r', '')
+                text = buffer[position:match.end()]
+                if text.strip():
+                    yield buffer_start + position, buffer_start + match.end(), text, ends_paragraph
+                position = match.end()
+
+            if final:
+                text = buffer[position:]
+                if text.strip():
+                    yield buffer_start + position, buffer_start + len(buffer), text, True
+                position = len(buffer)
+            elif len(buffer) - position > self.max_sentence_chars:
+                cut = max(buffer.rfind(' ', position), buffer.rfind('\n', position)) + 1
+                if cut > position:
+                    yield buffer_start + position, buffer_start + cut, buffer[position:cut], False
+                    position = cut
+
+            buffer = buffer[position:]
+            buffer_start += position
+
+        for block in blocks:
+            buffer += block
+            yield from split(final=False)
+        yield from split(final=True)
+
+    def _split_long_sentence(self, start: int, text: str) -> Iterator[Span]:
+        """Fall back to word boundaries for a single sentence larger than the budget."""
+        piece_start = None
+        piece_end = 0
+        tokens = 0
+        for match in WORD_PATTERN.finditer(text):
+            word_tokens = estimate_tokens(match.group())
+            if piece_start is not None and tokens + word_tokens > self.max_tokens:
+                yield start + piece_start, start + piece_end, text[piece_start:piece_end]
+                piece_start, tokens = None, 0
+            if piece_start is None:
+                piece_start = match.start()
+            piece_end = match.end()
+            tokens += word_tokens
+        if piece_start is not None:
+            yield start + piece_start, start + piece_end, text[piece_start:piece_end]
+
+    def iter_chunks(self, blocks: Iterable[str]) -> Iterator[Span]:
+        """Yield (start, end, chunk) for a stream of text blocks."""
+        current: List[Tuple[int, str, int]] = []  # (start, text, tokens) per sentence
+        current_tokens = 0
+        fresh_sentences = 0  # sentences not yet emitted in any chunk
+
+        def flush() -> Span:
+            nonlocal current, current_tokens, fresh_sentences
+            fresh_sentences = 0
+            start = current[0][0]
+            text = ''.join(sentence_text for _, sentence_text, _ in current).rstrip()
+            chunk = (start, start + len(text), text)
+            kept = current[-self.overlap_sentences:] if self.overlap_sentences else []
+            current = kept
+            current_tokens = sum(tokens for _, _, tokens in kept)
+            return chunk
+
+        for start, _, text, ends_paragraph in self.iter_sentences(blocks):
+            # Keep chunk offsets on the first visible character
+            leading = len(text) - len(text.lstrip())
+            start, text = start + leading, text[leading:]
+            tokens = estimate_tokens(text)
+
+            if tokens > self.max_tokens:
+                if fresh_sentences:
+                    yield flush()
+                current, current_tokens = [], 0
+                yield from self._split_long_sentence(start, text)
+                continue
+
+            if current and current_tokens + tokens > self.max_tokens:
+                yield flush()
+                # Drop overlap that would not leave room for the new sentence
+                while current and current_tokens + tokens > self.max_tokens:
+                    current_tokens -= current.pop(0)[2]
+
+            current.append((start, text, tokens))
+            current_tokens += tokens
+            fresh_sentences += 1
+
+            if ends_paragraph and current_tokens >= self.min_tokens:
+                yield flush()
+                current, current_tokens = [], 0
+
+        if fresh_sentences:
+            yield flush()
+
+    def chunk_text(self, text: str) -> List[str]:
+        return [chunk for _, _, chunk in self.iter_chunks([text])]
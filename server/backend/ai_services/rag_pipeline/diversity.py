@@ -0,0 +1,138 @@
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from .token_estimator import estimate_tokens
+
+def mmr_select(candidate_embeddings: np.ndarray, relevance: np.ndarray, top_k: int,
+               lambda_mult: float = 0.7, duplicate_threshold: Optional[float] = 0.95) -> List[int]:
+    """Pick up to ``top_k`` candidate positions by maximal marginal relevance.
+
+    Each step takes the candidate maximising
+    ``lambda_mult * relevance - (1 - lambda_mult) * max similarity to the picks so far``.
+    The candidate similarity matrix is computed once and the running maximum is
+    updated with one vector operation per pick. Candidates at least
+    ``duplicate_threshold`` similar to a pick are dropped, so fewer than
+    ``top_k`` positions come back when the rest are near-copies.
+    """
+    count = len(relevance)
+    if count == 0 or top_k <= 0:
+        return []
+
+    vectors = np.asarray(candidate_embeddings, dtype=np.float32)
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    similarity = vectors @ vectors.T
+    relevance = np.asarray(relevance, dtype=np.float32)
+
+    available = np.ones(count, dtype=bool)
+    max_similarity = np.zeros(count, dtype=np.float32)
+    selected: List[int] = []
+    while len(selected) < top_k and available.any():
+        if selected:
+            scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        else:
+            scores = relevance.copy()
+        scores[~available] = -np.inf
+        pick = int(np.argmax(scores))
+        selected.append(pick)
+        available[pick] = False
+
+        row = similarity[pick]
+        if len(selected) == 1:
+            max_similarity[:] = row
+        else:
+            np.maximum(max_similarity, row, out=max_similarity)
+        if duplicate_threshold is not None:
+            available &= row < duplicate_threshold
+    return selected
+
+def _word_overlap(first: List[str], second: List[str], max_overlap: int = 200) -> int:
+    """Length of the longest suffix of ``first`` that is also a prefix of ``second``."""
+    for size in range(min(len(first), len(second), max_overlap), 0, -1):
+        if first[-size:] == second[:size]:
+            return size
+    return 0
+
+def _span_key(doc: Dict[str, Any]):
+    metadata = doc.get('metadata') or {}
+    return metadata.get('source'), metadata.get('record_index')
+
+def _overlaps_previous(previous: Dict[str, Any], doc: Dict[str, Any]) -> bool:
+    """Whether the chunk's source span starts before the previous one ends, per the chunker's offsets."""
+    end, start = previous['metadata'].get('end_offset'), doc['metadata'].get('start_offset')
+    return end is not None and start is not None and start < end
+
+def _merge_run(run: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Join consecutive chunks of one source into a single span.
+
+    Words are only dropped where the offsets show the chunks really overlap in
+    the source; otherwise (including chunks without offsets) the chunks are
+    joined as they are, so words repeated across a boundary are kept.
+    """
+    words = run[0]['content'].split()
+    for previous, doc in zip(run, run[1:]):
+        next_words = doc['content'].split()
+        overlap = _word_overlap(words, next_words) if _overlaps_previous(previous, doc) else 0
+        words.extend(next_words[overlap:])
+    content = ' '.join(words)
+
+    metadata = dict(run[0]['metadata'])
+    last = run[-1]['metadata']
+    if 'end_offset' in last:
+        metadata['end_offset'] = last['end_offset']
+    member_words = sum(len(doc['content'].split()) for doc in run)
+    member_tokens = [doc['metadata'].get('token_count') for doc in run]
+    if None in member_tokens:
+        token_count = estimate_tokens(content)
+    else:
+        # Scale the members' counts by the share of words kept, rather than re-estimating the span
+        token_count = round(sum(member_tokens) * len(words) / max(member_words, 1))
+    metadata.update({
+        'word_count': len(words),
+        'char_count': len(content),
+        'token_count': token_count,
+        'merged_chunks': len(run)
+    })
+
+    best = max(run, key=lambda doc: doc.get('similarity', 0.0))
+    merged = dict(best, content=content, metadata=metadata, id=run[0]['id'])
+    merged['merged_ids'] = [doc['id'] for doc in run]
+    return merged
+
+def merge_adjacent_chunks(documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Merge retrieved chunks that are neighbours in the same source into one span.
+
+    Chunks are neighbours when their chunk indices are consecutive (or their
+    character spans overlap) within the same file and record. Each merged span
+    takes the place of its best-ranked member, so the input order is kept.
+    """
+    groups: Dict[Any, List[int]] = {}
+    for position, doc in enumerate(documents):
+        key = _span_key(doc)
+        if key[0] is not None and 'chunk_index' in doc['metadata']:
+            groups.setdefault(key, []).append(position)
+
+    replacement: Dict[int, Dict[str, Any]] = {}
+    absorbed = set()
+    for positions in groups.values():
+        if len(positions) < 2:
+            continue
+        positions.sort(key=lambda p: documents[p]['metadata']['chunk_index'])
+        run = [positions[0]]
+        for position in positions[1:] + [None]:
+            if position is not None:
+                previous, current = documents[run[-1]]['metadata'], documents[position]['metadata']
+                if (current['chunk_index'] == previous['chunk_index'] + 1
+                        or current.get('start_offset', 0) < previous.get('end_offset', -1)):
+                    run.append(position)
+                    continue
+            if len(run) > 1:
+                # The merged span goes where its best-ranked member was
+                anchor = min(run)
+                replacement[anchor] = _merge_run([documents[p] for p in run])
+                absorbed.update(p for p in run if p != anchor)
+            if position is not None:
+                run = [position]
+
+    return [replacement.get(position, doc) for position, doc in enumerate(documents)
+            if position not in absorbed]
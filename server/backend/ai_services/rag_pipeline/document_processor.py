@@ -1,40 +1,37 @@
 import os
 import re
 import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Iterable, Tuple
 import pandas as pd
 from langdetect import detect
 import google.generativeai as genai
 
+from .chunker import SentenceChunker
+from .token_estimator import MALAYALAM_PATTERN, estimate_tokens
+
 class DocumentProcessor:
-    def __init__(self, gemini_api_key: str):
+    def __init__(self, gemini_api_key: str, chunker: SentenceChunker = None):
         genai.configure(api_key=gemini_api_key)
         self.model = genai.GenerativeModel('gemini-pro')
-    
-    def chunk_text(self, text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]:
-        """Split text into overlapping chunks."""
-        words = text.split()
-        chunks = []
-        
-        for i in range(0, len(words), chunk_size - overlap):
-            chunk = ' '.join(words[i:i + chunk_size])
-            chunks.append(chunk)
-            
-        return chunks
-    
+        self.chunker = chunker or SentenceChunker()
+
+    def chunk_text(self, text: str) -> List[str]:
+        """Split text into sentence-aligned chunks with the document chunker."""
+        return self.chunker.chunk_text(text)
+
     def preprocess_text(self, text: str, language: str = 'auto') -> str:
         """Clean and preprocess text."""
         # Remove extra whitespace
         text = re.sub(r'\s+', ' ', text.strip())
-        
+
         # Remove special characters but keep Malayalam characters
         if language == 'ml':
             text = re.sub(r'[^\w\s\u0D00-\u0D7F]', '', text)
         else:
             text = re.sub(r'[^\w\s]', '', text)
-        
+
         return text
-    
+
     def detect_language(self, text: str) -> str:
         """Detect language of the text."""
         try:
@@ -42,50 +39,131 @@ class DocumentProcessor:
             return 'ml' if lang == 'ml' else 'en'
         except:
             return 'en'
-    
-    def process_agricultural_document(self, file_path: str) -> List[Dict[str, Any]]:
-        """Process agricultural documents and extract structured information."""
-        try:
-            # Read document based on file type
-            if file_path.endswith('.txt'):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-            elif file_path.endswith('.json'):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    content = json.dumps(data)
-            else:
-                raise ValueError("Unsupported file format")
-            
-            # Detect language
-            language = self.detect_language(content)
-            
-            # Preprocess content
-            processed_content = self.preprocess_text(content, language)
-            
-            # Create chunks
-            chunks = self.chunk_text(processed_content)
-            
-            # Structure the data
-            documents = []
-            for i, chunk in enumerate(chunks):
-                doc = {
-                    'id': f"{os.path.basename(file_path)}_{i}",
+
+    def detect_language_fast(self, text: str) -> str:
+        """Script-based language check used per chunk: Malayalam if >30% of characters are Malayalam."""
+        total_chars = len(re.sub(r'\s', '', text))
+        if total_chars == 0:
+            return 'en'
+        return 'ml' if len(MALAYALAM_PATTERN.findall(text)) / total_chars > 0.3 else 'en'
+
+    def _json_to_text(self, data: Any, key: str = None) -> str:
+        """Flatten a JSON value into readable 'key: value' lines instead of re-serialising it."""
+        if isinstance(data, dict):
+            parts = [self._json_to_text(value, name) for name, value in data.items()]
+        elif isinstance(data, list):
+            parts = [self._json_to_text(item, key) for item in data]
+        elif data is None:
+            return ''
+        else:
+            return f"{key}: {data}" if key else str(data)
+        return '\n'.join(part for part in parts if part)
+
+    def _iter_file_blocks(self, file_path: str, block_size: int = 1 << 16) -> Iterator[str]:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for block in iter(lambda: f.read(block_size), ''):
+                yield block
+
+    def _iter_json_records(self, file_path: str, block_size: int = 1 << 16) -> Iterator[Any]:
+        """Stream the items of a top-level JSON array; other JSON documents are loaded whole."""
+        decoder = json.JSONDecoder()
+        with open(file_path, 'r', encoding='utf-8') as f:
+            buffer = f.read(block_size).lstrip()
+            if not buffer.startswith('['):
+                f.seek(0)
+                yield json.load(f)
+                return
+
+            buffer = buffer[1:]
+            eof = False
+            while True:
+                buffer = buffer.lstrip().lstrip(',').lstrip()
+                if buffer.startswith(']'):
+                    return
+                try:
+                    item, end = decoder.raw_decode(buffer)
+                    # A value ending exactly at the buffer edge may be a truncated number
+                    complete = eof or end < len(buffer)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    complete = False
+                if not complete:
+                    block = f.read(block_size)
+                    eof = not block
+                    buffer += block
+                    continue
+                yield item
+                buffer = buffer[end:]
+
+    def _iter_jsonl_records(self, file_path: str) -> Iterator[Any]:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def iter_source_segments(self, file_path: str) -> Iterator[Tuple[Dict[str, Any], Iterable[str]]]:
+        """Yield (location, text blocks) segments for a file without loading it whole.
+
+        Text files are a single segment streamed in blocks; JSON arrays and JSONL
+        files yield one segment per record.
+        """
+        if file_path.endswith('.txt'):
+            yield {}, self._iter_file_blocks(file_path)
+        elif file_path.endswith('.jsonl'):
+            for record_index, record in enumerate(self._iter_jsonl_records(file_path)):
+                yield {'record_index': record_index}, [self._json_to_text(record)]
+        elif file_path.endswith('.json'):
+            for record_index, record in enumerate(self._iter_json_records(file_path)):
+                yield {'record_index': record_index}, [self._json_to_text(record)]
+        else:
+            raise ValueError("Unsupported file format")
+
+    def iter_agricultural_document(self, file_path: str) -> Iterator[Dict[str, Any]]:
+        """Lazily process a document into chunk dicts in constant memory.
+
+        Chunks are sentence-aligned and sized by the chunker's token budget.
+        Language is detected per chunk with a script check and each chunk records
+        its character offsets in the source (within its record for JSON sources).
+        """
+        file_name = os.path.basename(file_path)
+        file_type = file_path.split('.')[-1]
+        chunk_index = 0
+
+        for location, blocks in self.iter_source_segments(file_path):
+            for start, end, raw_chunk in self.chunker.iter_chunks(blocks):
+                # Detect language
+                language = self.detect_language_fast(raw_chunk)
+
+                # Preprocess content, keeping Malayalam script in mixed-language chunks
+                chunk = self.preprocess_text(raw_chunk, 'ml' if MALAYALAM_PATTERN.search(raw_chunk) else language)
+                if not chunk:
+                    continue
+
+                yield {
+                    'id': f"{file_name}_{chunk_index}",
                     'content': chunk,
                     'language': language,
                     'source': file_path,
-                    'chunk_index': i,
+                    'chunk_index': chunk_index,
                     'metadata': {
-                        'file_name': os.path.basename(file_path),
-                        'file_type': file_path.split('.')[-1],
+                        'file_name': file_name,
+                        'file_type': file_type,
                         'word_count': len(chunk.split()),
-                        'char_count': len(chunk)
+                        'char_count': len(chunk),
+                        'token_count': estimate_tokens(chunk),
+                        'start_offset': start,
+                        'end_offset': end,
+                        **location
                     }
                 }
-                documents.append(doc)
-            
-            return documents
-            
+                chunk_index += 1
+
+    def process_agricultural_document(self, file_path: str) -> List[Dict[str, Any]]:
+        """Process agricultural documents and extract structured information."""
+        try:
+            return list(self.iter_agricultural_document(file_path))
+
         except Exception as e:
             print(f"Error processing document {file_path}: {str(e)}")
-            return []
\ No newline at end of file
+            return []
@@ -0,0 +1,156 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+class EmbeddingCache:
+    """Disk-backed, content-addressed embedding cache stored in SQLite.
+
+    Entries are keyed by a hash of (model, task_type, text) and hold float32
+    vectors. When the cache grows past ``max_entries`` the least recently used
+    entries are evicted.
+    """
+
+    def __init__(self, db_path: str = "./data/embeddings/embedding_cache.sqlite3",
+                 max_entries: int = 200000, evict_fraction: float = 0.1):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.evict_fraction = evict_fraction
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                   key TEXT PRIMARY KEY,
+                   vector BLOB NOT NULL,
+                   last_access REAL NOT NULL
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_access ON embeddings(last_access)")
+        self._conn.commit()
+
+        self._size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(text: str, model: str, task_type: str) -> str:
+        """Content address for a (text, model, task_type) triple."""
+        digest = hashlib.sha256()
+        for part in (model, task_type, text):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\x00')
+        return digest.hexdigest()
+
+    def get_many(self, texts: List[str], model: str, task_type: str) -> List[Optional[List[float]]]:
+        """Look up embeddings for texts; missing entries are returned as None."""
+        keys = [self.make_key(text, model, task_type) for text in texts]
+        found: Dict[str, List[float]] = {}
+
+        try:
+            with self._lock:
+                unique_keys = list(dict.fromkeys(keys))
+                # Stay well below SQLite's bound-parameter limit
+                for i in range(0, len(unique_keys), 500):
+                    chunk = unique_keys[i:i + 500]
+                    placeholders = ','.join('?' * len(chunk))
+                    rows = self._conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                    ).fetchall()
+                    for key, blob in rows:
+                        found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+                if found:
+                    now = time.time()
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                        [(now, key) for key in found]
+                    )
+                    self._conn.commit()
+        except Exception as e:
+            print(f"Error reading embedding cache: {str(e)}")
+
+        results = [found.get(key) for key in keys]
+        hit_count = sum(1 for result in results if result is not None)
+        self.hits += hit_count
+        self.misses += len(results) - hit_count
+        return results
+
+    def get(self, text: str, model: str, task_type: str) -> Optional[List[float]]:
+        return self.get_many([text], model, task_type)[0]
+
+    def put_many(self, texts: List[str], embeddings: List[List[float]], model: str, task_type: str):
+        """Store embeddings for texts, evicting least recently used entries if needed."""
+        if not texts:
+            return
+
+        now = time.time()
+        rows = [
+            (self.make_key(text, model, task_type), np.asarray(embedding, dtype=np.float32).tobytes(), now)
+            for text, embedding in zip(texts, embeddings)
+        ]
+
+        try:
+            with self._lock:
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)", rows
+                )
+                self._size += self._conn.total_changes - before
+                self._conn.commit()
+
+                if self._size > self.max_entries:
+                    self._evict()
+        except Exception as e:
+            print(f"Error writing embedding cache: {str(e)}")
+
+    def put(self, text: str, embedding: List[float], model: str, task_type: str):
+        self.put_many([text], [embedding], model, task_type)
+
+    def _evict(self):
+        """Drop the least recently used entries down to below max_entries."""
+        target = int(self.max_entries * (1 - self.evict_fraction))
+        excess = self._size - target
+        if excess <= 0:
+            return
+
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+            (excess,)
+        )
+        self._conn.commit()
+        self.evictions += excess
+        self._size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._size = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': self._size,
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions
+        }
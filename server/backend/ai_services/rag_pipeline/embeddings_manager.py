@@ -1,64 +1,186 @@
 import google.generativeai as genai
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Callable
 import asyncio
+import contextlib
 import aiohttp
 
+from .rate_limiter import AdaptiveRateLimiter
+from .embedding_cache import EmbeddingCache
+from .hashing_embedder import HashingEmbedder, FallbackEmbedding
+
+# Signature of a pluggable embedding backend: (texts, task_type) -> one vector per text
+EmbeddingBackend = Callable[[List[str], str], List[List[float]]]
+
 class EmbeddingsManager:
-    def __init__(self, gemini_api_key: str):
-        genai.configure(api_key=gemini_api_key)
-        self.model = genai.GenerativeModel('gemini-pro')
-        
-    async def generate_embedding(self, text: str) -> List[float]:
-        """Generate embeddings using Gemini API."""
-        try:
-            # Use Gemini's embedding endpoint
-            embedding_model = 'models/embedding-001'
-            
-            result = genai.embed_content(
-                model=embedding_model,
-                content=text,
-                task_type="retrieval_document"
-            )
-            
-            return result['embedding']
-            
-        except Exception as e:
-            print(f"Error generating embedding: {str(e)}")
-            # Fallback to simple TF-IDF style embedding
-            return self._fallback_embedding(text)
-    
-    def _fallback_embedding(self, text: str, dim: int = 768) -> List[float]:
-        """Simple fallback embedding using hash-based approach."""
-        words = text.lower().split()
-        embedding = np.zeros(dim)
-        
-        for word in words:
-            word_hash = hash(word) % dim
-            embedding[word_hash] += 1.0
-        
-        # Normalize
-        norm = np.linalg.norm(embedding)
-        if norm > 0:
-            embedding = embedding / norm
-        
-        return embedding.tolist()
-    
-    async def generate_batch_embeddings(self, texts: List[str], batch_size: int = 10) -> List[List[float]]:
-        """Generate embeddings for multiple texts in batches."""
-        embeddings = []
-        
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            batch_embeddings = []
-            
-            for text in batch:
-                embedding = await self.generate_embedding(text)
-                batch_embeddings.append(embedding)
-            
-            embeddings.extend(batch_embeddings)
-            
-            # Add delay to respect rate limits
-            await asyncio.sleep(0.1)
-        
-        return embeddings
\ No newline at end of file
+    def __init__(self, gemini_api_key: str, batch_size: int = 100,
+                 max_concurrent_batches: int = 4, requests_per_second: float = 5.0,
+                 max_retries: int = 3, embedding_backend: Optional[EmbeddingBackend] = None,
+                 cache: Optional[EmbeddingCache] = None, query_requests_per_second: float = 20.0,
+                 query_burst: int = 20):
+        self.embedding_model = 'models/embedding-001'
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.cache = cache
+        # Sized from the backend on first use: asking a local backend for its dimension loads the model
+        self._fallback_embedder: Optional[HashingEmbedder] = None
+        self.fallback_batches = 0
+
+        # Gemini is the default backend; tests and benchmarks can plug in a local one
+        self.embedding_backend = embedding_backend or self._gemini_embed_batch
+        if embedding_backend is None:
+            genai.configure(api_key=gemini_api_key)
+            self.model = genai.GenerativeModel('gemini-pro')
+            self.model_name = self.embedding_model
+        else:
+            self.model_name = getattr(embedding_backend, 'model_name', type(embedding_backend).__name__)
+
+        self.max_concurrent_batches = max_concurrent_batches
+        self._batch_semaphore = None
+        self._semaphore_loop = None
+        if getattr(embedding_backend, 'is_local', False):
+            # In-process models have no provider quota to respect
+            self.rate_limiter = AdaptiveRateLimiter(initial_rate=1e6, max_rate=1e6, burst=1000)
+            self.query_rate_limiter = AdaptiveRateLimiter(initial_rate=1e6, max_rate=1e6, burst=1000)
+        else:
+            self.rate_limiter = AdaptiveRateLimiter(initial_rate=requests_per_second)
+            # Interactive queries are single small requests; they must not queue behind the ingestion-tuned bucket
+            self.query_rate_limiter = AdaptiveRateLimiter(initial_rate=query_requests_per_second,
+                                                          max_rate=max(50.0, query_requests_per_second),
+                                                          burst=query_burst)
+
+    @property
+    def fallback_embedder(self) -> HashingEmbedder:
+        """Hashing embedder matching the backend's dimension, so fallback vectors are searchable in the same index."""
+        if self._fallback_embedder is None:
+            try:
+                dim = getattr(self.embedding_backend, 'dim', None)
+            except Exception as e:
+                # The backend cannot even load; size for the default and ask again next time
+                print(f"Error reading embedding dimension: {str(e)}")
+                return HashingEmbedder(dim=768)
+            self._fallback_embedder = HashingEmbedder(dim=dim or 768)
+        return self._fallback_embedder
+
+    def _get_batch_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._batch_semaphore is None or self._semaphore_loop is not loop:
+            self._batch_semaphore = asyncio.Semaphore(self.max_concurrent_batches)
+            self._semaphore_loop = loop
+        return self._batch_semaphore
+
+    async def generate_embedding(self, text: str, task_type: str = "retrieval_document") -> List[float]:
+        """Generate embeddings using Gemini API.
+
+        Single embeds serve interactive queries, so they use the query rate
+        limiter and skip the batch semaphore instead of queueing behind ingestion.
+        """
+        embeddings = await self.generate_batch_embeddings([text], task_type=task_type, interactive=True)
+        return embeddings[0]
+
+    def _gemini_embed_batch(self, texts: List[str], task_type: str) -> List[List[float]]:
+        """Embed a list of texts with a single Gemini request."""
+        result = genai.embed_content(
+            model=self.embedding_model,
+            content=texts if len(texts) > 1 else texts[0],
+            task_type=task_type
+        )
+        embedding = result['embedding']
+        # A single content returns one flat vector, a list returns one vector per text
+        return embedding if len(texts) > 1 else [embedding]
+
+    def _is_throttling_error(self, error: Exception) -> bool:
+        message = str(error).lower()
+        return any(marker in message for marker in ('429', 'quota', 'rate limit', 'resource exhausted', 'resourceexhausted'))
+
+    async def _embed_batch_with_retry(self, texts: List[str], task_type: str,
+                                      rate_limiter: Optional[AdaptiveRateLimiter] = None) -> List[List[float]]:
+        """Embed one provider batch, backing off on throttling and falling back on failure."""
+        rate_limiter = rate_limiter or self.rate_limiter
+        for attempt in range(self.max_retries + 1):
+            await rate_limiter.acquire()
+            try:
+                embed_async = getattr(self.embedding_backend, 'embed_async', None)
+                if embed_async:
+                    # Async backends batch concurrent requests themselves
+                    embeddings = await embed_async(texts, task_type)
+                else:
+                    embeddings = await asyncio.to_thread(self.embedding_backend, texts, task_type)
+                if len(embeddings) != len(texts):
+                    raise ValueError(f"Backend returned {len(embeddings)} embeddings for {len(texts)} texts")
+                rate_limiter.on_success()
+                embeddings = [list(embedding) for embedding in embeddings]
+                # Only provider results are cached; fallback vectors are never persisted
+                if self.cache:
+                    self.cache.put_many(texts, embeddings, self.model_name, task_type)
+                return embeddings
+            except Exception as e:
+                if self._is_throttling_error(e) and attempt < self.max_retries:
+                    rate_limiter.on_throttle()
+                    await asyncio.sleep(min(2 ** attempt, 30))
+                    continue
+                print(f"Error generating embedding: {str(e)}")
+                break
+
+        # Fallback to deterministic offline hashing embeddings
+        self.fallback_batches += 1
+        return [FallbackEmbedding(embedding) for embedding in self.fallback_embedder(texts)]
+
+    def _fallback_embedding(self, text: str) -> List[float]:
+        """Deterministic offline embedding, stable across processes."""
+        return self.fallback_embedder.embed(text)
+
+    async def generate_batch_embeddings(self, texts: List[str], batch_size: Optional[int] = None,
+                                        task_type: str = "retrieval_document",
+                                        interactive: bool = False) -> List[List[float]]:
+        """Generate embeddings for multiple texts in concurrent provider batches.
+
+        Cached texts are served from the embedding cache; only misses are sent to
+        the provider. Each batch is a single provider call; batches run concurrently
+        under the batch semaphore and the adaptive rate limiter. ``interactive``
+        calls (user queries) use the query rate limiter and no semaphore instead.
+        Output order matches input order.
+        """
+        batch_size = batch_size or self.batch_size
+        if self.cache:
+            embeddings: List[Optional[List[float]]] = self.cache.get_many(texts, self.model_name, task_type)
+        else:
+            embeddings = [None] * len(texts)
+
+        # Embed each distinct missing text once, then fan results back out
+        missing_positions: Dict[str, List[int]] = {}
+        for i, (text, embedding) in enumerate(zip(texts, embeddings)):
+            if embedding is None:
+                missing_positions.setdefault(text, []).append(i)
+        missing_texts = list(missing_positions)
+
+        async def embed_slice(start: int):
+            batch = missing_texts[start:start + batch_size]
+            # Async backends queue and batch requests themselves; the semaphore bounds provider calls
+            if interactive or hasattr(self.embedding_backend, 'embed_async'):
+                slot = contextlib.nullcontext()
+            else:
+                slot = self._get_batch_semaphore()
+            async with slot:
+                batch_embeddings = await self._embed_batch_with_retry(
+                    batch, task_type, self.query_rate_limiter if interactive else self.rate_limiter
+                )
+            for text, embedding in zip(batch, batch_embeddings):
+                for position in missing_positions[text]:
+                    embeddings[position] = embedding
+
+        await asyncio.gather(*(embed_slice(start) for start in range(0, len(missing_texts), batch_size)))
+
+        return embeddings
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batching and rate limiting statistics."""
+        return {
+            'batch_size': self.batch_size,
+            'model': self.model_name,
+            'fallback_batches': self.fallback_batches,
+            'backend': self.embedding_backend.get_stats() if hasattr(self.embedding_backend, 'get_stats') else None,
+            'rate_limiter': self.rate_limiter.get_stats(),
+            'query_rate_limiter': self.query_rate_limiter.get_stats(),
+            'cache': self.cache.get_stats() if self.cache else None
+        }
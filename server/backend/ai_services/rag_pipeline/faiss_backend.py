@@ -0,0 +1,114 @@
+import os
+from typing import List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from .local_collection import LocalCollection
+
+class FaissCollection(LocalCollection):
+    """In-process FAISS index exposing the subset of the Chroma collection API we use.
+
+    Vectors live in an ``IndexIDMap2`` keyed by side-table row ids, and filters
+    are pushed into the search through ``IDSelectorBitmap``. The index file is
+    memory-mapped when opened and only loaded into memory for writes.
+    """
+
+    def __init__(self, persist_directory: str, name: str = "krishi_knowledge",
+                 index_factory: str = "Flat", use_mmap: bool = True, ef_search: int = 64):
+        super().__init__(persist_directory, name)
+        # "Flat" is exact and cheap to update; "HNSW32" is much faster to search on large,
+        # read-mostly collections but rebuilds the graph whenever vectors are replaced
+        self.index_factory = index_factory
+        self.ef_search = ef_search
+        self.index_path = os.path.join(persist_directory, f"{name}.faiss")
+
+        self.index = None
+        self._mmapped = False
+        self._dirty = False
+        if os.path.exists(self.index_path):
+            self._load_index(use_mmap)
+
+    def _load_index(self, use_mmap: bool):
+        if use_mmap:
+            try:
+                self.index = faiss.read_index(self.index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+                self._mmapped = True
+            except RuntimeError:
+                # Not every index type supports mapping; fall back to reading it into memory
+                self.index = None
+        if self.index is None:
+            self.index = faiss.read_index(self.index_path)
+            self._mmapped = False
+        self._configure_index()
+        self._reconcile(f"FAISS index {self.index_path}")
+
+    def _new_index(self, dim: int):
+        self.index = faiss.IndexIDMap2(faiss.index_factory(dim, self.index_factory, faiss.METRIC_INNER_PRODUCT))
+        self._configure_index()
+
+    def _configure_index(self):
+        inner = faiss.downcast_index(self.index.index)
+        if hasattr(inner, 'hnsw'):
+            inner.hnsw.efSearch = self.ef_search
+
+    def _prepare_write(self, dim: int):
+        if self.index is None:
+            self._new_index(dim)
+        elif self._mmapped:
+            self.index = faiss.read_index(self.index_path)
+            self._mmapped = False
+            self._configure_index()
+        if self.index.d != dim:
+            raise ValueError(f"Embedding dimension {dim} does not match index dimension {self.index.d}")
+
+    def _add_vectors(self, vectors: np.ndarray, row_ids: np.ndarray):
+        self.index.add_with_ids(vectors, row_ids)
+        self._dirty = True
+
+    def _remove_vectors(self, row_ids: List[int]):
+        if self.index is None or not len(row_ids):
+            return
+        self._prepare_write(self.index.d)
+        row_ids = np.asarray(row_ids, dtype=np.int64)
+        try:
+            self.index.remove_ids(row_ids)
+        except RuntimeError:
+            # Graph indexes (HNSW) cannot remove in place; rebuild from the surviving vectors
+            indexed = faiss.vector_to_array(self.index.id_map)
+            vectors = self.index.index.reconstruct_n(0, self.index.ntotal)
+            keep = ~np.isin(indexed, row_ids)
+            self._new_index(self.index.d)
+            if keep.any():
+                self.index.add_with_ids(vectors[keep], indexed[keep])
+        self._dirty = True
+
+    def _indexed_row_ids(self) -> np.ndarray:
+        if self.index is None:
+            return np.empty(0, dtype=np.int64)
+        return faiss.vector_to_array(self.index.id_map)
+
+    def _reconstruct(self, row_ids: List[int]) -> np.ndarray:
+        if self.index is None or not row_ids:
+            return np.empty((0, self.index.d if self.index else 0), dtype=np.float32)
+        return np.vstack([self.index.reconstruct(int(row_id)) for row_id in row_ids])
+
+    def _search(self, queries: np.ndarray, n_results: int,
+                bitmap: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        if self.index is None or self.index.ntotal == 0:
+            return np.empty((len(queries), 0), dtype=np.float32), np.empty((len(queries), 0), dtype=np.int64)
+        params = None
+        if bitmap is not None:
+            # The bitmap array stays referenced by this frame for the duration of the search
+            params = faiss.SearchParameters(sel=faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap)))
+        return self.index.search(queries, min(n_results, self.index.ntotal), params=params)
+
+    def persist(self):
+        """Write the index to disk atomically if it changed since the last persist."""
+        with self._lock:
+            if not self._dirty or self.index is None:
+                return
+            tmp_path = f"{self.index_path}.tmp"
+            faiss.write_index(self.index, tmp_path)
+            os.replace(tmp_path, self.index_path)
+            self._dirty = False
@@ -0,0 +1,101 @@
+import hashlib
+import re
+import unicodedata
+from functools import lru_cache
+from typing import List, Tuple
+
+import numpy as np
+
+# Word characters plus the Malayalam block, which includes combining vowel signs
+# that ``\w`` alone does not match
+TOKEN_PATTERN = re.compile(r'[\w\u0D00-\u0D7F]+')
+
+@lru_cache(maxsize=262144)
+def _feature_slot(feature: str, dim: int) -> Tuple[int, float]:
+    """Map a feature to a (column, sign) pair using a process-independent hash."""
+    digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+    value = int.from_bytes(digest, 'little')
+    sign = 1.0 if (value >> 63) & 1 else -1.0
+    return value % dim, sign
+
+class FallbackEmbedding(list):
+    """A hashing fallback vector produced while the backend failed.
+
+    Behaves as a plain list; the flag lets callers keep it out of caches, so
+    the query is embedded properly again once the provider recovers.
+    """
+    is_fallback = True
+
+def is_fallback_embedding(embedding) -> bool:
+    return getattr(embedding, 'is_fallback', False)
+
+class HashingEmbedder:
+    """Deterministic offline embedder based on signed feature hashing.
+
+    Features are lowercased words and character n-grams of each word, so
+    Malayalam and English text both produce useful overlap. Hashing uses
+    blake2b rather than ``hash()``, which is salted per process, so vectors are
+    identical across workers and restarts. Output rows are L2-normalised.
+    """
+
+    def __init__(self, dim: int = 768, ngram_range: Tuple[int, int] = (3, 5),
+                 word_weight: float = 1.0, char_weight: float = 0.5):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.word_weight = word_weight
+        self.char_weight = char_weight
+        self.model_name = f"hashing-{dim}-{ngram_range[0]}-{ngram_range[1]}"
+
+    def tokenize(self, text: str) -> List[str]:
+        return TOKEN_PATTERN.findall(unicodedata.normalize('NFC', text).lower())
+
+    def _features(self, text: str) -> Tuple[List[int], List[float]]:
+        columns: List[int] = []
+        values: List[float] = []
+        min_n, max_n = self.ngram_range
+
+        for word in self.tokenize(text):
+            column, sign = _feature_slot(f"w:{word}", self.dim)
+            columns.append(column)
+            values.append(sign * self.word_weight)
+
+            padded = f"<{word}>"
+            for n in range(min_n, max_n + 1):
+                for start in range(len(padded) - n + 1):
+                    column, sign = _feature_slot(f"c:{padded[start:start + n]}", self.dim)
+                    columns.append(column)
+                    values.append(sign * self.char_weight)
+
+        return columns, values
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into an (n, dim) float32 matrix in one vectorised pass."""
+        rows: List[np.ndarray] = []
+        columns: List[int] = []
+        values: List[float] = []
+
+        for row, text in enumerate(texts):
+            text_columns, text_values = self._features(text)
+            rows.append(np.full(len(text_columns), row, dtype=np.int64))
+            columns.extend(text_columns)
+            values.extend(text_values)
+
+        if not columns:
+            return np.zeros((len(texts), self.dim), dtype=np.float32)
+
+        # Scatter-add the sparse (row, column, value) triples into a dense matrix
+        flat_index = np.concatenate(rows) * self.dim + np.asarray(columns, dtype=np.int64)
+        matrix = np.bincount(
+            flat_index, weights=np.asarray(values, dtype=np.float64), minlength=len(texts) * self.dim
+        ).reshape(len(texts), self.dim)
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix.astype(np.float32)
+
+    def embed(self, text: str) -> List[float]:
+        return self.embed_batch([text])[0].tolist()
+
+    def __call__(self, texts: List[str], task_type: str = "retrieval_document") -> List[List[float]]:
+        """Embedding backend interface used by EmbeddingsManager."""
+        return self.embed_batch(texts).tolist()
@@ -0,0 +1,182 @@
+import os
+from typing import List, Dict, Any, Tuple
+
+from .document_processor import DocumentProcessor
+from .embeddings_manager import EmbeddingsManager
+from .vector_store import VectorStore
+from .ingestion_manifest import IngestionManifest
+from .hashing_embedder import is_fallback_embedding
+
+# Category of files placed directly in the knowledge base root
+DEFAULT_CATEGORY = 'general'
+
+class IncrementalIngester:
+    """Sync a knowledge base directory into the vector store, touching only what changed.
+
+    Chunk ids are derived from the file and the chunk content, so an unchanged
+    chunk keeps its id across runs. Changed files are re-chunked, new or moved
+    chunks are upserted and chunks that disappeared are deleted.
+    """
+
+    SUPPORTED_EXTENSIONS = ('.txt', '.json', '.jsonl')
+
+    def __init__(self, processor: DocumentProcessor, embeddings_manager: EmbeddingsManager,
+                 vector_store: VectorStore, manifest: IngestionManifest, upsert_batch_size: int = 500):
+        self.processor = processor
+        self.upsert_batch_size = upsert_batch_size
+        self.embeddings_manager = embeddings_manager
+        self.vector_store = vector_store
+        self.manifest = manifest
+
+    @classmethod
+    def discover_files(cls, kb_path: str) -> Dict[str, str]:
+        """Map manifest keys (paths relative to kb_path) to file paths."""
+        files = {}
+        for root, _, filenames in os.walk(kb_path):
+            for filename in sorted(filenames):
+                if filename.endswith(cls.SUPPORTED_EXTENSIONS):
+                    file_path = os.path.join(root, filename)
+                    file_key = os.path.relpath(file_path, kb_path).replace(os.sep, '/')
+                    files[file_key] = file_path
+        return files
+
+    @staticmethod
+    def category_for(file_key: str) -> str:
+        """Category of a knowledge base file from its top-level folder (crops/, diseases/, ...)."""
+        parts = file_key.split('/')
+        return parts[0].lower() if len(parts) > 1 else DEFAULT_CATEGORY
+
+    def assign_chunk_id(self, file_key: str, doc: Dict[str, Any], seen: Dict[str, int]) -> str:
+        """Give a chunk a content-addressed id and its category.
+
+        Identical chunks within a file get an occurrence suffix.
+        """
+        chunk_hash = IngestionManifest.hash_text(doc['content'])[:16]
+        occurrence = seen.get(chunk_hash, 0)
+        seen[chunk_hash] = occurrence + 1
+        doc_id = f"{file_key}:{chunk_hash}" + (f":{occurrence}" if occurrence else "")
+
+        doc['id'] = doc_id
+        doc['category'] = self.category_for(file_key)
+        doc.setdefault('metadata', {})['chunk_hash'] = chunk_hash
+        return doc_id
+
+    def reusable_chunks(self, file_key: str) -> Dict[str, int]:
+        """Chunks already stored with current metadata, which need no rewrite if unchanged."""
+        if not self.manifest.has_current_metadata(file_key):
+            return {}
+        return self.manifest.get_file(file_key).get('chunks', {})
+
+    def assign_chunk_ids(self, file_key: str, documents: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Give each chunk a content-addressed id; returns id -> chunk_index."""
+        seen: Dict[str, int] = {}
+        return {self.assign_chunk_id(file_key, doc, seen): doc['chunk_index'] for doc in documents}
+
+    def plan_file_update(self, file_key: str, documents: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[str], Dict[str, int]]:
+        """Work out which chunks to upsert and which ids to delete for a changed file."""
+        new_chunks = self.assign_chunk_ids(file_key, documents)
+        entry = self.manifest.get_file(file_key)
+        old_chunks = entry.get('chunks', {}) if entry else {}
+        reusable = self.reusable_chunks(file_key)
+
+        to_upsert = [doc for doc in documents if reusable.get(doc['id']) != doc['chunk_index']]
+        to_delete = [doc_id for doc_id in old_chunks if doc_id not in new_chunks]
+        return to_upsert, to_delete, new_chunks
+
+    async def _upsert_batch(self, file_key: str, batch: List[Dict[str, Any]]):
+        embeddings = await self.embeddings_manager.generate_batch_embeddings([doc['content'] for doc in batch])
+        # Hashing vectors live in another vector space; recorded in the manifest they would never be re-embedded
+        if any(is_fallback_embedding(embedding) for embedding in embeddings):
+            raise RuntimeError(f"Embedding provider unavailable for {file_key}, got fallback vectors")
+        if not self.vector_store.upsert_documents(batch, embeddings):
+            raise RuntimeError(f"Failed to upsert chunks for {file_key}")
+
+    async def ingest_file(self, file_key: str, file_path: str, content_hash: str) -> Dict[str, int]:
+        """Stream a changed file's chunks into the store in batches, then drop stale chunks."""
+        entry = self.manifest.get_file(file_key)
+        if entry is None:
+            # First time under the manifest: clear chunks from earlier non-incremental runs
+            self.vector_store.delete_by_source(file_path)
+        old_chunks = entry.get('chunks', {}) if entry else {}
+        reusable = self.reusable_chunks(file_key)
+
+        new_chunks: Dict[str, int] = {}
+        seen: Dict[str, int] = {}
+        batch: List[Dict[str, Any]] = []
+        upserted = 0
+        # Ids written during this run that the manifest does not know yet; removed again if the file fails
+        added_ids: List[str] = []
+
+        try:
+            for doc in self.processor.iter_agricultural_document(file_path):
+                doc_id = self.assign_chunk_id(file_key, doc, seen)
+                new_chunks[doc_id] = doc['chunk_index']
+                if reusable.get(doc_id) != doc['chunk_index']:
+                    batch.append(doc)
+                if len(batch) >= self.upsert_batch_size:
+                    added_ids.extend(pending['id'] for pending in batch if pending['id'] not in old_chunks)
+                    await self._upsert_batch(file_key, batch)
+                    upserted += len(batch)
+                    batch = []
+
+            if batch:
+                added_ids.extend(pending['id'] for pending in batch if pending['id'] not in old_chunks)
+                await self._upsert_batch(file_key, batch)
+                upserted += len(batch)
+
+            to_delete = [doc_id for doc_id in old_chunks if doc_id not in new_chunks]
+            if not self.vector_store.delete_documents(to_delete):
+                raise RuntimeError(f"Failed to delete stale chunks for {file_key}")
+        except BaseException:
+            # Leave no orphans: the file stays as the manifest last recorded it and is retried next sync
+            if added_ids and not self.vector_store.delete_documents(added_ids):
+                print(f"Error removing {len(added_ids)} partially ingested chunks for {file_key}")
+            raise
+
+        self.manifest.record_file(file_key, content_hash, new_chunks)
+        # The manifest must never get ahead of what the vector store has persisted
+        self.vector_store.flush()
+        self.manifest.save()
+        return {'upserted': upserted, 'deleted': len(to_delete)}
+
+    def remove_file(self, file_key: str):
+        entry = self.manifest.get_file(file_key) or {}
+        if self.vector_store.delete_documents(list(entry.get('chunks', {}))):
+            self.manifest.remove_file(file_key)
+            self.vector_store.flush()
+            self.manifest.save()
+
+    async def sync_directory(self, kb_path: str) -> Dict[str, int]:
+        """Bring the vector store in line with the files under kb_path."""
+        stats = {'files_seen': 0, 'files_unchanged': 0, 'files_processed': 0, 'files_removed': 0,
+                 'files_failed': 0, 'chunks_upserted': 0, 'chunks_deleted': 0}
+
+        files = self.discover_files(kb_path)
+        for file_key, file_path in files.items():
+            stats['files_seen'] += 1
+            content_hash = IngestionManifest.hash_file(file_path)
+            if self.manifest.is_unchanged(file_key, content_hash):
+                stats['files_unchanged'] += 1
+                continue
+
+            print(f"Processing {file_path}...")
+            try:
+                result = await self.ingest_file(file_key, file_path, content_hash)
+            except Exception as e:
+                print(f"Error ingesting {file_path}: {str(e)}")
+                stats['files_failed'] += 1
+                continue
+
+            stats['files_processed'] += 1
+            stats['chunks_upserted'] += result['upserted']
+            stats['chunks_deleted'] += result['deleted']
+            print(f"Upserted {result['upserted']} and deleted {result['deleted']} chunks for {file_key}")
+
+        for file_key in list(self.manifest.files):
+            if file_key not in files:
+                print(f"Removing chunks for deleted file {file_key}")
+                stats['chunks_deleted'] += len(self.manifest.files[file_key].get('chunks', {}))
+                self.remove_file(file_key)
+                stats['files_removed'] += 1
+
+        return stats
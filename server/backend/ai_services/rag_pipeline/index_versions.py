@@ -0,0 +1,88 @@
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+import json
+import os
+import shutil
+
+# Under the vector store root: the pointer to the live version, and one directory per version
+ACTIVE_POINTER = "active_index.json"
+VERSIONS_DIRECTORY = "versions"
+
+def new_version() -> str:
+    """Sortable version name for a new index build."""
+    return datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+
+def version_directory(root_directory: str, version: str) -> str:
+    return os.path.join(root_directory, VERSIONS_DIRECTORY, version)
+
+def read_active_version(root_directory: str) -> Optional[str]:
+    """The live index version, or None for a store that predates versioning."""
+    try:
+        with open(os.path.join(root_directory, ACTIVE_POINTER), 'r', encoding='utf-8') as f:
+            return json.load(f).get('version')
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def activate_version(root_directory: str, version: str, details: Optional[Dict[str, Any]] = None):
+    """Point readers at ``version`` with one atomic rename; they never see a half-written pointer."""
+    if not os.path.isdir(version_directory(root_directory, version)):
+        raise ValueError(f"Index version {version} does not exist")
+    pointer_path = os.path.join(root_directory, ACTIVE_POINTER)
+    temp_path = f"{pointer_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': version, 'activated_at': datetime.now().isoformat(), **(details or {})}, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, pointer_path)
+
+def list_versions(root_directory: str) -> List[str]:
+    """Built versions, oldest first."""
+    versions_path = os.path.join(root_directory, VERSIONS_DIRECTORY)
+    if not os.path.isdir(versions_path):
+        return []
+    return sorted(name for name in os.listdir(versions_path) if os.path.isdir(os.path.join(versions_path, name)))
+
+def collect_garbage(root_directory: str, keep: int = 2) -> List[str]:
+    """Delete all but the newest ``keep`` versions; the active one is always kept.
+
+    Keeping the previous version too lets processes that have not switched
+    yet finish their queries, and gives a rollback target.
+    """
+    active = read_active_version(root_directory)
+    versions = list_versions(root_directory)
+    if active in versions:
+        # Versions built after the active one (e.g. a failed or in-progress build) are not kept in its place
+        versions = versions[:versions.index(active) + 1]
+    retained = set(versions[-keep:]) | {active}
+    removed = []
+    for version in list_versions(root_directory):
+        if version in retained or version not in versions:
+            continue
+        try:
+            shutil.rmtree(version_directory(root_directory, version))
+            removed.append(version)
+        except Exception as e:
+            print(f"Error removing index version {version}: {str(e)}")
+    return removed
+
+def validate_index(vector_store, previous_count: int = 0, min_ratio: float = 0.9,
+                   probes: int = 5) -> List[str]:
+    """Problems that should stop a freshly built index from going live (empty list when valid).
+
+    Checks that the index is not empty, has not shrunk below ``min_ratio`` of
+    the live index, and that stored chunks find themselves when searched with
+    their own embeddings.
+    """
+    problems = []
+    count = vector_store.collection.count()
+    if count == 0:
+        return ["index is empty"]
+    if previous_count and count < min_ratio * previous_count:
+        problems.append(f"index has {count} chunks, fewer than {min_ratio:.0%} of the live {previous_count}")
+
+    sample = vector_store.collection.get(limit=probes, include=['embeddings'])
+    for doc_id, embedding in zip(sample['ids'], sample['embeddings']):
+        results = vector_store.search(list(embedding), n_results=5)
+        if doc_id not in results['ids']:
+            problems.append(f"chunk {doc_id} is not found by its own embedding")
+    return problems
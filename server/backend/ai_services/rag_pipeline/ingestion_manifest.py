@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+class IngestionManifest:
+    """Record of what has been ingested into the vector store.
+
+    For every knowledge base file the manifest keeps the hash of its content
+    and the ids of the chunks it produced (mapped to their chunk index), so a
+    re-run only has to touch files and chunks that actually changed. It also
+    records the embedding model the chunks were embedded with, since vectors
+    from another model cannot be mixed into the same index.
+    """
+
+    # Bump when the metadata stored with chunks changes, so files ingested by an
+    # older version get their chunks rewritten even though their content is the same
+    METADATA_VERSION = 2
+
+    def __init__(self, manifest_path: str = "./data/embeddings/ingestion_manifest.json"):
+        self.manifest_path = manifest_path
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.embedding_model: Optional[str] = None
+        self.load()
+
+    @staticmethod
+    def hash_file(file_path: str, block_size: int = 1 << 20) -> str:
+        """Hash a file's bytes without loading it all into memory."""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def load(self):
+        try:
+            if os.path.exists(self.manifest_path):
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.files = data.get('files', {})
+                self.embedding_model = data.get('embedding_model')
+        except Exception as e:
+            print(f"Error loading ingestion manifest, starting fresh: {str(e)}")
+            self.files = {}
+            self.embedding_model = None
+
+    def save(self):
+        """Write the manifest atomically so an interrupted run never corrupts it."""
+        directory = os.path.dirname(self.manifest_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'updated_at': datetime.now().isoformat(), 'embedding_model': self.embedding_model,
+                       'files': self.files}, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def embedding_model_changed(self, model_name: str) -> bool:
+        """Whether recorded chunks were embedded with a different model than model_name.
+
+        Manifests written before the model was recorded are taken to match.
+        """
+        return bool(self.files) and self.embedding_model is not None and self.embedding_model != model_name
+
+    def get_file(self, file_key: str) -> Optional[Dict[str, Any]]:
+        return self.files.get(file_key)
+
+    def has_current_metadata(self, file_key: str) -> bool:
+        entry = self.files.get(file_key)
+        return bool(entry) and entry.get('metadata_version', 1) == self.METADATA_VERSION
+
+    def is_unchanged(self, file_key: str, content_hash: str) -> bool:
+        entry = self.files.get(file_key)
+        return self.has_current_metadata(file_key) and entry.get('content_hash') == content_hash
+
+    def record_file(self, file_key: str, content_hash: str, chunks: Dict[str, int]):
+        self.files[file_key] = {
+            'content_hash': content_hash,
+            'chunks': chunks,
+            'metadata_version': self.METADATA_VERSION,
+            'ingested_at': datetime.now().isoformat()
+        }
+
+    def remove_file(self, file_key: str):
+        self.files.pop(file_key, None)
@@ -0,0 +1,353 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Manager
+from typing import List, Dict, Any, Optional, Tuple
+
+from .document_processor import DocumentProcessor
+from .embeddings_manager import EmbeddingsManager
+from .vector_store import VectorStore
+from .ingestion_manifest import IngestionManifest
+from .incremental_ingester import IncrementalIngester
+from .hashing_embedder import is_fallback_embedding
+
+_worker_processor: Optional[DocumentProcessor] = None
+
+def _init_worker(gemini_api_key: Optional[str]):
+    """Build one DocumentProcessor per pool process instead of one per file."""
+    global _worker_processor
+    _worker_processor = DocumentProcessor(gemini_api_key)
+
+def _read_and_chunk(file_key: str, file_path: str, out_queue, batch_size: int) -> Tuple[int, float]:
+    """Pool task: stream one file's chunks into out_queue in batches.
+
+    Sends ('chunks', file_key, batch) messages followed by ('done', file_key, None),
+    or ('error', file_key, message) if the file cannot be read. Returns the number
+    of chunks and the time spent.
+    """
+    start = time.perf_counter()
+    count = 0
+    batch: List[Dict[str, Any]] = []
+    try:
+        for doc in _worker_processor.iter_agricultural_document(file_path):
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                out_queue.put(('chunks', file_key, batch))
+                count += len(batch)
+                batch = []
+        if batch:
+            out_queue.put(('chunks', file_key, batch))
+            count += len(batch)
+        out_queue.put(('done', file_key, None))
+    except Exception as e:
+        out_queue.put(('error', file_key, str(e)))
+    return count, time.perf_counter() - start
+
+class FileProgress:
+    """Bookkeeping for one file in flight through the pipeline.
+
+    A file is finished once it has been read completely and every one of its
+    batches has been embedded and written (or dropped after a failure).
+    """
+
+    def __init__(self, content_hash: str, old_chunks: Dict[str, int], reusable: Dict[str, int]):
+        self.content_hash = content_hash
+        self.old_chunks = old_chunks
+        self.reusable = reusable
+        self.new_chunks: Dict[str, int] = {}
+        self.seen: Dict[str, int] = {}
+        # Ids written during this run that the manifest does not know yet; removed again if the file fails
+        self.added_ids: List[str] = []
+        self.pending_batches = 0
+        self.read_done = False
+        self.error: Optional[str] = None
+
+class StageStats:
+    """Throughput counters for one pipeline stage."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.calls = 0
+        self.busy_seconds = 0.0
+        self.queue_high_water = 0
+
+    def record(self, items: int, seconds: float):
+        self.items += items
+        self.calls += 1
+        self.busy_seconds += seconds
+
+    def to_dict(self, wall_seconds: float) -> Dict[str, Any]:
+        return {
+            'items': self.items,
+            'calls': self.calls,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'items_per_second': round(self.items / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+            'items_per_busy_second': round(self.items / self.busy_seconds, 2) if self.busy_seconds > 0 else 0.0,
+            'queue_high_water': self.queue_high_water
+        }
+
+class IngestionPipeline:
+    """Streaming ingestion built from bounded queues.
+
+    Files are read and chunked in a process pool, chunk batches are embedded by
+    concurrent async workers and a single writer flushes large batches to the
+    vector store. Every queue is bounded, so a slow stage applies backpressure
+    to the stages in front of it and memory stays flat regardless of corpus size.
+    """
+
+    def __init__(self, embeddings_manager: EmbeddingsManager, vector_store: VectorStore,
+                 gemini_api_key: Optional[str] = None, manifest: Optional[IngestionManifest] = None,
+                 read_workers: int = None, embed_workers: int = 4, embed_batch_size: int = 100,
+                 write_batch_size: int = 1000, queue_size: int = 16, manifest_save_every: int = 100):
+        self.embeddings_manager = embeddings_manager
+        self.vector_store = vector_store
+        self.gemini_api_key = gemini_api_key
+        self.manifest = manifest
+        self.read_workers = read_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.embed_workers = embed_workers
+        self.embed_batch_size = embed_batch_size
+        self.write_batch_size = write_batch_size
+        self.queue_size = queue_size
+        self.manifest_save_every = manifest_save_every
+        self._unsaved_manifest_files = 0
+
+        # Reuse the incremental planner for content-addressed ids and stale chunk detection
+        self._planner = IncrementalIngester(None, embeddings_manager, vector_store, manifest) if manifest else None
+
+    async def run(self, file_paths: Dict[str, str]) -> Dict[str, Any]:
+        """Ingest files given as a mapping of manifest key -> path."""
+        stats = {name: StageStats(name) for name in ('read', 'embed', 'write')}
+        chunk_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        write_queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        # Per-file bookkeeping so the manifest is only updated once all of a file's chunks are written
+        files: Dict[str, FileProgress] = {}
+        counters = {'files_unchanged': 0, 'files_failed': 0}
+
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+
+        def fail(file_key: str, message: str):
+            progress = files[file_key]
+            if progress.error is None:
+                print(f"Error ingesting {file_key}: {message}")
+                progress.error = message
+
+        async def finish_if_done(file_key: str):
+            progress = files[file_key]
+            if not progress.read_done or progress.pending_batches:
+                return
+            del files[file_key]
+
+            if progress.error is None and self._planner:
+                # Stale chunks go only once the file's new chunks are all stored
+                to_delete = [doc_id for doc_id in progress.old_chunks if doc_id not in progress.new_chunks]
+                if not await asyncio.to_thread(self.vector_store.delete_documents, to_delete):
+                    progress.error = "failed to delete stale chunks"
+                    print(f"Error ingesting {file_key}: {progress.error}")
+            if progress.error is not None:
+                # Leave no orphans: the file stays as the manifest last recorded it and is retried next run
+                counters['files_failed'] += 1
+                if progress.added_ids and not await asyncio.to_thread(self.vector_store.delete_documents,
+                                                                      progress.added_ids):
+                    print(f"Error removing {len(progress.added_ids)} partially ingested chunks for {file_key}")
+                return
+            self._record_file(file_key, progress.content_hash, progress.new_chunks)
+
+        async def batch_done(file_key: str):
+            files[file_key].pending_batches -= 1
+            await finish_if_done(file_key)
+
+        async def read_stage(pool: ProcessPoolExecutor, out_queue):
+            in_flight = asyncio.Semaphore(self.read_workers * 2)
+
+            async def read_one(file_key: str, file_path: str):
+                try:
+                    content_hash = await asyncio.to_thread(IngestionManifest.hash_file, file_path)
+                    if self.manifest and self.manifest.is_unchanged(file_key, content_hash):
+                        counters['files_unchanged'] += 1
+                        return
+
+                    entry = self.manifest.get_file(file_key) if self.manifest else None
+                    if self._planner and entry is None:
+                        # First time under the manifest: clear chunks from earlier non-incremental runs
+                        await asyncio.to_thread(self.vector_store.delete_by_source, file_path)
+                    old_chunks = entry.get('chunks', {}) if entry else {}
+                    reusable = self._planner.reusable_chunks(file_key) if self._planner else {}
+                    files[file_key] = FileProgress(content_hash, old_chunks, reusable)
+
+                    count, seconds = await loop.run_in_executor(pool, _read_and_chunk, file_key, file_path,
+                                                                out_queue, self.embed_batch_size)
+                    stats['read'].record(count, seconds)
+                except Exception as e:
+                    print(f"Error reading {file_path}: {str(e)}")
+                    if file_key in files:
+                        fail(file_key, str(e))
+                        files[file_key].read_done = True
+                        await finish_if_done(file_key)
+                    else:
+                        counters['files_failed'] += 1
+                finally:
+                    in_flight.release()
+
+            tasks = []
+            for file_key, file_path in file_paths.items():
+                await in_flight.acquire()
+                tasks.append(asyncio.create_task(read_one(file_key, file_path)))
+            await asyncio.gather(*tasks)
+
+        async def route_stage(out_queue):
+            """Assign chunk ids as chunks arrive from the readers and queue what needs embedding."""
+            while True:
+                message = await asyncio.to_thread(out_queue.get)
+                if message is None:
+                    return
+                kind, file_key, payload = message
+                progress = files.get(file_key)
+                if progress is None:
+                    continue
+                if kind == 'error':
+                    fail(file_key, payload)
+                if kind != 'chunks':
+                    progress.read_done = True
+                    await finish_if_done(file_key)
+                    continue
+                if progress.error is not None:
+                    continue
+
+                documents = []
+                for doc in payload:
+                    if self._planner:
+                        doc_id = self._planner.assign_chunk_id(file_key, doc, progress.seen)
+                    else:
+                        doc_id = doc['id']
+                    progress.new_chunks[doc_id] = doc['chunk_index']
+                    if progress.reusable.get(doc_id) != doc['chunk_index']:
+                        documents.append(doc)
+                for i in range(0, len(documents), self.embed_batch_size):
+                    progress.pending_batches += 1
+                    await chunk_queue.put((file_key, documents[i:i + self.embed_batch_size]))
+                    stats['embed'].queue_high_water = max(stats['embed'].queue_high_water, chunk_queue.qsize())
+
+        async def embed_stage():
+            while True:
+                item = await chunk_queue.get()
+                try:
+                    if item is None:
+                        return
+                    file_key, batch = item
+                    if files[file_key].error is not None:
+                        await batch_done(file_key)
+                        continue
+                    try:
+                        batch_start = time.perf_counter()
+                        embeddings = await self.embeddings_manager.generate_batch_embeddings(
+                            [doc['content'] for doc in batch]
+                        )
+                        stats['embed'].record(len(batch), time.perf_counter() - batch_start)
+                        if any(is_fallback_embedding(embedding) for embedding in embeddings):
+                            raise RuntimeError("embedding provider unavailable, got fallback vectors")
+                    except Exception as e:
+                        fail(file_key, f"embedding failed: {str(e)}")
+                        await batch_done(file_key)
+                        continue
+                    await write_queue.put((file_key, batch, embeddings))
+                    stats['write'].queue_high_water = max(stats['write'].queue_high_water, write_queue.qsize())
+                finally:
+                    chunk_queue.task_done()
+
+        async def write_stage():
+            buffer_docs: List[Dict[str, Any]] = []
+            buffer_embeddings: List[List[float]] = []
+            buffer_batches: List[Tuple[str, List[str]]] = []
+
+            async def flush():
+                if not buffer_docs:
+                    return
+                flush_start = time.perf_counter()
+                try:
+                    success = await asyncio.to_thread(self.vector_store.upsert_documents, buffer_docs, buffer_embeddings)
+                except Exception as e:
+                    print(f"Error writing chunks: {str(e)}")
+                    success = False
+                stats['write'].record(len(buffer_docs), time.perf_counter() - flush_start)
+                batches = list(buffer_batches)
+                buffer_docs.clear()
+                buffer_embeddings.clear()
+                buffer_batches.clear()
+
+                for file_key, doc_ids in batches:
+                    progress = files[file_key]
+                    # A failed upsert may still have written part of the batch
+                    progress.added_ids.extend(doc_id for doc_id in doc_ids if doc_id not in progress.old_chunks)
+                    if not success:
+                        fail(file_key, "failed to write chunks")
+                    await batch_done(file_key)
+
+            while True:
+                item = await write_queue.get()
+                if item is None:
+                    await flush()
+                    return
+                file_key, batch, embeddings = item
+                buffer_docs.extend(batch)
+                buffer_embeddings.extend(embeddings)
+                buffer_batches.append((file_key, [doc['id'] for doc in batch]))
+                if len(buffer_docs) >= self.write_batch_size:
+                    await flush()
+
+        with Manager() as manager, ProcessPoolExecutor(max_workers=self.read_workers, initializer=_init_worker,
+                                                       initargs=(self.gemini_api_key,)) as pool:
+            # Bounded, so readers block instead of buffering whole files when embedding falls behind
+            out_queue = manager.Queue(maxsize=self.queue_size)
+            router = asyncio.create_task(route_stage(out_queue))
+            writer = asyncio.create_task(write_stage())
+            embedders = [asyncio.create_task(embed_stage()) for _ in range(self.embed_workers)]
+
+            await read_stage(pool, out_queue)
+            await asyncio.to_thread(out_queue.put, None)
+            await router
+            for _ in embedders:
+                await chunk_queue.put(None)
+            await asyncio.gather(*embedders)
+            await write_queue.put(None)
+            await writer
+
+        self.vector_store.flush()
+        if self.manifest:
+            self.manifest.save()
+            self._unsaved_manifest_files = 0
+
+        wall_seconds = time.perf_counter() - start
+        report = {
+            'files': len(file_paths),
+            'files_unchanged': counters['files_unchanged'],
+            'files_failed': counters['files_failed'],
+            'wall_seconds': round(wall_seconds, 3),
+            'stages': {name: stage.to_dict(wall_seconds) for name, stage in stats.items()}
+        }
+        return report
+
+    def _record_file(self, file_key: str, content_hash: str, chunks: Dict[str, int]):
+        if self.manifest:
+            self.manifest.record_file(file_key, content_hash, chunks)
+            # Rewriting the manifest per file would be quadratic on large corpora
+            self._unsaved_manifest_files += 1
+            if self._unsaved_manifest_files >= self.manifest_save_every:
+                # The manifest must never get ahead of what the vector store has persisted
+                self.vector_store.flush()
+                self.manifest.save()
+                self._unsaved_manifest_files = 0
+
+    async def run_directory(self, kb_path: str) -> Dict[str, Any]:
+        """Ingest every supported file under kb_path."""
+        file_paths = IncrementalIngester.discover_files(kb_path)
+        report = await self.run(file_paths)
+
+        if self._planner:
+            removed = [file_key for file_key in self.manifest.files if file_key not in file_paths]
+            for file_key in removed:
+                await asyncio.to_thread(self._planner.remove_file, file_key)
+            report['files_removed'] = len(removed)
+        return report
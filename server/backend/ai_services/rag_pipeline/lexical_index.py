@@ -0,0 +1,184 @@
+import math
+import re
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+# Words, plus compound terms such as "12:32:16" or "2,4-D" kept together
+TERM_PATTERN = re.compile(r'[\w\u0D00-\u0D7F]+(?:[:.,/\-][\w\u0D00-\u0D7F]+)*')
+SEPARATOR_PATTERN = re.compile(r'[:.,/\-]')
+
+def term_forms(term: str) -> List[str]:
+    """Index forms of one lowercased surface term.
+
+    Stored chunks have punctuation stripped during preprocessing ("NPK 12:32:16"
+    becomes "npk 123216"), so a compound term is indexed both joined and as its
+    parts to match either form.
+    """
+    if not SEPARATOR_PATTERN.search(term):
+        return [term]
+    parts = SEPARATOR_PATTERN.split(term)
+    return [''.join(parts)] + [part for part in parts if part]
+
+def surface_terms(text: str) -> List[str]:
+    return TERM_PATTERN.findall(unicodedata.normalize('NFC', text).lower())
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms for BM25 scoring."""
+    return [form for term in surface_terms(text) for form in term_forms(term)]
+
+class BM25Index:
+    """In-memory BM25 inverted index over the vector store's chunks.
+
+    Postings hold the precomputed BM25 term weight per document, so scoring a
+    query is a handful of numpy scatter-adds with no per-document Python work.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, refresh_interval: float = 60.0):
+        self.k1 = k1
+        self.b = b
+        # How often to compare the collection size against the index to detect re-ingestion
+        self.refresh_interval = refresh_interval
+
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}  # term -> (doc indices, weights)
+        self.idf: Dict[str, float] = {}
+        self.language_masks: Dict[str, np.ndarray] = {}
+
+        self.is_built = False
+        # VectorStore.index_version() this was built from; it changes on every write, so any write
+        # (even one that swaps chunks without changing the count) forces a rebuild
+        self.store_version = None
+        self._last_refresh_check = 0.0
+
+    def build(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]]):
+        """(Re)build the index from parallel lists of chunk ids, contents and metadata."""
+        term_docs: Dict[str, List[int]] = defaultdict(list)
+        term_freqs: Dict[str, List[int]] = defaultdict(list)
+        lengths = np.zeros(len(documents), dtype=np.float32)
+
+        for doc_index, document in enumerate(documents):
+            counts = Counter(tokenize(document or ''))
+            lengths[doc_index] = sum(counts.values())
+            for term, count in counts.items():
+                term_docs[term].append(doc_index)
+                term_freqs[term].append(count)
+
+        total = len(documents)
+        average_length = float(lengths.mean()) if total and lengths.sum() else 1.0
+        norms = self.k1 * (1 - self.b + self.b * lengths / average_length)
+
+        postings = {}
+        idf = {}
+        for term, doc_indices in term_docs.items():
+            doc_indices = np.asarray(doc_indices, dtype=np.int64)
+            freqs = np.asarray(term_freqs[term], dtype=np.float32)
+            postings[term] = (doc_indices, freqs * (self.k1 + 1) / (freqs + norms[doc_indices]))
+            idf[term] = math.log(1 + (total - len(doc_indices) + 0.5) / (len(doc_indices) + 0.5))
+
+        languages = np.asarray([(metadata or {}).get('language', 'en') for metadata in metadatas])
+        self.language_masks = {language: languages == language for language in set(languages.tolist())}
+
+        self.ids, self.documents, self.metadatas = list(ids), list(documents), list(metadatas)
+        self.postings, self.idf = postings, idf
+        self.is_built = True
+        self._last_refresh_check = time.monotonic()
+
+    @staticmethod
+    def store_key(vector_store) -> Optional[str]:
+        if hasattr(vector_store, 'index_version'):
+            return vector_store.index_version()
+        return getattr(vector_store, 'version', None)
+
+    def build_from_store(self, vector_store, page_size: int = 1000, store_version: Optional[str] = None):
+        """Build the index by paging through every chunk in the vector store.
+
+        ``store_version`` identifies what is being indexed when ``vector_store``
+        is an index version that is not live yet.
+        """
+        # Taken before paging, so a write made during the build leaves the index stale
+        store_version = store_version if store_version is not None else self.store_key(vector_store)
+        ids, documents, metadatas = [], [], []
+        offset = 0
+        while True:
+            page = vector_store.collection.get(include=['documents', 'metadatas'],
+                                               limit=page_size, offset=offset)
+            if not page['ids']:
+                break
+            ids.extend(page['ids'])
+            documents.extend(page['documents'])
+            metadatas.extend(page['metadatas'])
+            offset += len(page['ids'])
+        self.build(ids, documents, metadatas)
+        self.store_version = store_version
+
+    def refresh_due(self) -> bool:
+        """True when the index is unbuilt or refresh_interval has passed since the last check."""
+        return not self.is_built or time.monotonic() - self._last_refresh_check >= self.refresh_interval
+
+    def is_stale(self, vector_store) -> bool:
+        """Unbuilt, or the store was written to (or switched versions) since the build."""
+        self._last_refresh_check = time.monotonic()
+        return (not self.is_built or self.store_key(vector_store) != self.store_version
+                or vector_store.collection.count() != len(self.ids))
+
+    def ensure_fresh(self, vector_store):
+        """Build on first use and rebuild in place once the store has changed."""
+        if self.refresh_due() and self.is_stale(vector_store):
+            self.build_from_store(vector_store)
+
+    def query_terms(self, query: str) -> List[str]:
+        """Distinct query terms that occur in the index."""
+        return [term for term in dict.fromkeys(tokenize(query)) if term in self.postings]
+
+    def covers_query(self, query: str) -> bool:
+        """True when every word of the query has at least one form in the index."""
+        terms = surface_terms(query)
+        return bool(terms) and all(
+            any(form in self.postings for form in term_forms(term)) for term in terms
+        )
+
+    def search(self, query: str, n_results: int = 5,
+               language_filter: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return the top BM25 matches as dicts with id, content, metadata, score and matched terms."""
+        terms = self.query_terms(query)
+        if not terms or not self.ids:
+            return []
+
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        matched = np.zeros(len(self.ids), dtype=np.int32)
+        for term in terms:
+            doc_indices, weights = self.postings[term]
+            scores[doc_indices] += self.idf[term] * weights
+            matched[doc_indices] += 1
+
+        if language_filter:
+            mask = self.language_masks.get(language_filter)
+            if mask is None:
+                return []
+            scores[~mask] = 0
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > n_results:
+            candidates = candidates[np.argpartition(-scores[candidates], n_results - 1)[:n_results]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+
+        return [{
+            'id': self.ids[index],
+            'content': self.documents[index],
+            'metadata': self.metadatas[index],
+            'score': float(scores[index]),
+            'matched_terms': int(matched[index])
+        } for index in candidates]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'documents': len(self.ids),
+            'terms': len(self.postings),
+            'built': self.is_built
+        }
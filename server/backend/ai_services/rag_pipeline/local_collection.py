@@ -0,0 +1,158 @@
+import os
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from .metadata_table import ChunkMetadataTable
+
+def normalize_rows(embeddings: List[List[float]]) -> np.ndarray:
+    """float32 copy of the embeddings scaled to unit length, so inner product is cosine similarity."""
+    vectors = np.array(embeddings, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+class LocalCollection:
+    """Chroma collection API over an in-process vector index.
+
+    Chunk ids, contents and metadata live in a SQLite side table; subclasses
+    store unit-length vectors keyed by the table's integer row ids and
+    implement the index hooks below. ``where`` filters are resolved to id
+    bitmaps and handed to the index search, so filtered queries never
+    post-filter. Index changes only reach disk on ``persist()``.
+    """
+
+    def __init__(self, persist_directory: str, name: str):
+        os.makedirs(persist_directory, exist_ok=True)
+        self.name = name
+        self.table = ChunkMetadataTable(os.path.join(persist_directory, f"{name}.sqlite3"))
+        self._lock = threading.RLock()
+
+    # Index hooks implemented by subclasses
+
+    def _prepare_write(self, dim: int):
+        """Make the index writable and check the embedding dimension before any row changes."""
+        raise NotImplementedError
+
+    def _add_vectors(self, vectors: np.ndarray, row_ids: np.ndarray):
+        raise NotImplementedError
+
+    def _remove_vectors(self, row_ids: List[int]):
+        raise NotImplementedError
+
+    def _indexed_row_ids(self) -> np.ndarray:
+        raise NotImplementedError
+
+    def _reconstruct(self, row_ids: List[int]) -> np.ndarray:
+        raise NotImplementedError
+
+    def _search(self, queries: np.ndarray, n_results: int,
+                bitmap: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (similarities, row ids) of shape (queries, n_results); missing hits have row id -1."""
+        raise NotImplementedError
+
+    def persist(self):
+        raise NotImplementedError
+
+    def _reconcile(self, source: str):
+        """Drop rows without vectors and vectors without rows, e.g. after a crash before persist()."""
+        indexed = self._indexed_row_ids()
+        rows = self.table.all_row_ids()
+        stale_rows = np.setdiff1d(rows, indexed)
+        orphan_vectors = np.setdiff1d(indexed, rows)
+        if len(stale_rows) or len(orphan_vectors):
+            print(f"Warning: reconciling {source}: dropping {len(stale_rows)} chunks without vectors "
+                  f"and {len(orphan_vectors)} vectors without chunks")
+            self.table.delete(stale_rows.tolist())
+            self._remove_vectors(orphan_vectors.tolist())
+            self.persist()
+
+    # Chroma collection API
+
+    def upsert(self, ids: List[str], embeddings: List[List[float]], documents: Optional[List[str]] = None,
+               metadatas: Optional[List[Dict[str, Any]]] = None):
+        # The last occurrence of a repeated id wins
+        positions = list({doc_id: position for position, doc_id in enumerate(ids)}.values())
+        ids = [ids[i] for i in positions]
+        documents = [documents[i] for i in positions] if documents else [None] * len(ids)
+        metadatas = [metadatas[i] for i in positions] if metadatas else [{}] * len(ids)
+        vectors = normalize_rows(embeddings)[positions]
+
+        with self._lock:
+            self._prepare_write(vectors.shape[1])
+            self._remove_vectors(list(self.table.row_ids_for(ids).values()))
+            row_ids = self.table.upsert(ids, documents, metadatas)
+            self._add_vectors(vectors, np.asarray(row_ids, dtype=np.int64))
+
+    def add(self, ids: List[str], embeddings: List[List[float]], documents: Optional[List[str]] = None,
+            metadatas: Optional[List[Dict[str, Any]]] = None):
+        """Add new chunks; like Chroma, ids that already exist are skipped."""
+        existing = self.table.row_ids_for(ids)
+        keep = [i for i, doc_id in enumerate(ids) if doc_id not in existing]
+        if len(keep) < len(ids):
+            print(f"Warning: skipping {len(ids) - len(keep)} existing ids in add()")
+        if keep:
+            self.upsert([ids[i] for i in keep], [embeddings[i] for i in keep],
+                        [documents[i] for i in keep] if documents else None,
+                        [metadatas[i] for i in keep] if metadatas else None)
+
+    def update(self, ids: List[str], embeddings: Optional[List[List[float]]] = None,
+               documents: Optional[List[str]] = None, metadatas: Optional[List[Dict[str, Any]]] = None):
+        with self._lock:
+            current = self.get(ids=ids, include=('documents', 'metadatas', 'embeddings'))
+            position = {doc_id: i for i, doc_id in enumerate(ids)}
+            new_embeddings, new_documents, new_metadatas = [], [], []
+            for i, doc_id in enumerate(current['ids']):
+                source = position[doc_id]
+                new_embeddings.append(embeddings[source] if embeddings else current['embeddings'][i])
+                new_documents.append(documents[source] if documents else current['documents'][i])
+                new_metadatas.append(metadatas[source] if metadatas else current['metadatas'][i])
+            if current['ids']:
+                self.upsert(current['ids'], new_embeddings, new_documents, new_metadatas)
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None):
+        with self._lock:
+            row_ids = self.table.select_row_ids(ids, where)
+            self._remove_vectors(row_ids)
+            self.table.delete(row_ids)
+
+    def count(self) -> int:
+        return self.table.count()
+
+    def query(self, query_embeddings: List[List[float]], n_results: int = 10,
+              where: Optional[Dict[str, Any]] = None,
+              include: Tuple[str, ...] = ('documents', 'metadatas', 'distances')) -> Dict[str, Any]:
+        results = {'ids': [], 'documents': [], 'metadatas': [], 'distances': []}
+        queries = normalize_rows(query_embeddings)
+
+        with self._lock:
+            bitmap = self.table.bitmap(where) if where else None
+            similarities, labels = self._search(queries, n_results, bitmap)
+            rows = self.table.fetch(sorted({int(label) for label in labels.ravel() if label >= 0}))
+
+        for query_similarities, query_labels in zip(similarities, labels):
+            hits = [(int(label), float(similarity)) for label, similarity in zip(query_labels, query_similarities)
+                    if label >= 0 and int(label) in rows]
+            results['ids'].append([rows[label][0] for label, _ in hits])
+            results['documents'].append([rows[label][1] for label, _ in hits])
+            results['metadatas'].append([rows[label][2] for label, _ in hits])
+            # Cosine distance, as reported by Chroma
+            results['distances'].append([1 - similarity for _, similarity in hits])
+        return results
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None,
+            include: Tuple[str, ...] = ('documents', 'metadatas'), limit: Optional[int] = None,
+            offset: Optional[int] = None) -> Dict[str, Any]:
+        with self._lock:
+            rows = self.table.page(ids, where, limit, offset)
+            embeddings = None
+            if 'embeddings' in include:
+                # A float32 array, as Chroma returns, to avoid a round trip through Python lists
+                embeddings = self._reconstruct([row_id for row_id, _, _, _ in rows])
+        return {
+            'ids': [doc_id for _, doc_id, _, _ in rows],
+            'documents': [document for _, _, document, _ in rows] if 'documents' in include else None,
+            'metadatas': [metadata for _, _, _, metadata in rows] if 'metadatas' in include else None,
+            'embeddings': embeddings
+        }
@@ -0,0 +1,235 @@
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import os
+import threading
+
+import numpy as np
+
+# Multilingual (incl. Malayalam) 384-dimensional sentence embeddings, small enough for CPU serving
+DEFAULT_LOCAL_MODEL = 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2'
+
+class LocalEmbedder:
+    """In-process multilingual embedding backend for EmbeddingsManager.
+
+    Runs a sentence-transformers model on CPU, or the same model exported to
+    ONNX (a directory with ``model.onnx`` and ``tokenizer.json``) through
+    onnxruntime, optionally with dynamic int8 quantization. The model is
+    loaded on first use. ``num_threads`` bounds the intra-op threads used for
+    inference.
+
+    Concurrent async callers are micro-batched: requests arriving while the
+    model is busy, or within ``max_wait_ms`` of each other, are embedded in one
+    forward pass of up to ``max_batch_size`` texts. The model is symmetric, so
+    the task type is ignored. Output rows are L2-normalised.
+    """
+
+    is_local = True
+
+    def __init__(self, model_name_or_path: str = DEFAULT_LOCAL_MODEL, num_threads: Optional[int] = None,
+                 batch_size: int = 32, onnx_path: Optional[str] = None, quantize: bool = False,
+                 max_seq_length: int = 128, max_wait_ms: float = 2.0, max_batch_size: int = 64,
+                 cache_folder: Optional[str] = None):
+        self.model_name_or_path = model_name_or_path
+        self.num_threads = num_threads
+        self.batch_size = batch_size
+        self.onnx_path = onnx_path
+        self.quantize = quantize
+        self.max_seq_length = max_seq_length
+        self.max_wait_ms = max_wait_ms
+        self.max_batch_size = max_batch_size
+        self.cache_folder = cache_folder
+
+        # Cached embeddings are keyed by model name, so each runtime variant gets its own name
+        base_name = os.path.basename((onnx_path or model_name_or_path).rstrip('/'))
+        if onnx_path:
+            base_name += '-onnx-int8' if quantize else '-onnx'
+        self.model_name = f"local:{base_name}"
+
+        self._model = None
+        self._session = None
+        self._tokenizer = None
+        self._dim = None
+        self._load_lock = threading.Lock()
+
+        self._pending: List[Tuple[List[str], asyncio.Future]] = []
+        self._pending_loop = None
+        self._flush_handle = None
+        self._batch_running = False
+
+        self.forward_passes = 0
+        self.texts_embedded = 0
+        self.async_requests = 0
+        self.max_batch_seen = 0
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None or self._session is not None
+
+    def load(self):
+        """Load the model (once, thread-safe); called automatically on first use."""
+        if self.is_loaded:
+            return
+        with self._load_lock:
+            if self.is_loaded:
+                return
+            if self.onnx_path:
+                self._load_onnx()
+            else:
+                self._load_sentence_transformer()
+
+    def _load_sentence_transformer(self):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if self.num_threads:
+            # torch's intra-op pool is process-wide
+            torch.set_num_threads(self.num_threads)
+        model = SentenceTransformer(self.model_name_or_path, device='cpu', cache_folder=self.cache_folder)
+        model.max_seq_length = self.max_seq_length
+        self._dim = model.get_sentence_embedding_dimension()
+        self._model = model
+
+    def _load_onnx(self):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_path = os.path.join(self.onnx_path, 'model.onnx')
+        if self.quantize:
+            quantized_path = os.path.join(self.onnx_path, 'model.int8.onnx')
+            if not os.path.exists(quantized_path):
+                from onnxruntime.quantization import quantize_dynamic, QuantType
+                quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+            model_path = quantized_path
+
+        options = ort.SessionOptions()
+        if self.num_threads:
+            options.intra_op_num_threads = self.num_threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+
+        tokenizer = Tokenizer.from_file(os.path.join(self.onnx_path, 'tokenizer.json'))
+        tokenizer.enable_truncation(max_length=self.max_seq_length)
+        tokenizer.enable_padding()
+        self._tokenizer = tokenizer
+        self._input_names = {model_input.name for model_input in session.get_inputs()}
+        self._dim = session.get_outputs()[0].shape[-1]
+        self._session = session
+
+    @property
+    def dim(self) -> int:
+        if self._dim is None:
+            self.load()
+        return self._dim
+
+    def _encode_onnx(self, texts: List[str]) -> np.ndarray:
+        encodings = self._tokenizer.encode_batch(texts)
+        input_ids = np.asarray([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.asarray([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feed = {'input_ids': input_ids, 'attention_mask': attention_mask}
+        if 'token_type_ids' in self._input_names:
+            feed['token_type_ids'] = np.zeros_like(input_ids)
+
+        token_embeddings = self._session.run(None, feed)[0]
+        # Mean pooling over real tokens, as the sentence-transformers pooling layer does
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        return pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into an (n, dim) float32 matrix."""
+        self.load()
+        if not texts:
+            return np.zeros((0, self._dim), dtype=np.float32)
+        self.forward_passes += 1
+        self.texts_embedded += len(texts)
+        self.max_batch_seen = max(self.max_batch_seen, len(texts))
+        if self._session is not None:
+            matrices = [self._encode_onnx(texts[start:start + self.batch_size])
+                        for start in range(0, len(texts), self.batch_size)]
+            return np.vstack(matrices).astype(np.float32)
+        return self._model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True,
+                                  normalize_embeddings=True, show_progress_bar=False).astype(np.float32)
+
+    def __call__(self, texts: List[str], task_type: str = "retrieval_document") -> List[List[float]]:
+        """Embedding backend interface used by EmbeddingsManager."""
+        return self.embed_batch(texts).tolist()
+
+    async def embed_async(self, texts: List[str], task_type: str = "retrieval_document") -> List[List[float]]:
+        """Embed from the event loop, sharing forward passes with concurrent callers."""
+        if self.max_wait_ms <= 0 or len(texts) >= self.max_batch_size:
+            return await asyncio.to_thread(self, texts, task_type)
+
+        loop = asyncio.get_running_loop()
+        if self._pending_loop is not loop:
+            self._pending, self._pending_loop, self._flush_handle, self._batch_running = [], loop, None, False
+        self.async_requests += 1
+        future = loop.create_future()
+        self._pending.append((texts, future))
+
+        if sum(len(pending_texts) for pending_texts, _ in self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None and not self._batch_running:
+            self._flush_handle = loop.call_later(self.max_wait_ms / 1000, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        # While a batch runs, new requests keep queueing and go out together when it finishes
+        if self._batch_running or not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        self._batch_running = True
+        asyncio.ensure_future(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Tuple[List[str], asyncio.Future]]):
+        texts = [text for pending_texts, _ in batch for text in pending_texts]
+        try:
+            vectors = await asyncio.to_thread(self, texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            start = 0
+            for pending_texts, future in batch:
+                if not future.done():
+                    future.set_result(vectors[start:start + len(pending_texts)])
+                start += len(pending_texts)
+        finally:
+            self._batch_running = False
+            if self._pending:
+                self._flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'model': self.model_name,
+            'loaded': self.is_loaded,
+            'num_threads': self.num_threads,
+            'forward_passes': self.forward_passes,
+            'texts_embedded': self.texts_embedded,
+            'async_requests': self.async_requests,
+            'max_batch_seen': self.max_batch_seen,
+            'avg_batch_size': self.texts_embedded / max(self.forward_passes, 1)
+        }
+
+def local_embedder_from_env() -> Optional[LocalEmbedder]:
+    """LocalEmbedder configured by the environment when EMBEDDING_BACKEND=local, else None.
+
+    LOCAL_EMBEDDING_MODEL picks the model, LOCAL_EMBEDDING_ONNX an exported
+    ONNX directory, LOCAL_EMBEDDING_INT8=true quantizes it, EMBEDDING_THREADS
+    sets the inference thread count and EMBEDDING_BATCH_WAIT_MS the
+    micro-batching window.
+    """
+    if os.getenv("EMBEDDING_BACKEND", "gemini").lower() != "local":
+        return None
+    threads = os.getenv("EMBEDDING_THREADS")
+    return LocalEmbedder(
+        os.getenv("LOCAL_EMBEDDING_MODEL", DEFAULT_LOCAL_MODEL),
+        num_threads=int(threads) if threads else None,
+        onnx_path=os.getenv("LOCAL_EMBEDDING_ONNX") or None,
+        quantize=os.getenv("LOCAL_EMBEDDING_INT8", "").lower() == "true",
+        max_wait_ms=float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "2"))
+    )
@@ -0,0 +1,175 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+# Stay well below SQLite's bound-parameter limit
+SQL_BATCH = 500
+
+def _regexp(pattern: str, value: Any) -> bool:
+    return value is not None and re.search(pattern, str(value)) is not None
+
+class ChunkMetadataTable:
+    """Compact SQLite side table for chunk ids, contents and metadata.
+
+    Each chunk gets a stable integer row id, which in-process vector indexes use
+    as their vector id. Chroma-style ``where`` filters are translated to SQL and
+    resolved into id bitmaps so they can be pushed down into the index search.
+    """
+
+    def __init__(self, db_path: str):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.create_function("REGEXP", 2, _regexp)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS chunks (
+                   rowid INTEGER PRIMARY KEY,
+                   id TEXT UNIQUE NOT NULL,
+                   document TEXT,
+                   metadata TEXT
+               )"""
+        )
+        self._conn.commit()
+
+        # where-clause key -> packed little-endian id bitmap
+        self._bitmaps: Dict[str, np.ndarray] = {}
+
+    def _where_sql(self, where: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        """Translate a Chroma ``where`` clause into a SQL condition over the metadata JSON."""
+        clauses, params = [], []
+        for key, value in where.items():
+            if key in ('$and', '$or'):
+                parts = [self._where_sql(sub) for sub in value]
+                joiner = ' AND ' if key == '$and' else ' OR '
+                clauses.append('(' + joiner.join(sql for sql, _ in parts) + ')')
+                for _, sub_params in parts:
+                    params.extend(sub_params)
+                continue
+
+            column = f"json_extract(metadata, '$.\"{key}\"')"
+            conditions = value if isinstance(value, dict) else {'$eq': value}
+            for operator, operand in conditions.items():
+                if operator in ('$in', '$nin'):
+                    placeholders = ','.join('?' * len(operand)) or 'NULL'
+                    negate = 'NOT ' if operator == '$nin' else ''
+                    clauses.append(f"{column} {negate}IN ({placeholders})")
+                    params.extend(operand)
+                elif operator == '$regex':
+                    clauses.append(f"{column} REGEXP ?")
+                    params.append(operand)
+                else:
+                    sql_operator = {'$eq': '=', '$ne': '!=', '$gt': '>', '$gte': '>=',
+                                    '$lt': '<', '$lte': '<='}[operator]
+                    clauses.append(f"{column} {sql_operator} ?")
+                    params.append(operand)
+        return ' AND '.join(clauses) or '1', params
+
+    def upsert(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]]) -> List[int]:
+        """Insert or overwrite rows, keeping existing row ids stable; returns the row ids."""
+        with self._lock:
+            self._conn.executemany(
+                """INSERT INTO chunks (id, document, metadata) VALUES (?, ?, ?)
+                   ON CONFLICT(id) DO UPDATE SET document = excluded.document, metadata = excluded.metadata""",
+                [(doc_id, document, json.dumps(metadata or {}, ensure_ascii=False, separators=(',', ':')))
+                 for doc_id, document, metadata in zip(ids, documents, metadatas)]
+            )
+            self._conn.commit()
+            self._bitmaps.clear()
+            row_ids = self.row_ids_for(ids)
+            return [row_ids[doc_id] for doc_id in ids]
+
+    def row_ids_for(self, ids: List[str]) -> Dict[str, int]:
+        """Map the given chunk ids to their row ids; unknown ids are left out."""
+        found = {}
+        with self._lock:
+            unique_ids = list(dict.fromkeys(ids))
+            for i in range(0, len(unique_ids), SQL_BATCH):
+                chunk = unique_ids[i:i + SQL_BATCH]
+                placeholders = ','.join('?' * len(chunk))
+                found.update(self._conn.execute(
+                    f"SELECT id, rowid FROM chunks WHERE id IN ({placeholders})", chunk
+                ).fetchall())
+        return found
+
+    def select_row_ids(self, ids: Optional[List[str]] = None,
+                       where: Optional[Dict[str, Any]] = None) -> List[int]:
+        with self._lock:
+            if ids is not None:
+                row_ids = list(self.row_ids_for(ids).values())
+                if not where:
+                    return row_ids
+                allowed = set(self.select_row_ids(where=where))
+                return [row_id for row_id in row_ids if row_id in allowed]
+            sql, params = self._where_sql(where or {})
+            return [row[0] for row in self._conn.execute(f"SELECT rowid FROM chunks WHERE {sql}", params)]
+
+    def delete(self, row_ids: List[int]):
+        with self._lock:
+            for i in range(0, len(row_ids), SQL_BATCH):
+                chunk = row_ids[i:i + SQL_BATCH]
+                placeholders = ','.join('?' * len(chunk))
+                self._conn.execute(f"DELETE FROM chunks WHERE rowid IN ({placeholders})", chunk)
+            self._conn.commit()
+            self._bitmaps.clear()
+
+    def fetch(self, row_ids: List[int]) -> Dict[int, Tuple[str, str, Dict[str, Any]]]:
+        """Row id -> (id, document, metadata) for the given row ids."""
+        rows = {}
+        with self._lock:
+            for i in range(0, len(row_ids), SQL_BATCH):
+                chunk = row_ids[i:i + SQL_BATCH]
+                placeholders = ','.join('?' * len(chunk))
+                for row_id, doc_id, document, metadata in self._conn.execute(
+                    f"SELECT rowid, id, document, metadata FROM chunks WHERE rowid IN ({placeholders})", chunk
+                ):
+                    rows[row_id] = (doc_id, document, json.loads(metadata))
+        return rows
+
+    def page(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None,
+             limit: Optional[int] = None, offset: Optional[int] = None) -> List[Tuple[int, str, str, Dict[str, Any]]]:
+        """(row id, id, document, metadata) rows in row-id order, for Chroma-style ``get``."""
+        row_ids = sorted(self.select_row_ids(ids, where))
+        row_ids = row_ids[offset or 0:]
+        if limit:
+            row_ids = row_ids[:limit]
+        rows = self.fetch(row_ids)
+        return [(row_id,) + rows[row_id] for row_id in row_ids if row_id in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def all_row_ids(self) -> np.ndarray:
+        with self._lock:
+            return np.fromiter((row[0] for row in self._conn.execute("SELECT rowid FROM chunks")), dtype=np.int64)
+
+    def bitmap(self, where: Dict[str, Any]) -> np.ndarray:
+        """Packed little-endian bitmap with bit ``rowid`` set for rows matching ``where``.
+
+        Bitmaps are cached per filter until the table changes, so repeated
+        language or category filters cost one lookup.
+        """
+        key = json.dumps(where, sort_keys=True, ensure_ascii=False)
+        with self._lock:
+            bitmap = self._bitmaps.get(key)
+            if bitmap is None:
+                row_ids = np.asarray(self.select_row_ids(where=where), dtype=np.int64)
+                bits = np.zeros(int(row_ids.max()) + 1 if len(row_ids) else 1, dtype=bool)
+                bits[row_ids] = True
+                bitmap = np.packbits(bits, bitorder='little')
+                self._bitmaps[key] = bitmap
+            return bitmap
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
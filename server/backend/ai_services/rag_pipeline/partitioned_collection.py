@@ -0,0 +1,172 @@
+import re
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+# Metadata fields that choose a chunk's partition
+PARTITION_FIELDS = ('language', 'category')
+
+def partition_slug(value: Any) -> str:
+    """Collection-name-safe form of a partition value."""
+    return re.sub(r'[^a-z0-9_-]+', '-', str(value).lower()).strip('-') or 'none'
+
+class PartitionedCollection:
+    """Collection API over one sub-collection per (language, category) pair.
+
+    Writes are routed by chunk metadata. A query whose ``where`` pins the
+    language and category is served by a single, much smaller sub-collection;
+    other queries fan out to the matching partitions and merge by distance.
+    Chunk ids include the knowledge base path, so a chunk never changes
+    partition under the same id.
+    """
+
+    def __init__(self, open_collection: Callable[[str], Any], existing_names: List[str],
+                 name: str = "krishi_knowledge"):
+        self.name = name
+        self._open_collection = open_collection
+        self.partitions: Dict[Tuple[str, str], Any] = {}
+
+        prefix = f"{name}__"
+        for existing in existing_names:
+            parts = existing[len(prefix):].split('__') if existing.startswith(prefix) else []
+            if len(parts) == 2:
+                self.partitions[tuple(parts)] = open_collection(existing)
+
+    def _partition(self, metadata: Dict[str, Any]):
+        key = (partition_slug(metadata.get('language', 'en')), partition_slug(metadata.get('category', 'general')))
+        if key not in self.partitions:
+            self.partitions[key] = self._open_collection(f"{self.name}__{key[0]}__{key[1]}")
+        return self.partitions[key]
+
+    @staticmethod
+    def _pinned_values(where: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Partition fields fixed to a single value by equality conditions in ``where``."""
+        pinned = {}
+        for clause in (where or {}).get('$and', [where or {}]):
+            for field in PARTITION_FIELDS:
+                value = clause.get(field)
+                if isinstance(value, dict):
+                    value = value.get('$eq')
+                if value is not None and not isinstance(value, dict):
+                    pinned[field] = partition_slug(value)
+        return pinned
+
+    def _targets(self, where: Optional[Dict[str, Any]]) -> List[Any]:
+        pinned = self._pinned_values(where)
+        return [collection for key, collection in sorted(self.partitions.items())
+                if all(pinned.get(field, slug) == slug for field, slug in zip(PARTITION_FIELDS, key))]
+
+    def _route(self, ids: List[str], metadatas: Optional[List[Dict[str, Any]]]) -> Dict[int, Tuple[Any, List[int]]]:
+        """Group positions of a write batch by target partition."""
+        groups: Dict[int, Tuple[Any, List[int]]] = {}
+        for i in range(len(ids)):
+            collection = self._partition(metadatas[i] if metadatas else {})
+            groups.setdefault(id(collection), (collection, []))[1].append(i)
+        return groups
+
+    def upsert(self, ids: List[str], embeddings: List[List[float]], documents: Optional[List[str]] = None,
+               metadatas: Optional[List[Dict[str, Any]]] = None):
+        for collection, positions in self._route(ids, metadatas).values():
+            collection.upsert(
+                ids=[ids[i] for i in positions],
+                embeddings=[embeddings[i] for i in positions],
+                documents=[documents[i] for i in positions] if documents else None,
+                metadatas=[metadatas[i] for i in positions] if metadatas else None
+            )
+
+    def add(self, ids: List[str], embeddings: List[List[float]], documents: Optional[List[str]] = None,
+            metadatas: Optional[List[Dict[str, Any]]] = None):
+        for collection, positions in self._route(ids, metadatas).values():
+            collection.add(
+                ids=[ids[i] for i in positions],
+                embeddings=[embeddings[i] for i in positions],
+                documents=[documents[i] for i in positions] if documents else None,
+                metadatas=[metadatas[i] for i in positions] if metadatas else None
+            )
+
+    def update(self, ids: List[str], embeddings: Optional[List[List[float]]] = None,
+               documents: Optional[List[str]] = None, metadatas: Optional[List[Dict[str, Any]]] = None):
+        position = {doc_id: i for i, doc_id in enumerate(ids)}
+        for collection in self.partitions.values():
+            found = collection.get(ids=ids, include=[])['ids']
+            if not found:
+                continue
+            positions = [position[doc_id] for doc_id in found]
+            collection.update(
+                ids=found,
+                embeddings=[embeddings[i] for i in positions] if embeddings else None,
+                documents=[documents[i] for i in positions] if documents else None,
+                metadatas=[metadatas[i] for i in positions] if metadatas else None
+            )
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None):
+        arguments = {key: value for key, value in (('ids', ids), ('where', where)) if value is not None}
+        for collection in self._targets(where):
+            collection.delete(**arguments)
+
+    def count(self) -> int:
+        return sum(collection.count() for collection in self.partitions.values())
+
+    def query(self, query_embeddings: List[List[float]], n_results: int = 10,
+              where: Optional[Dict[str, Any]] = None,
+              include: Tuple[str, ...] = ('documents', 'metadatas', 'distances')) -> Dict[str, Any]:
+        include = list(include)
+        if 'distances' not in include:
+            include.append('distances')
+        merged = [[] for _ in query_embeddings]
+        for collection in self._targets(where):
+            if collection.count() == 0:
+                continue
+            results = collection.query(query_embeddings=query_embeddings, n_results=n_results,
+                                       where=where, include=include)
+            for i in range(len(query_embeddings)):
+                merged[i].extend(zip(results['distances'][i], results['ids'][i],
+                                     results['documents'][i] if results.get('documents') else [None] * len(results['ids'][i]),
+                                     results['metadatas'][i] if results.get('metadatas') else [None] * len(results['ids'][i])))
+
+        output = {'ids': [], 'documents': [], 'metadatas': [], 'distances': []}
+        for hits in merged:
+            hits = sorted(hits, key=lambda hit: hit[0])[:n_results]
+            output['distances'].append([hit[0] for hit in hits])
+            output['ids'].append([hit[1] for hit in hits])
+            output['documents'].append([hit[2] for hit in hits])
+            output['metadatas'].append([hit[3] for hit in hits])
+        return output
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None,
+            include: Tuple[str, ...] = ('documents', 'metadatas'), limit: Optional[int] = None,
+            offset: Optional[int] = None) -> Dict[str, Any]:
+        output = {'ids': [], 'documents': [], 'metadatas': [], 'embeddings': []}
+        include = list(include)
+        skip = offset or 0
+        for collection in self._targets(where):
+            remaining = None if limit is None else limit - len(output['ids'])
+            if remaining == 0:
+                break
+            if ids is None and where is None:
+                # Whole partitions before the offset can be skipped by their size alone
+                size = collection.count()
+                if skip >= size:
+                    skip -= size
+                    continue
+                page = collection.get(include=include, limit=remaining, offset=skip)
+                skip = 0
+            else:
+                page = collection.get(ids=ids, where=where, include=include)
+                taken = len(page['ids'])
+                start, end = min(skip, taken), taken if remaining is None else min(taken, skip + remaining)
+                skip = max(0, skip - taken)
+                page = {key: value[start:end] if value is not None else None for key, value in page.items()
+                        if key in output}
+            for key in output:
+                if page.get(key) is not None:
+                    output[key].extend(page[key])
+        return {key: (value if key == 'ids' or key in include else None) for key, value in output.items()}
+
+    def persist(self):
+        for collection in self.partitions.values():
+            persist = getattr(collection, 'persist', None)
+            if persist:
+                persist()
+
+    def get_partition_stats(self) -> Dict[str, int]:
+        return {f"{language}/{category}": collection.count()
+                for (language, category), collection in sorted(self.partitions.items())}
@@ -0,0 +1,151 @@
+from typing import Dict
+
+import numpy as np
+
+# Rows scored per step; bounds the temporary float copies made while scanning codes
+SCAN_BLOCK = 16384
+
+class ScalarQuantizer:
+    """Per-dimension int8 quantizer: 1 byte per dimension, 4x smaller than float32.
+
+    Scores are asymmetric: the float query is dotted with the dequantized
+    codes, folded into one weight vector so a scan is a single matmul per block.
+    """
+
+    kind = 'int8'
+
+    def __init__(self):
+        self.low = None
+        self.scale = None
+
+    @property
+    def is_trained(self) -> bool:
+        return self.low is not None
+
+    def code_size(self, dim: int) -> int:
+        return dim
+
+    def train(self, vectors: np.ndarray):
+        # Clip the range to robust percentiles so a few outliers do not waste resolution
+        self.low = np.percentile(vectors, 0.1, axis=0).astype(np.float32)
+        high = np.percentile(vectors, 99.9, axis=0).astype(np.float32)
+        self.scale = np.maximum(high - self.low, 1e-6) / 255.0
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        codes = np.rint((vectors - self.low) / self.scale)
+        return np.clip(codes, 0, 255).astype(np.uint8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        return self.low + codes.astype(np.float32) * self.scale
+
+    def scores(self, queries: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Approximate inner products, shape (len(codes), len(queries))."""
+        weights = (queries * self.scale).T
+        offsets = queries @ self.low
+        out = np.empty((len(codes), len(queries)), dtype=np.float32)
+        for start in range(0, len(codes), SCAN_BLOCK):
+            block = codes[start:start + SCAN_BLOCK].astype(np.float32)
+            out[start:start + len(block)] = block @ weights + offsets
+        return out
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {'low': self.low, 'scale': self.scale}
+
+    def load_state(self, state: Dict[str, np.ndarray]):
+        self.low, self.scale = state['low'], state['scale']
+
+class ProductQuantizer:
+    """Product quantizer with 256 centroids per sub-vector: 1 byte per ``subvector_dim`` dimensions.
+
+    With the default of 8 dimensions per sub-vector a 768-dim embedding takes 96
+    bytes, 32x smaller than float32. Queries are scored by asymmetric distance
+    computation: one lookup table of sub-vector/centroid inner products per
+    query, then a gather-and-sum over the codes.
+    """
+
+    kind = 'pq'
+
+    def __init__(self, subvector_dim: int = 8, train_iterations: int = 20, max_train_size: int = 50000,
+                 seed: int = 0):
+        self.subvector_dim = subvector_dim
+        self.train_iterations = train_iterations
+        self.max_train_size = max_train_size
+        self.seed = seed
+        self.centroids = None  # (subquantizers, 256, subvector_dim)
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def code_size(self, dim: int) -> int:
+        return dim // self.subvector_dim
+
+    def _split(self, vectors: np.ndarray) -> np.ndarray:
+        """(n, dim) -> (subquantizers, n, subvector_dim)."""
+        n, dim = vectors.shape
+        if dim % self.subvector_dim:
+            raise ValueError(f"Dimension {dim} is not divisible by the sub-vector size {self.subvector_dim}")
+        return vectors.reshape(n, dim // self.subvector_dim, self.subvector_dim).transpose(1, 0, 2)
+
+    @staticmethod
+    def _assign(points: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        # argmin ||p - c||^2 == argmax (p.c - ||c||^2 / 2)
+        return np.argmax(points @ centroids.T - 0.5 * (centroids ** 2).sum(axis=1), axis=1)
+
+    def train(self, vectors: np.ndarray):
+        rng = np.random.default_rng(self.seed)
+        if len(vectors) > self.max_train_size:
+            vectors = vectors[rng.choice(len(vectors), self.max_train_size, replace=False)]
+        clusters = min(256, len(vectors))
+
+        centroids = []
+        for points in self._split(vectors):
+            # Plain Lloyd's k-means per sub-space
+            centers = points[rng.choice(len(points), clusters, replace=False)].copy()
+            for _ in range(self.train_iterations):
+                assignment = self._assign(points, centers)
+                counts = np.bincount(assignment, minlength=clusters)
+                sums = np.zeros_like(centers)
+                np.add.at(sums, assignment, points)
+                filled = counts > 0
+                centers[filled] = sums[filled] / counts[filled, None]
+                # Re-seed empty clusters from random points
+                if not filled.all():
+                    centers[~filled] = points[rng.choice(len(points), int((~filled).sum()))]
+            if clusters < 256:
+                centers = np.vstack([centers, np.repeat(centers[:1], 256 - clusters, axis=0)])
+            centroids.append(centers)
+        self.centroids = np.stack(centroids).astype(np.float32)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.stack([self._assign(points, centers)
+                         for points, centers in zip(self._split(vectors), self.centroids)], axis=1).astype(np.uint8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        parts = [self.centroids[j][codes[:, j]] for j in range(codes.shape[1])]
+        return np.concatenate(parts, axis=1)
+
+    def scores(self, queries: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        """Approximate inner products, shape (len(codes), len(queries))."""
+        subquantizers = self.centroids.shape[0]
+        # (queries, subquantizers, 256) lookup tables
+        tables = np.einsum('jkd,qjd->qjk', self.centroids, self._split(queries).transpose(1, 0, 2))
+        flat_tables = tables.reshape(len(queries), -1)
+        # Code c of sub-quantizer j lives at j * 256 + c in the flattened table
+        table_offsets = (np.arange(subquantizers) * 256).astype(np.int64)
+
+        out = np.empty((len(codes), len(queries)), dtype=np.float32)
+        for start in range(0, len(codes), SCAN_BLOCK):
+            positions = codes[start:start + SCAN_BLOCK].astype(np.int64) + table_offsets
+            for q in range(len(queries)):
+                out[start:start + len(positions), q] = flat_tables[q][positions].sum(axis=1)
+        return out
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {'centroids': self.centroids}
+
+    def load_state(self, state: Dict[str, np.ndarray]):
+        self.centroids = state['centroids']
+        self.subvector_dim = self.centroids.shape[2]
+
+QUANTIZERS = {'int8': ScalarQuantizer, 'pq': ProductQuantizer}
@@ -0,0 +1,242 @@
+import os
+import shutil
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from .local_collection import LocalCollection
+from .quantization import QUANTIZERS
+
+class QuantizedCollection(LocalCollection):
+    """Collection whose in-memory index holds compressed vector codes.
+
+    Only the int8 or product-quantized codes are resident in RAM. Full float32
+    vectors are kept in a memory-mapped file next to them (writes not yet
+    persisted hold them in RAM until ``persist()``) and are read only to
+    re-rank the top ``n_results * rerank_factor`` candidates (set it to 0 to
+    skip re-ranking) and to retrain the quantizer. The quantizer is trained on
+    ``persist()``, and retrained once the collection has grown by
+    ``retrain_growth``; until it is trained, searches score the float vectors
+    exactly.
+
+    Each ``persist()`` writes row ids, vectors, codes and quantizer into a new
+    generation directory and then switches a pointer file to it with a single
+    rename, so a crash mid-persist leaves the previous generation intact.
+    """
+
+    def __init__(self, persist_directory: str, name: str = "krishi_knowledge", quantization: str = "pq",
+                 rerank_factor: int = 4, retrain_growth: float = 2.0):
+        super().__init__(persist_directory, name)
+        if quantization not in QUANTIZERS:
+            raise ValueError(f"Unknown quantization: {quantization}")
+        self.quantizer = QUANTIZERS[quantization]()
+        self.rerank_factor = rerank_factor
+        self.retrain_growth = retrain_growth
+
+        self.base_path = os.path.join(persist_directory, f"{name}.{quantization}")
+        self.current_path = f"{self.base_path}.current"
+        self.generation = 0
+
+        self.row_ids = np.empty(0, dtype=np.int64)
+        self.vectors: Optional[np.ndarray] = None  # memory-mapped, except for writes not yet persisted
+        self.codes: Optional[np.ndarray] = None
+        self.trained_on = 0
+        # Appended batches, concatenated lazily so bulk loads stay linear
+        self._pending: List[Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]] = []
+        self._dirty = False
+
+        if os.path.exists(self.current_path):
+            with open(self.current_path, 'r', encoding='utf-8') as f:
+                self.generation = int(f.read().strip())
+            self._load(self._file_paths(self._generation_directory(self.generation)))
+        elif os.path.exists(f"{self.base_path}.row_ids.npy"):
+            # Files written before generations were introduced
+            self._load({part: f"{self.base_path}.{part}.{extension}" for part, extension in
+                        (('row_ids', 'npy'), ('vectors', 'npy'), ('codes', 'npy'), ('quantizer', 'npz'))})
+
+    def _generation_directory(self, generation: int) -> str:
+        return f"{self.base_path}.{generation}"
+
+    @staticmethod
+    def _file_paths(directory: str) -> Dict[str, str]:
+        return {
+            'row_ids': os.path.join(directory, 'row_ids.npy'),
+            'vectors': os.path.join(directory, 'vectors.npy'),
+            'codes': os.path.join(directory, 'codes.npy'),
+            'quantizer': os.path.join(directory, 'quantizer.npz')
+        }
+
+    def _load(self, paths: Dict[str, str]):
+        self.row_ids = np.load(paths['row_ids'])
+        self.vectors = np.load(paths['vectors'], mmap_mode='r')
+        if os.path.exists(paths['quantizer']) and os.path.exists(paths['codes']):
+            with np.load(paths['quantizer']) as state:
+                self.trained_on = int(state['trained_on'])
+                self.quantizer.load_state({key: state[key] for key in state.files if key != 'trained_on'})
+            self.codes = np.load(paths['codes'])
+        if len(self.vectors) != len(self.row_ids) or (self.codes is not None and len(self.codes) != len(self.row_ids)):
+            raise ValueError(f"Quantized index files under {paths['row_ids']} are inconsistent; re-ingest")
+        self._reconcile(f"quantized index {paths['row_ids']}")
+
+    def _consolidate(self):
+        if not self._pending:
+            return
+        row_ids, vectors, codes = zip(*self._pending)
+        existing_vectors = [self.vectors] if self.vectors is not None else []
+        self.row_ids = np.concatenate([self.row_ids, *row_ids])
+        self.vectors = np.concatenate(existing_vectors + list(vectors))
+        if self.quantizer.is_trained:
+            self.codes = np.concatenate(([self.codes] if self.codes is not None else []) + list(codes))
+        self._pending = []
+
+    def _prepare_write(self, dim: int):
+        # Writes never modify the mapped array in place: consolidation and removal build new arrays
+        current_dim = self.vectors.shape[1] if self.vectors is not None else (
+            self._pending[0][1].shape[1] if self._pending else dim)
+        if current_dim != dim:
+            raise ValueError(f"Embedding dimension {dim} does not match index dimension {current_dim}")
+
+    def _add_vectors(self, vectors: np.ndarray, row_ids: np.ndarray):
+        codes = self.quantizer.encode(vectors) if self.quantizer.is_trained else None
+        self._pending.append((row_ids, vectors, codes))
+        self._dirty = True
+
+    def _remove_vectors(self, row_ids: List[int]):
+        if not len(row_ids):
+            return
+        self._consolidate()
+        keep = ~np.isin(self.row_ids, np.asarray(row_ids, dtype=np.int64))
+        if keep.all():
+            return
+        self.row_ids = self.row_ids[keep]
+        self.vectors = self.vectors[keep]
+        if self.codes is not None:
+            self.codes = self.codes[keep]
+        self._dirty = True
+
+    def _indexed_row_ids(self) -> np.ndarray:
+        self._consolidate()
+        return self.row_ids
+
+    def _positions(self, row_ids: List[int]) -> np.ndarray:
+        order = np.argsort(self.row_ids)
+        return order[np.searchsorted(self.row_ids[order], np.asarray(row_ids, dtype=np.int64))]
+
+    def _reconstruct(self, row_ids: List[int]) -> np.ndarray:
+        self._consolidate()
+        if not row_ids:
+            return np.empty((0, self.vectors.shape[1] if self.vectors is not None else 0), dtype=np.float32)
+        return np.asarray(self.vectors[self._positions(row_ids)])
+
+    def _candidate_positions(self, bitmap: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """Positions whose row id bit is set in the filter bitmap, or None for no filter."""
+        if bitmap is None:
+            return None
+        in_range = (self.row_ids >> 3) < len(bitmap)
+        selected = np.zeros(len(self.row_ids), dtype=bool)
+        ids = self.row_ids[in_range]
+        selected[in_range] = (bitmap[ids >> 3] >> (ids & 7)) & 1
+        return np.flatnonzero(selected)
+
+    def _search(self, queries: np.ndarray, n_results: int,
+                bitmap: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        self._consolidate()
+        positions = self._candidate_positions(bitmap)
+        total = len(self.row_ids) if positions is None else len(positions)
+        similarities = np.full((len(queries), n_results), -np.inf, dtype=np.float32)
+        labels = np.full((len(queries), n_results), -1, dtype=np.int64)
+        if total == 0:
+            return similarities, labels
+
+        exact = not self.quantizer.is_trained
+        if exact:
+            vectors = self.vectors if positions is None else self.vectors[positions]
+            scores = np.asarray(vectors @ queries.T)
+        else:
+            codes = self.codes if positions is None else self.codes[positions]
+            scores = self.quantizer.scores(queries, codes)
+
+        candidates = min(total, n_results if exact or not self.rerank_factor else n_results * self.rerank_factor)
+        for q in range(len(queries)):
+            top = np.argpartition(-scores[:, q], candidates - 1)[:candidates]
+            top_positions = top if positions is None else positions[top]
+            if exact or not self.rerank_factor:
+                top_scores = scores[top, q]
+            else:
+                # Re-rank the shortlist with the full-precision vectors
+                top_scores = np.asarray(self.vectors[top_positions]) @ queries[q]
+            order = np.argsort(-top_scores)[:n_results]
+            similarities[q, :len(order)] = top_scores[order]
+            labels[q, :len(order)] = self.row_ids[top_positions[order]]
+        return similarities, labels
+
+    def persist(self):
+        """Train or retrain the quantizer if needed and write all index files atomically."""
+        with self._lock:
+            self._consolidate()
+            if not self._dirty or self.vectors is None:
+                return
+
+            if len(self.vectors) and (not self.quantizer.is_trained
+                                      or len(self.vectors) >= self.retrain_growth * self.trained_on):
+                self.quantizer.train(np.asarray(self.vectors))
+                self.trained_on = len(self.vectors)
+                self.codes = self.quantizer.encode(np.asarray(self.vectors))
+
+            generation = self.generation + 1
+            directory = self._generation_directory(generation)
+            # Left over from a persist that crashed before switching to it
+            shutil.rmtree(directory, ignore_errors=True)
+            os.makedirs(directory)
+            paths = self._file_paths(directory)
+            arrays = {'row_ids': self.row_ids, 'vectors': self.vectors, 'codes': self.codes}
+            for part, array in arrays.items():
+                if array is not None:
+                    with open(paths[part], 'wb') as f:
+                        np.save(f, array)
+                        os.fsync(f.fileno())
+            if self.quantizer.is_trained:
+                with open(paths['quantizer'], 'wb') as f:
+                    np.savez(f, trained_on=self.trained_on, **self.quantizer.state())
+                    os.fsync(f.fileno())
+
+            # The only step that changes what a reader loads: every file above is complete before it
+            tmp_path = f"{self.current_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(str(generation))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.current_path)
+            previous = self.generation
+            self.generation = generation
+
+            # Drop the in-memory copy: from here the float vectors are read from disk again
+            self.vectors = np.load(paths['vectors'], mmap_mode='r')
+            # Open maps of older files stay valid after unlinking, so readers of the old generation are unaffected
+            if previous:
+                shutil.rmtree(self._generation_directory(previous), ignore_errors=True)
+            for part, extension in (('row_ids', 'npy'), ('vectors', 'npy'), ('codes', 'npy'), ('quantizer', 'npz')):
+                legacy_path = f"{self.base_path}.{part}.{extension}"
+                if os.path.exists(legacy_path):
+                    os.remove(legacy_path)
+            self._dirty = False
+
+    def get_memory_stats(self) -> Dict[str, Any]:
+        """Resident bytes (codes, row ids and any float vectors not memory-mapped) versus those on disk."""
+        self._consolidate()
+        count = len(self.row_ids)
+        code_bytes = self.codes.nbytes if self.codes is not None else 0
+        float_bytes = self.vectors.nbytes if self.vectors is not None else 0
+        # Unpersisted writes keep the float vectors in RAM until persist() maps them again
+        floats_resident = self.vectors is not None and not isinstance(self.vectors, np.memmap)
+        resident_bytes = code_bytes + self.row_ids.nbytes + (float_bytes if floats_resident else 0)
+        return {
+            'vectors': count,
+            'quantization': self.quantizer.kind,
+            'trained': self.quantizer.is_trained,
+            'resident_bytes': resident_bytes,
+            'bytes_per_vector': resident_bytes / count if count else 0.0,
+            'float_vectors_resident': floats_resident,
+            'float_bytes_on_disk': float_bytes,
+            'compression_ratio': float_bytes / code_bytes if code_bytes else 1.0
+        }
@@ -0,0 +1,158 @@
+import asyncio
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Callable, Awaitable
+
+from .hashing_embedder import is_fallback_embedding
+
+def normalize_query(query: str) -> str:
+    """Canonical form used as the cache key: NFC, case-folded, single-spaced."""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFC', query)).strip().casefold()
+
+class QueryEmbeddingCache:
+    """In-process LRU cache with TTL for query embeddings.
+
+    Concurrent misses for the same normalised query share one embedding call,
+    so a burst of identical questions costs a single provider round trip.
+    Fallback vectors from a provider outage are returned but never cached.
+    """
+
+    def __init__(self, max_size: int = 4096, ttl_seconds: float = 3600.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (embedding, stored_at)
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.fallbacks_skipped = 0
+
+    def get(self, query: str) -> Optional[List[float]]:
+        key = normalize_query(query)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        embedding, stored_at = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            self.expirations += 1
+            return None
+
+        self._entries.move_to_end(key)
+        return embedding
+
+    def put(self, query: str, embedding: List[float]):
+        if is_fallback_embedding(embedding):
+            # Caching it would keep serving poor results for the whole TTL after the provider recovers
+            self.fallbacks_skipped += 1
+            return
+        key = normalize_query(query)
+        self._entries[key] = (embedding, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_compute(self, query: str,
+                             compute: Callable[[str], Awaitable[List[float]]]) -> List[float]:
+        """Return the cached embedding or compute it once for all concurrent callers."""
+        embedding = self.get(query)
+        if embedding is not None:
+            self.hits += 1
+            return embedding
+
+        key = normalize_query(query)
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            embedding = await compute(key)
+            self.put(key, embedding)
+            future.set_result(embedding)
+            return embedding
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody may be waiting on the shared future; avoid "exception never retrieved"
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+
+    async def get_or_compute_many(self, queries: List[str],
+                                  compute_many: Callable[[List[str]], Awaitable[List[List[float]]]]) -> List[List[float]]:
+        """Batch form of get_or_compute: all misses are embedded with one compute_many call."""
+        keys = [normalize_query(query) for query in queries]
+        resolved: Dict[str, List[float]] = {}
+        waiting: Dict[str, asyncio.Future] = {}
+        misses: List[str] = []
+
+        for key in dict.fromkeys(keys):
+            embedding = self.get(key)
+            if embedding is not None:
+                self.hits += 1
+                resolved[key] = embedding
+            elif key in self._in_flight:
+                self.coalesced += 1
+                waiting[key] = self._in_flight[key]
+            else:
+                self.misses += 1
+                misses.append(key)
+
+        if misses:
+            loop = asyncio.get_running_loop()
+            futures = {key: loop.create_future() for key in misses}
+            self._in_flight.update(futures)
+            try:
+                embeddings = await compute_many(misses)
+                for key, embedding in zip(misses, embeddings):
+                    self.put(key, embedding)
+                    futures[key].set_result(embedding)
+                    resolved[key] = embedding
+            except asyncio.CancelledError:
+                for future in futures.values():
+                    future.cancel()
+                raise
+            except Exception as e:
+                for future in futures.values():
+                    future.set_exception(e)
+                    future.exception()
+                raise
+            finally:
+                for key in misses:
+                    del self._in_flight[key]
+
+        for key, future in waiting.items():
+            resolved[key] = await asyncio.shield(future)
+        return [resolved[key] for key in keys]
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'hit_rate': (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'fallbacks_skipped': self.fallbacks_skipped
+        }
@@ -0,0 +1,68 @@
+import asyncio
+import time
+from typing import Dict, Any
+
+class AdaptiveRateLimiter:
+    """Token-bucket rate limiter with additive-increase / multiplicative-decrease tuning.
+
+    The limiter starts at ``initial_rate`` requests per second, creeps upwards while
+    the provider keeps answering and halves its rate whenever a call is throttled.
+    """
+
+    def __init__(self, initial_rate: float = 5.0, min_rate: float = 0.5,
+                 max_rate: float = 50.0, increase_step: float = 0.5, burst: int = 1):
+        self.rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.burst = max(1, burst)
+
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._lock = None
+        self._lock_loop = None
+
+        self.throttle_count = 0
+        self.acquired_count = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._tokens = min(float(self.burst), self._tokens + elapsed * self.rate)
+
+    def _get_lock(self) -> asyncio.Lock:
+        # asyncio primitives are bound to one event loop; scripts may run several
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def acquire(self):
+        """Wait until a request slot is available."""
+        async with self._get_lock():
+            while True:
+                self._refill()
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    self.acquired_count += 1
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+    def on_success(self):
+        """Additively raise the rate after a successful call."""
+        self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_throttle(self):
+        """Halve the rate after the provider signalled throttling."""
+        self.throttle_count += 1
+        self.rate = max(self.min_rate, self.rate / 2.0)
+        self._tokens = 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'current_rate': self.rate,
+            'acquired': self.acquired_count,
+            'throttled': self.throttle_count
+        }
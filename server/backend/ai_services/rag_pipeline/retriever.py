@@ -1,79 +1,349 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 import asyncio
+import numpy as np
 from .embeddings_manager import EmbeddingsManager
 from .vector_store import VectorStore
+from .async_vector_store import AsyncVectorStore
+from .query_cache import QueryEmbeddingCache
+from .lexical_index import BM25Index
+from .diversity import mmr_select, merge_adjacent_chunks
 
 class DocumentRetriever:
-    def __init__(self, embeddings_manager: EmbeddingsManager, vector_store: VectorStore):
+    def __init__(self, embeddings_manager: EmbeddingsManager, vector_store: VectorStore,
+                 query_cache: Optional[QueryEmbeddingCache] = None,
+                 lexical_index: Optional[BM25Index] = None, hybrid: bool = True,
+                 rrf_k: int = 60, decisive_ratio: float = 2.0, mmr_lambda: Optional[float] = 0.7,
+                 duplicate_threshold: float = 0.95, merge_adjacent: bool = True,
+                 async_vector_store: Optional[AsyncVectorStore] = None):
         self.embeddings_manager = embeddings_manager
         self.vector_store = vector_store
+        # Store calls go through a bounded thread pool so searches never block the event loop
+        self.async_store = async_vector_store or AsyncVectorStore(vector_store)
+        self.query_cache = query_cache or QueryEmbeddingCache()
+        self.lexical_index = lexical_index or BM25Index()
+        self.hybrid = hybrid
+        self.rrf_k = rrf_k
+        # The top lexical hit must outscore the runner-up by this factor to skip vector search
+        self.decisive_ratio = decisive_ratio
+        # MMR trade-off between relevance and novelty; None keeps the plain ranking
+        self.mmr_lambda = mmr_lambda
+        self.duplicate_threshold = duplicate_threshold
+        self.merge_adjacent = merge_adjacent
         
+        # In-flight BM25 freshness check/rebuild on the store's thread pool
+        self._lexical_refresh: Optional[asyncio.Future] = None
+        self._lexical_refresh_loop = None
+        
+        self.lexical_fast_paths = 0
+        self.lexical_rebuilds = 0
+        self.hybrid_queries = 0
+        self.duplicates_dropped = 0
+        self.chunks_merged = 0
+        
+        if hasattr(vector_store, 'add_switch_listener'):
+            vector_store.add_switch_listener(self._prepare_lexical_index)
+    
+    def _prepare_lexical_index(self, index):
+        """Build BM25 for a new index version off the event loop, before the store switches to it."""
+        if not self.hybrid:
+            return
+        lexical_index = BM25Index(self.lexical_index.k1, self.lexical_index.b, self.lexical_index.refresh_interval)
+        lexical_index.build_from_store(index, store_version=self.vector_store.index_version(index))
+        self.lexical_index = lexical_index
+    
+    async def embed_query(self, query: str) -> List[float]:
+        """Embed a query, reusing cached embeddings for identical normalised queries."""
+        return await self.query_cache.get_or_compute(query, self.embeddings_manager.generate_embedding)
+    
+    def _refresh_lexical_index(self):
+        """Rebuild BM25 into a new index if the store changed; runs on the store's thread pool.
+
+        Queries keep using the current index until the new one replaces it.
+        """
+        current = self.lexical_index
+        if not current.is_stale(self.vector_store):
+            return
+        lexical_index = BM25Index(current.k1, current.b, current.refresh_interval)
+        lexical_index.build_from_store(self.vector_store)
+        self.lexical_index = lexical_index
+        self.lexical_rebuilds += 1
+    
+    def _schedule_lexical_refresh(self) -> Optional[asyncio.Future]:
+        """The running or newly started freshness check, or None when none is due."""
+        loop = asyncio.get_running_loop()
+        if self._lexical_refresh_loop is not loop:
+            self._lexical_refresh, self._lexical_refresh_loop = None, loop
+        if self._lexical_refresh is not None and not self._lexical_refresh.done():
+            return self._lexical_refresh
+        if not self.lexical_index.refresh_due():
+            return None
+        self._lexical_refresh = asyncio.ensure_future(self.async_store.run(self._refresh_lexical_index))
+        self._lexical_refresh.add_done_callback(self._log_lexical_refresh_error)
+        return self._lexical_refresh
+    
+    @staticmethod
+    def _log_lexical_refresh_error(future: asyncio.Future):
+        if not future.cancelled() and future.exception():
+            print(f"Error rebuilding lexical index: {str(future.exception())}")
+    
+    async def _lexical_search(self, query: str, language: str, n_results: int) -> List[Dict[str, Any]]:
+        try:
+            refresh = self._schedule_lexical_refresh()
+            if refresh is not None and not self.lexical_index.is_built:
+                # Nothing to serve before the first build; later rebuilds never block queries
+                await asyncio.shield(refresh)
+            return self.lexical_index.search(query, n_results=n_results, language_filter=language)
+        except Exception as e:
+            print(f"Error in lexical search: {str(e)}")
+            return []
+    
+    def _is_decisive(self, query: str, lexical_results: List[Dict[str, Any]]) -> bool:
+        """A lexical result is decisive when the index knows every query word, the top
+        hit matches all of them and it clearly leads the runner-up."""
+        if not lexical_results or not self.lexical_index.covers_query(query):
+            return False
+        top = lexical_results[0]
+        if top['matched_terms'] < len(self.lexical_index.query_terms(query)):
+            return False
+        return len(lexical_results) == 1 or top['score'] >= self.decisive_ratio * lexical_results[1]['score']
+    
+    def _fuse_results(self, vector_docs: List[Dict[str, Any]], lexical_results: List[Dict[str, Any]],
+                      top_k: int, lexical_similarities: Optional[Dict[str, float]] = None,
+                      similarity_threshold: float = 0.0) -> List[Dict[str, Any]]:
+        """Merge vector and BM25 rankings with reciprocal-rank fusion.
+
+        ``similarity`` stays a cosine similarity: lexical-only hits take theirs
+        from ``lexical_similarities`` and must clear the threshold like vector
+        hits. Without similarities (the lexical fast path, where the query is
+        never embedded) they carry no ``similarity``. Every BM25 hit records its
+        score relative to the best match as ``lexical_score``.
+        """
+        fused: Dict[str, Dict[str, Any]] = {}
+        for rank, doc in enumerate(vector_docs, 1):
+            doc = dict(doc, rrf_score=1.0 / (self.rrf_k + rank), retrieval='vector')
+            fused[doc['id']] = doc
+        
+        top_score = lexical_results[0]['score'] if lexical_results else 1.0
+        for rank, result in enumerate(lexical_results, 1):
+            lexical_score = result['score'] / top_score
+            doc = fused.get(result['id'])
+            if doc:
+                doc['rrf_score'] += 1.0 / (self.rrf_k + rank)
+                doc['retrieval'] = 'hybrid'
+                doc['lexical_score'] = lexical_score
+                continue
+            
+            doc = {
+                'id': result['id'],
+                'content': result['content'],
+                'metadata': result['metadata'],
+                'lexical_score': lexical_score,
+                'rrf_score': 1.0 / (self.rrf_k + rank),
+                'retrieval': 'lexical'
+            }
+            if lexical_similarities is not None:
+                similarity = lexical_similarities.get(result['id'])
+                if similarity is None or similarity < similarity_threshold:
+                    continue
+                doc['similarity'] = similarity
+            fused[result['id']] = doc
+        
+        ranked = sorted(fused.values(), key=lambda x: x['rrf_score'], reverse=True)[:top_k]
+        for rank, doc in enumerate(ranked, 1):
+            doc['rank'] = rank
+        return ranked
+    
+    async def _lexical_similarities(self, query_embedding: List[float], vector_docs: List[Dict[str, Any]],
+                                    lexical_results: List[Dict[str, Any]]) -> Dict[str, float]:
+        """Cosine similarity to the query of the BM25 hits vector search did not return, from stored embeddings."""
+        vector_ids = {doc['id'] for doc in vector_docs}
+        ids = [result['id'] for result in lexical_results if result['id'] not in vector_ids]
+        if not ids:
+            return {}
+        embeddings = await self.async_store.get_embeddings(ids)
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query_norm = max(float(np.linalg.norm(query)), 1e-12)
+        return {
+            doc_id: float(np.dot(embedding, query)) / (max(float(np.linalg.norm(embedding)), 1e-12) * query_norm)
+            for doc_id, embedding in embeddings.items()
+        }
+        
+    def _filter_by_similarity(self, search_results: Dict[str, Any],
+                              similarity_threshold: float) -> List[Dict[str, Any]]:
+        """Turn one query's vector search results into documents above the similarity threshold."""
+        relevant_docs = []
+        for i, (doc_id, doc, metadata, distance) in enumerate(zip(
+            search_results['ids'],
+            search_results['documents'],
+            search_results['metadatas'],
+            search_results['distances']
+        )):
+            # Convert distance to similarity (ChromaDB uses cosine distance)
+            similarity = 1 - distance
+            
+            if similarity >= similarity_threshold:
+                relevant_docs.append({
+                    'id': doc_id,
+                    'content': doc,
+                    'metadata': metadata,
+                    'similarity': similarity,
+                    'rank': i + 1
+                })
+        
+        # Sort by similarity
+        relevant_docs.sort(key=lambda x: x['similarity'], reverse=True)
+        return relevant_docs
+    
+    async def _combine_results(self, relevant_docs: List[Dict[str, Any]], lexical_results: List[Dict[str, Any]],
+                               top_k: int, query_embedding: List[float],
+                               similarity_threshold: float) -> List[Dict[str, Any]]:
+        if lexical_results:
+            self.hybrid_queries += 1
+            similarities = await self._lexical_similarities(query_embedding, relevant_docs, lexical_results)
+            return self._fuse_results(relevant_docs, lexical_results, top_k, similarities, similarity_threshold)
+        return relevant_docs[:top_k]
+        
+    async def _diversify(self, candidates: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+        """Select a diverse top_k from ranked candidates with MMR, then merge neighbouring chunks.
+
+        Overlapping windows of the same passage score almost identically, so
+        without this several copies of one passage would fill the prompt.
+        """
+        selected = candidates[:top_k]
+        if self.mmr_lambda is not None and len(candidates) > 1:
+            embeddings = await self.async_store.get_embeddings([doc['id'] for doc in candidates])
+            if all(doc['id'] in embeddings for doc in candidates):
+                # Fused candidates are ranked by RRF score, vector-only ones by similarity.
+                # Min-max scaling keeps the compressed RRF range comparable to cosine similarity.
+                key = 'rrf_score' if 'rrf_score' in candidates[0] else 'similarity'
+                relevance = np.asarray([doc[key] for doc in candidates], dtype=np.float32)
+                relevance = (relevance - relevance.min()) / max(float(np.ptp(relevance)), 1e-12)
+                picks = mmr_select(np.stack([embeddings[doc['id']] for doc in candidates]), relevance,
+                                   top_k, self.mmr_lambda, self.duplicate_threshold)
+                selected = [candidates[i] for i in picks]
+                self.duplicates_dropped += min(top_k, len(candidates)) - len(selected)
+        
+        if self.merge_adjacent:
+            merged = merge_adjacent_chunks(selected)
+            self.chunks_merged += len(selected) - len(merged)
+            selected = merged
+        
+        for rank, doc in enumerate(selected, 1):
+            doc['rank'] = rank
+        return selected
+    
     async def retrieve_relevant_documents(self, query: str, language: str = 'en', 
                                         top_k: int = 5, similarity_threshold: float = 0.7) -> List[Dict[str, Any]]:
-        """Retrieve relevant documents for a given query."""
+        """Retrieve relevant documents for a given query.
+
+        Exact terms (crop, pesticide and fertiliser names) are matched with BM25
+        and fused with the vector results; a decisive lexical match is returned
+        without embedding the query at all.
+        """
         try:
+            lexical_results = await self._lexical_search(query, language, top_k * 2) if self.hybrid else []
+            if self._is_decisive(query, lexical_results):
+                self.lexical_fast_paths += 1
+                return await self._diversify(self._fuse_results([], lexical_results, top_k * 2), top_k)
+            
             # Generate query embedding
-            query_embedding = await self.embeddings_manager.generate_embedding(query)
+            query_embedding = await self.embed_query(query)
             
             # Search vector store
-            search_results = self.vector_store.search(
+            search_results = await self.async_store.search(
                 query_embedding=query_embedding,
                 n_results=top_k * 2,  # Get more results to filter
                 language_filter=language
             )
             
-            # Filter by similarity threshold
-            relevant_docs = []
-            for i, (doc, metadata, distance) in enumerate(zip(
-                search_results['documents'],
-                search_results['metadatas'],
-                search_results['distances']
-            )):
-                # Convert distance to similarity (ChromaDB uses cosine distance)
-                similarity = 1 - distance
-                
-                if similarity >= similarity_threshold:
-                    relevant_docs.append({
-                        'content': doc,
-                        'metadata': metadata,
-                        'similarity': similarity,
-                        'rank': i + 1
-                    })
-            
-            # Sort by similarity and limit to top_k
-            relevant_docs.sort(key=lambda x: x['similarity'], reverse=True)
-            return relevant_docs[:top_k]
+            relevant_docs = self._filter_by_similarity(search_results, similarity_threshold)
+            combined = await self._combine_results(relevant_docs, lexical_results, top_k * 2,
+                                                   query_embedding, similarity_threshold)
+            return await self._diversify(combined, top_k)
             
         except Exception as e:
             print(f"Error retrieving documents: {str(e)}")
             return []
     
+    async def retrieve_many(self, queries: List[str], language: Union[str, List[str]] = 'en',
+                            top_k: int = 5, similarity_threshold: float = 0.7) -> List[List[Dict[str, Any]]]:
+        """Retrieve documents for a batch of queries, e.g. an SMS burst or an evaluation run.
+
+        Queries that need vectors are embedded in one batch and searched with one
+        vector store call per language. Each query gets the same lexical fast
+        path, threshold and fusion as retrieve_relevant_documents.
+        """
+        try:
+            languages = [language] * len(queries) if isinstance(language, str) else list(language)
+            results: List[List[Dict[str, Any]]] = [[] for _ in queries]
+            lexical_results = [await self._lexical_search(query, query_language, top_k * 2) if self.hybrid else []
+                               for query, query_language in zip(queries, languages)]
+            
+            pending = []
+            for i, query in enumerate(queries):
+                if self._is_decisive(query, lexical_results[i]):
+                    self.lexical_fast_paths += 1
+                    results[i] = await self._diversify(self._fuse_results([], lexical_results[i], top_k * 2), top_k)
+                else:
+                    pending.append(i)
+            if not pending:
+                return results
+            
+            embeddings = await self.query_cache.get_or_compute_many(
+                [queries[i] for i in pending], self.embeddings_manager.generate_batch_embeddings
+            )
+            
+            by_language: Dict[str, List[int]] = {}
+            for position, i in enumerate(pending):
+                by_language.setdefault(languages[i], []).append(position)
+            
+            for query_language, positions in by_language.items():
+                search_results = await self.async_store.search_many(
+                    [embeddings[position] for position in positions],
+                    n_results=top_k * 2,
+                    language_filter=query_language
+                )
+                for position, query_results in zip(positions, search_results):
+                    i = pending[position]
+                    relevant_docs = self._filter_by_similarity(query_results, similarity_threshold)
+                    combined = await self._combine_results(relevant_docs, lexical_results[i], top_k * 2,
+                                                           embeddings[position], similarity_threshold)
+                    results[i] = await self._diversify(combined, top_k)
+            
+            return results
+            
+        except Exception as e:
+            print(f"Error retrieving documents for query batch: {str(e)}")
+            return [[] for _ in queries]
+    
     async def retrieve_by_category(self, query: str, category: str, language: str = 'en', top_k: int = 3) -> List[Dict[str, Any]]:
-        """Retrieve documents filtered by category (crops, diseases, pesticides, etc.)."""
+        """Retrieve documents filtered by category (crops, diseases, pesticides, etc.).
+
+        The category comes from the knowledge base folder a chunk was ingested
+        from and is matched exactly, so the store can serve it from its metadata
+        index (or a dedicated partition) instead of scanning sources.
+        """
         try:
-            query_embedding = await self.embeddings_manager.generate_embedding(query)
+            query_embedding = await self.embed_query(query)
             
             # Search with category filter
-            search_results = self.vector_store.collection.query(
-                query_embeddings=[query_embedding],
+            search_results = await self.async_store.search(
+                query_embedding=query_embedding,
                 n_results=top_k,
-                where={
-                    "$and": [
-                        {"language": language},
-                        {"source": {"$regex": f".*{category}.*"}}
-                    ]
-                },
-                include=['documents', 'metadatas', 'distances']
+                language_filter=language,
+                category_filter=category.lower()
             )
             
             relevant_docs = []
-            for i, (doc, metadata, distance) in enumerate(zip(
-                search_results['documents'][0],
-                search_results['metadatas'][0],
-                search_results['distances'][0]
-            )):
+            for doc_id, doc, metadata, distance in zip(
+                search_results['ids'],
+                search_results['documents'],
+                search_results['metadatas'],
+                search_results['distances']
+            ):
                 similarity = 1 - distance
                 relevant_docs.append({
+                    'id': doc_id,
                     'content': doc,
                     'metadata': metadata,
                     'similarity': similarity,
@@ -86,6 +356,21 @@ class DocumentRetriever:
             print(f"Error retrieving documents by category: {str(e)}")
             return []
     
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get query and embedding cache statistics for the retrieval path."""
+        cache = getattr(self.embeddings_manager, 'cache', None)
+        return {
+            'query_cache': self.query_cache.get_stats(),
+            'embedding_cache': cache.get_stats() if cache else None,
+            'lexical_index': self.lexical_index.get_stats(),
+            'lexical_fast_paths': self.lexical_fast_paths,
+            'lexical_rebuilds': self.lexical_rebuilds,
+            'hybrid_queries': self.hybrid_queries,
+            'duplicates_dropped': self.duplicates_dropped,
+            'chunks_merged': self.chunks_merged,
+            'vector_store_pool': self.async_store.get_stats()
+        }
+    
     def format_context(self, documents: List[Dict[str, Any]]) -> str:
         """Format retrieved documents into a context string for the LLM."""
         if not documents:
@@ -95,9 +380,13 @@ class DocumentRetriever:
         for i, doc in enumerate(documents, 1):
             content = doc['content']
             source = doc['metadata'].get('file_name', 'Unknown')
-            similarity = doc['similarity']
+            if 'similarity' in doc:
+                relevance = f"Relevance: {doc['similarity']:.2f}"
+            else:
+                # Lexical fast-path hits have no semantic similarity
+                relevance = f"Keyword match: {doc.get('lexical_score', 0.0):.2f}"
             
-            context_part = f"[Source {i}: {source} (Relevance: {similarity:.2f})]\n{content}\n"
+            context_part = f"[Source {i}: {source} ({relevance})]\n{content}\n"
             context_parts.append(context_part)
         
         return "\n---\n".join(context_parts)
\ No newline at end of file
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from .async_vector_store import AsyncVectorStore
+
+class SlowStore:
+    """Blocking stand-in for VectorStore that records how many calls overlap."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def search(self, query_embedding, n_results, language_filter, category_filter):
+        with self._lock:
+            self.calls.append(query_embedding)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return {'ids': [str(query_embedding)]}
+
+    def delete_documents(self, doc_ids):
+        raise RuntimeError("index is read-only")
+
+def test_calls_leave_the_event_loop_free_and_respect_the_concurrency_bound():
+    store = SlowStore(delay=0.05)
+    async_store = AsyncVectorStore(store, max_workers=4, max_concurrency=2)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    async def run():
+        tick_task = asyncio.create_task(ticker())
+        results = await asyncio.gather(*(async_store.search([float(i)]) for i in range(6)))
+        tick_task.cancel()
+        return results
+
+    results = asyncio.run(run())
+    async_store.close()
+
+    assert [result['ids'] for result in results] == [[str([float(i)])] for i in range(6)]
+    assert store.peak == 2
+    assert ticks > 10
+    stats = async_store.get_stats()
+    assert stats['completed'] == 6 and stats['max_queue_depth'] >= 4 and stats['queue_depth'] == 0
+
+def test_cancelled_queued_call_never_reaches_the_store():
+    store = SlowStore(delay=0.1)
+    async_store = AsyncVectorStore(store, max_workers=1)
+
+    async def run():
+        running = asyncio.create_task(async_store.search([1.0]))
+        queued = asyncio.create_task(async_store.search([2.0]))
+        await asyncio.sleep(0.02)
+        queued.cancel()
+        await running
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+
+    asyncio.run(run())
+    async_store.close()
+
+    assert store.calls == [[1.0]]
+    assert async_store.get_stats()['cancelled'] == 1
+
+def test_cancelled_running_call_keeps_its_slot_until_the_thread_finishes():
+    store = SlowStore(delay=0.1)
+    async_store = AsyncVectorStore(store, max_workers=1)
+
+    async def run():
+        running = asyncio.create_task(async_store.search([1.0]))
+        await asyncio.sleep(0.02)
+        running.cancel()
+        start = time.perf_counter()
+        await async_store.search([2.0])
+        return time.perf_counter() - start
+
+    waited = asyncio.run(run())
+    async_store.close()
+
+    assert waited >= 0.07
+    assert store.peak == 1
+
+def test_store_errors_are_raised_and_counted():
+    async_store = AsyncVectorStore(SlowStore())
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(async_store.delete_documents(['a']))
+    async_store.close()
+
+    assert async_store.get_stats()['failed'] == 1
+    assert async_store.running == 0
@@ -0,0 +1,53 @@
+from .chunker import SentenceChunker
+from .token_estimator import estimate_tokens
+
+def sentences(text, **kwargs):
+    return [sentence.strip() for _, _, sentence, _ in SentenceChunker(**kwargs).iter_sentences([text])]
+
+def test_sentences_split_on_english_and_malayalam_punctuation():
+    text = "Dr. Nair visited the farm. Use variety No. 5 here. Is it ready? വിളവെടുപ്പ് കഴിഞ്ഞു। Done!"
+
+    assert sentences(text) == ["Dr. Nair visited the farm.", "Use variety No. 5 here.", "Is it ready?",
+                               "വിളവെടുപ്പ് കഴിഞ്ഞു।", "Done!"]
+
+def test_no_ends_a_sentence_unless_a_number_follows():
+    assert sentences("Should I spray today? The answer is no. Wait for the rain.") == \
+        ["Should I spray today?", "The answer is no.", "Wait for the rain."]
+
+def test_chunks_respect_the_budget_and_keep_sentences_whole():
+    text = " ".join(f"Sentence {i} talks about paddy field preparation." for i in range(20))
+    chunker = SentenceChunker(max_tokens=30)
+
+    chunks = chunker.chunk_text(text)
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 30 for chunk in chunks)
+    assert all(chunk.endswith("preparation.") for chunk in chunks)
+    assert " ".join(chunks) == text
+
+def test_offsets_are_stable_across_block_boundaries():
+    text = ("Banana needs potassium. Prop the bunches before wind season.\n\n"
+            "തെങ്ങിന് ജൈവവളം നൽകുക. Irrigate coconut basins in summer. ") * 5
+    chunker = SentenceChunker(max_tokens=25, min_tokens=5)
+
+    whole = list(chunker.iter_chunks([text]))
+    streamed = list(chunker.iter_chunks(text[i:i + 7] for i in range(0, len(text), 7)))
+
+    assert streamed == whole
+    for start, end, chunk in whole:
+        assert text[start:end] == chunk
+
+def test_overlap_repeats_trailing_sentences():
+    text = "One apple. Two bananas. Three coconuts. Four dates."
+    chunks = SentenceChunker(max_tokens=8, overlap_sentences=1).chunk_text(text)
+
+    assert chunks == ["One apple. Two bananas.", "Two bananas. Three coconuts.", "Three coconuts. Four dates."]
+
+def test_oversized_sentence_falls_back_to_word_boundaries():
+    text = " ".join(["fertiliser"] * 40)
+
+    chunks = list(SentenceChunker(max_tokens=10).iter_chunks([text]))
+
+    assert all(estimate_tokens(chunk) <= 10 for _, _, chunk in chunks)
+    assert " ".join(chunk for _, _, chunk in chunks) == text
+    assert all(text[start:end] == chunk for start, end, chunk in chunks)
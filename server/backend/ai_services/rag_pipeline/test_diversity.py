@@ -0,0 +1,51 @@
+import numpy as np
+
+from .diversity import mmr_select, merge_adjacent_chunks
+
+def chunk(index, content, start=None, end=None, similarity=0.8, source='rice.txt'):
+    metadata = {'source': source, 'chunk_index': index, 'token_count': len(content.split())}
+    if start is not None:
+        metadata.update(start_offset=start, end_offset=end)
+    return {'id': f"{source}:{index}", 'content': content, 'metadata': metadata, 'similarity': similarity}
+
+def test_mmr_drops_near_duplicates_and_prefers_novel_candidates():
+    embeddings = np.array([[1.0, 0.0, 0.0], [0.999, 0.01, 0.0], [0.7, 0.7, 0.0], [0.0, 0.0, 1.0]])
+    relevance = np.array([1.0, 0.99, 0.8, 0.5])
+
+    picks = mmr_select(embeddings, relevance, top_k=3, lambda_mult=0.5, duplicate_threshold=0.95)
+
+    assert picks[0] == 0
+    assert 1 not in picks
+    assert sorted(picks) == [0, 2, 3]
+
+def test_mmr_with_pure_relevance_keeps_ranking():
+    embeddings = np.eye(4)
+    assert mmr_select(embeddings, np.array([0.2, 0.9, 0.5, 0.1]), top_k=2, lambda_mult=1.0) == [1, 2]
+
+def test_adjacent_chunks_keep_words_repeated_across_the_boundary():
+    documents = [chunk(0, "Split the dose and apply urea", 0, 29),
+                 chunk(1, "urea should go in moist soil", 30, 58, similarity=0.9)]
+
+    merged = merge_adjacent_chunks(documents)
+
+    assert len(merged) == 1
+    assert merged[0]['content'] == "Split the dose and apply urea urea should go in moist soil"
+    assert merged[0]['similarity'] == 0.9
+    assert merged[0]['merged_ids'] == ['rice.txt:0', 'rice.txt:1']
+    assert merged[0]['metadata']['end_offset'] == 58
+
+def test_overlapping_chunks_drop_the_overlap():
+    documents = [chunk(0, "Rice needs standing water during tillering", 0, 42),
+                 chunk(1, "during tillering and flowering stages", 24, 61)]
+
+    merged = merge_adjacent_chunks(documents)
+
+    assert merged[0]['content'] == "Rice needs standing water during tillering and flowering stages"
+
+def test_chunks_without_offsets_are_joined_plainly():
+    documents = [chunk(3, "apply urea"), chunk(5, "unrelated"), chunk(4, "urea again")]
+
+    merged = merge_adjacent_chunks(documents)
+
+    assert [doc['content'] for doc in merged] == ["apply urea urea again unrelated"]
+    assert merged[0]['metadata']['merged_chunks'] == 3
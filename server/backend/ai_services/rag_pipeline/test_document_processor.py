@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from .chunker import SentenceChunker
+from .document_processor import DocumentProcessor
+from .token_estimator import MALAYALAM_PATTERN
+
+@pytest.fixture
+def processor():
+    return DocumentProcessor(None, chunker=SentenceChunker(max_tokens=12, min_tokens=1))
+
+def test_text_chunks_record_their_source_offsets(tmp_path, processor):
+    text = ("Transplant rice seedlings at 21 days. Keep 2 cm of water in the field.\n\n"
+            "നെല്ലിന് ആവശ്യത്തിന് വെള്ളം നൽകുക. Apply potash before flowering!")
+    path = tmp_path / 'rice.txt'
+    path.write_text(text, encoding='utf-8')
+
+    chunks = processor.process_agricultural_document(str(path))
+
+    assert [chunk['chunk_index'] for chunk in chunks] == list(range(len(chunks)))
+    assert len(chunks) > 1
+    for chunk in chunks:
+        metadata = chunk['metadata']
+        source = text[metadata['start_offset']:metadata['end_offset']]
+        language = 'ml' if MALAYALAM_PATTERN.search(source) else chunk['language']
+        assert chunk['content'] == processor.preprocess_text(source, language)
+    assert any(chunk['language'] == 'ml' for chunk in chunks)
+
+def test_json_arrays_stream_one_segment_per_record(tmp_path, processor):
+    records = [{'crop': 'banana', 'advice': 'Prop the bunch', 'yield': 12.5}, {'crop': 'rice', 'notes': None},
+               {'crop': 'coconut', 'pests': ['mite', 'beetle']}]
+    path = tmp_path / 'crops.json'
+    path.write_text(json.dumps(records, indent=2), encoding='utf-8')
+
+    # A tiny block size forces records (and the number 12.5) to straddle block boundaries
+    streamed = list(processor._iter_json_records(str(path), block_size=7))
+    chunks = processor.process_agricultural_document(str(path))
+
+    assert streamed == records
+    assert sorted({chunk['metadata']['record_index'] for chunk in chunks}) == [0, 1, 2]
+    assert chunks[-1]['content'] == "crop coconut pests mite pests beetle"
+
+def test_jsonl_records_and_single_json_documents(tmp_path, processor):
+    jsonl = tmp_path / 'tips.jsonl'
+    jsonl.write_text('{"tip": "Mulch coconut basins"}\n\n{"tip": "Spray neem oil"}\n', encoding='utf-8')
+    document = tmp_path / 'pest.json'
+    document.write_text('{"pest": "rhinoceros beetle"}', encoding='utf-8')
+
+    assert [chunk['content'] for chunk in processor.process_agricultural_document(str(jsonl))] == \
+        ["tip Mulch coconut basins", "tip Spray neem oil"]
+    assert processor.process_agricultural_document(str(document))[0]['content'] == "pest rhinoceros beetle"
+
+def test_chunk_text_uses_the_sentence_chunker(processor):
+    assert processor.chunk_text("Water the seedlings. Weed after two weeks.") == \
+        processor.chunker.chunk_text("Water the seedlings. Weed after two weeks.")
+
+def test_unsupported_formats_yield_no_chunks(tmp_path, processor):
+    path = tmp_path / 'notes.pdf'
+    path.write_bytes(b'%PDF')
+
+    assert processor.process_agricultural_document(str(path)) == []
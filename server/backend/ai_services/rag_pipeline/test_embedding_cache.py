@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+import pytest
+
+from .embedding_cache import EmbeddingCache
+from .embeddings_manager import EmbeddingsManager
+
+class CountingBackend:
+    model_name = 'counting'
+    dim = 2
+
+    def __init__(self):
+        self.texts = []
+        self.fail = False
+
+    def __call__(self, texts, task_type):
+        if self.fail:
+            raise ConnectionError("provider unavailable")
+        self.texts.extend(texts)
+        return [[float(len(text)), 1.0] for text in texts]
+
+def test_entries_survive_reopen_and_are_keyed_by_model_and_task(tmp_path):
+    db_path = str(tmp_path / 'cache.sqlite3')
+    cache = EmbeddingCache(db_path)
+    cache.put_many(['urea', 'potash'], [[0.5, 1.0], [0.25, 2.0]], 'model-a', 'retrieval_document')
+    cache.close()
+
+    reopened = EmbeddingCache(db_path)
+    assert reopened.get_many(['potash', 'urea', 'neem'], 'model-a', 'retrieval_document') == \
+        [[0.25, 2.0], [0.5, 1.0], None]
+    assert reopened.get('urea', 'model-b', 'retrieval_document') is None
+    assert reopened.get('urea', 'model-a', 'retrieval_query') is None
+    assert reopened.get_stats()['entries'] == 2
+    assert reopened.hits == 2
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / 'cache.sqlite3'), max_entries=4, evict_fraction=0.5)
+    for i in range(4):
+        cache.put(f"text {i}", [float(i)], 'm', 't')
+        time.sleep(0.01)
+    cache.get('text 0', 'm', 't')
+
+    cache.put('text 4', [4.0], 'm', 't')
+
+    assert cache.get_stats()['entries'] == 2
+    assert cache.get('text 0', 'm', 't') == [0.0]
+    assert cache.get('text 4', 'm', 't') == [4.0]
+    assert cache.get('text 1', 'm', 't') is None
+
+def test_manager_serves_hits_from_cache_and_never_caches_fallbacks(tmp_path):
+    backend = CountingBackend()
+    cache = EmbeddingCache(str(tmp_path / 'cache.sqlite3'))
+    manager = EmbeddingsManager(None, embedding_backend=backend, cache=cache, max_retries=0)
+
+    first = asyncio.run(manager.generate_batch_embeddings(['rice', 'banana']))
+    second = asyncio.run(manager.generate_batch_embeddings(['banana', 'rice']))
+    assert second == [first[1], first[0]]
+    assert backend.texts == ['rice', 'banana']
+
+    backend.fail = True
+    asyncio.run(manager.generate_batch_embeddings(['coconut']))
+    assert cache.get('coconut', manager.model_name, 'retrieval_document') is None
+
+@pytest.mark.parametrize('count', [1, 1200])
+def test_lookups_are_chunked_below_the_parameter_limit(tmp_path, count):
+    cache = EmbeddingCache(str(tmp_path / 'cache.sqlite3'))
+    texts = [f"chunk {i}" for i in range(count)]
+    cache.put_many(texts, [[float(i)] for i in range(count)], 'm', 't')
+
+    assert cache.get_many(texts, 'm', 't') == [[float(i)] for i in range(count)]
@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+from .embeddings_manager import EmbeddingsManager
+from .hashing_embedder import is_fallback_embedding
+
+class RecordingBackend:
+    """Remote-like backend (no ``is_local``) that records the batches it is sent."""
+
+    model_name = 'recording'
+    dim = 4
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.batches = []
+
+    def __call__(self, texts, task_type):
+        self.batches.append(list(texts))
+        if self.fail:
+            raise ConnectionError("provider unavailable")
+        return [[float(len(text)), 1.0, 0.0, 0.0] for text in texts]
+
+def test_batches_preserve_order_and_embed_duplicates_once():
+    backend = RecordingBackend()
+    manager = EmbeddingsManager(None, batch_size=2, embedding_backend=backend, requests_per_second=1000)
+    texts = ['a', 'bb', 'a', 'ccc', 'dddd']
+
+    embeddings = asyncio.run(manager.generate_batch_embeddings(texts))
+
+    assert [embedding[0] for embedding in embeddings] == [1.0, 2.0, 1.0, 3.0, 4.0]
+    assert [len(batch) for batch in backend.batches] == [2, 2]
+    assert sorted(text for batch in backend.batches for text in batch) == ['a', 'bb', 'ccc', 'dddd']
+
+def test_failed_backend_returns_flagged_fallback_vectors():
+    manager = EmbeddingsManager(None, embedding_backend=RecordingBackend(fail=True), max_retries=0)
+
+    embeddings = asyncio.run(manager.generate_batch_embeddings(['neem oil', 'urea']))
+
+    assert all(is_fallback_embedding(embedding) and len(embedding) == 4 for embedding in embeddings)
+    assert manager.fallback_batches == 1
+
+def test_single_query_embeds_skip_the_ingestion_rate_limit():
+    # One request per second with a burst of one would take ~10s for the batch path
+    manager = EmbeddingsManager(None, embedding_backend=RecordingBackend(), requests_per_second=1.0)
+
+    async def embed_queries():
+        return await asyncio.gather(*(manager.generate_embedding(f"query {i}") for i in range(10)))
+
+    start = time.perf_counter()
+    embeddings = asyncio.run(embed_queries())
+    assert time.perf_counter() - start < 1.0
+    assert len(embeddings) == 10
+    assert manager.get_stats()['query_rate_limiter']['acquired'] == 10
+    assert manager.get_stats()['rate_limiter']['acquired'] == 0
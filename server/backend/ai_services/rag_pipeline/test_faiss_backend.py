@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from .faiss_backend import FaissCollection
+
+def unit_vectors(count, dim=8, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def fill(collection, count=20, seed=0):
+    vectors = unit_vectors(count, seed=seed)
+    ids = [f"chunk-{i}" for i in range(count)]
+    collection.add(ids=ids, embeddings=vectors.tolist(), documents=[f"text {i}" for i in ids],
+                   metadatas=[{'language': 'ml' if i % 2 else 'en', 'chunk_index': i} for i in range(count)])
+    return ids, vectors
+
+@pytest.mark.parametrize('index_factory', ['Flat', 'HNSW32'])
+def test_query_returns_nearest_chunks_with_cosine_distances(tmp_path, index_factory):
+    collection = FaissCollection(str(tmp_path), index_factory=index_factory)
+    ids, vectors = fill(collection)
+
+    results = collection.query([vectors[3].tolist()], n_results=3)
+
+    assert results['ids'][0][0] == 'chunk-3'
+    assert results['distances'][0][0] == pytest.approx(0.0, abs=1e-5)
+    assert results['documents'][0][0] == 'text chunk-3'
+
+    collection.delete(ids=['chunk-3'])
+    assert 'chunk-3' not in collection.query([vectors[3].tolist()], n_results=3)['ids'][0]
+    assert collection.count() == 19
+
+def test_filters_are_applied_inside_the_search(tmp_path):
+    collection = FaissCollection(str(tmp_path))
+    _, vectors = fill(collection)
+
+    results = collection.query([vectors[4].tolist()], n_results=20,
+                               where={'$and': [{'language': 'ml'}, {'chunk_index': {'$lt': 10}}]})
+
+    assert sorted(results['ids'][0]) == [f"chunk-{i}" for i in (1, 3, 5, 7, 9)]
+    assert all(metadata['language'] == 'ml' for metadata in results['metadatas'][0])
+
+def test_upsert_replaces_vectors_and_add_skips_existing_ids(tmp_path):
+    collection = FaissCollection(str(tmp_path))
+    _, vectors = fill(collection)
+
+    collection.upsert(ids=['chunk-0'], embeddings=[vectors[5].tolist()], documents=['moved'],
+                      metadatas=[{'language': 'en'}])
+    collection.add(ids=['chunk-1'], embeddings=[vectors[5].tolist()], documents=['ignored'])
+
+    hits = collection.query([vectors[5].tolist()], n_results=2)['ids'][0]
+    assert sorted(hits) == ['chunk-0', 'chunk-5']
+    assert collection.get(ids=['chunk-1'])['documents'] == ['text chunk-1']
+    assert np.allclose(collection.get(ids=['chunk-0'], include=('embeddings',))['embeddings'][0], vectors[5], atol=1e-6)
+
+    with pytest.raises(ValueError):
+        collection.upsert(ids=['wide'], embeddings=[[1.0] * 16])
+
+def test_persisted_index_reopens_memory_mapped(tmp_path):
+    collection = FaissCollection(str(tmp_path))
+    _, vectors = fill(collection)
+    collection.persist()
+
+    reopened = FaissCollection(str(tmp_path))
+
+    assert reopened._mmapped
+    assert reopened.query([vectors[7].tolist()], n_results=1)['ids'][0] == ['chunk-7']
+    reopened.add(ids=['extra'], embeddings=[vectors[0].tolist()])
+    assert not reopened._mmapped and reopened.count() == 21
+
+def test_rows_written_after_the_last_persist_are_reconciled_away(tmp_path):
+    collection = FaissCollection(str(tmp_path))
+    _, vectors = fill(collection, count=10)
+    collection.persist()
+    # Rows reach SQLite immediately but these vectors are never persisted, as after a crash
+    collection.add(ids=['lost'], embeddings=[vectors[0].tolist()], documents=['lost'])
+
+    reopened = FaissCollection(str(tmp_path))
+
+    assert reopened.count() == 10
+    assert reopened.get(ids=['lost'])['ids'] == []
@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from .hashing_embedder import HashingEmbedder
+
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def test_batch_rows_are_normalised_and_match_single_embeds():
+    embedder = HashingEmbedder(dim=64)
+    texts = ["Apply neem oil against aphids", "നെല്ലിന് വളം", ""]
+
+    matrix = embedder.embed_batch(texts)
+
+    assert matrix.shape == (3, 64) and matrix.dtype == np.float32
+    assert np.allclose(np.linalg.norm(matrix[:2], axis=1), 1.0)
+    assert not matrix[2].any()
+    assert np.allclose(matrix[1], embedder.embed(texts[1]))
+
+def test_related_texts_score_higher_than_unrelated_ones():
+    embedder = HashingEmbedder(dim=256)
+    query, related, unrelated = embedder.embed_batch(
+        ["rice blast fungicide", "fungicide spray for rice blast", "coconut climbing equipment"]
+    )
+
+    assert query @ related > query @ unrelated
+
+def test_vectors_are_identical_across_processes():
+    code = ("from ai_services.rag_pipeline.hashing_embedder import HashingEmbedder;"
+            "print(HashingEmbedder(dim=32).embed('banana wilt')[:4])")
+    # Different hash seeds would change the vectors if features were placed with hash()
+    outputs = {subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True, cwd=BACKEND_ROOT,
+                              env={**os.environ, 'PYTHONHASHSEED': seed}).stdout
+               for seed in ('1', '2')}
+
+    assert len(outputs) == 1
+    assert outputs.pop().strip() == str(HashingEmbedder(dim=32).embed('banana wilt')[:4])
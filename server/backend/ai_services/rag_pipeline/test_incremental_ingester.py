@@ -0,0 +1,87 @@
+import asyncio
+import os
+
+from .document_processor import DocumentProcessor
+from .embeddings_manager import EmbeddingsManager
+from .hashing_embedder import HashingEmbedder
+from .incremental_ingester import IncrementalIngester
+from .ingestion_manifest import IngestionManifest
+from .vector_store import VectorStore
+
+class FlakyBackend:
+    """Embedding backend that fails while ``down`` is set."""
+
+    model_name = 'test-backend'
+    dim = 32
+
+    def __init__(self):
+        self.down = False
+        self.embedder = HashingEmbedder(dim=self.dim, ngram_range=(1, 1))
+
+    def __call__(self, texts, task_type):
+        if self.down:
+            raise ConnectionError("provider unavailable")
+        return self.embedder(texts)
+
+def write_file(kb_path, relative_path, text):
+    file_path = os.path.join(kb_path, relative_path)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return file_path
+
+def make_ingester(tmp_path, backend):
+    vector_store = VectorStore(str(tmp_path / 'index'), backend='faiss')
+    manifest = IngestionManifest(str(tmp_path / 'manifest.json'))
+    embeddings_manager = EmbeddingsManager(None, embedding_backend=backend, max_retries=0)
+    return IncrementalIngester(DocumentProcessor(None), embeddings_manager, vector_store, manifest)
+
+def test_sync_skips_unchanged_files_and_removes_deleted_ones(tmp_path):
+    kb_path = tmp_path / 'kb'
+    write_file(kb_path, 'crops/rice.txt', "Rice needs standing water. Apply urea in three splits.")
+    write_file(kb_path, 'pests/aphid.txt', "Spray neem oil against aphids on okra.")
+    ingester = make_ingester(tmp_path, FlakyBackend())
+
+    first = asyncio.run(ingester.sync_directory(str(kb_path)))
+    assert first['files_processed'] == 2
+    assert ingester.vector_store.collection.count() == first['chunks_upserted']
+
+    os.remove(kb_path / 'pests' / 'aphid.txt')
+    second = asyncio.run(ingester.sync_directory(str(kb_path)))
+    assert second['files_unchanged'] == 1
+    assert second['files_removed'] == 1
+    assert list(ingester.manifest.files) == ['crops/rice.txt']
+
+def test_changed_file_keeps_unchanged_chunks(tmp_path):
+    kb_path = tmp_path / 'kb'
+    sentences = [f"Sentence {i} about banana fertilizer schedules and irrigation." for i in range(200)]
+    write_file(kb_path, 'crops/banana.txt', ' '.join(sentences))
+    ingester = make_ingester(tmp_path, FlakyBackend())
+    asyncio.run(ingester.sync_directory(str(kb_path)))
+    chunks_before = set(ingester.manifest.get_file('crops/banana.txt')['chunks'])
+
+    write_file(kb_path, 'crops/banana.txt', ' '.join(sentences + ["Mulch keeps the soil moist."]))
+    stats = asyncio.run(ingester.sync_directory(str(kb_path)))
+    chunks_after = set(ingester.manifest.get_file('crops/banana.txt')['chunks'])
+
+    assert stats['chunks_upserted'] < len(chunks_after)
+    assert len(chunks_before & chunks_after) == len(chunks_after) - stats['chunks_upserted']
+    assert ingester.vector_store.collection.count() == len(chunks_after)
+
+def test_fallback_embeddings_fail_the_file_and_leave_no_chunks(tmp_path):
+    kb_path = tmp_path / 'kb'
+    write_file(kb_path, 'crops/rice.txt', "Rice blast is controlled with tricyclazole.")
+    backend = FlakyBackend()
+    backend.down = True
+    ingester = make_ingester(tmp_path, backend)
+
+    stats = asyncio.run(ingester.sync_directory(str(kb_path)))
+    assert stats['files_failed'] == 1
+    assert ingester.manifest.get_file('crops/rice.txt') is None
+    assert ingester.vector_store.collection.count() == 0
+
+    # Once the provider is back the file is retried and embedded properly
+    backend.down = False
+    stats = asyncio.run(ingester.sync_directory(str(kb_path)))
+    assert stats['files_processed'] == 1
+    assert ingester.vector_store.collection.count() == stats['chunks_upserted'] > 0
@@ -0,0 +1,67 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from .index_versions import (activate_version, collect_garbage, list_versions, read_active_version,
+                             validate_index, version_directory)
+from .vector_store import VectorStore
+
+def build_version(root, version, count=10, seed=0):
+    store = VectorStore(root, backend='faiss', version=version)
+    vectors = np.random.default_rng(seed).normal(size=(count, 8)).tolist()
+    store.add_documents([{'id': f"{version}-{i}", 'content': f"chunk {i}"} for i in range(count)], vectors)
+    store.flush()
+    return store
+
+def test_activation_switches_the_pointer_atomically(tmp_path):
+    root = str(tmp_path)
+    os.makedirs(version_directory(root, 'v1'))
+
+    assert read_active_version(root) is None
+    with pytest.raises(ValueError):
+        activate_version(root, 'v2')
+    activate_version(root, 'v1', {'chunks': 10})
+
+    assert read_active_version(root) == 'v1'
+    assert not os.path.exists(os.path.join(root, 'active_index.json.tmp'))
+
+def test_garbage_collection_keeps_the_active_and_previous_versions(tmp_path):
+    root = str(tmp_path)
+    for version in ('v1', 'v2', 'v3', 'v4', 'v5'):
+        os.makedirs(version_directory(root, version))
+    activate_version(root, 'v4')
+
+    removed = collect_garbage(root, keep=2)
+
+    # v5 is newer than the active version (an unfinished build) and is left alone
+    assert removed == ['v1', 'v2']
+    assert list_versions(root) == ['v3', 'v4', 'v5']
+
+def test_validation_rejects_empty_and_shrunken_indexes(tmp_path):
+    root = str(tmp_path)
+    empty = VectorStore(root, backend='faiss', version='empty')
+    store = build_version(root, 'v1', count=10)
+
+    assert validate_index(empty) == ["index is empty"]
+    assert validate_index(store, previous_count=10) == []
+    assert "fewer than 90%" in validate_index(store, previous_count=20)[0]
+
+def test_following_store_switches_to_a_newly_activated_version(tmp_path):
+    root = str(tmp_path)
+    build_version(root, 'v1', count=3)
+    activate_version(root, 'v1')
+    live = VectorStore(root, backend='faiss', refresh_interval=0.0)
+    switched = []
+    live.add_switch_listener(lambda index: switched.append(index.version))
+    build_version(root, 'v2', count=5, seed=1)
+
+    activate_version(root, 'v2')
+    live.maybe_refresh()
+    deadline = time.monotonic() + 5
+    while live.version != 'v2' and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert live.version == 'v2' and switched == ['v2']
+    assert live.collection.count() == 5
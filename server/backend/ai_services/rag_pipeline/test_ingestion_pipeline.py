@@ -0,0 +1,97 @@
+import asyncio
+import os
+
+from .embeddings_manager import EmbeddingsManager
+from .ingestion_manifest import IngestionManifest
+from .ingestion_pipeline import IngestionPipeline
+from .test_incremental_ingester import FlakyBackend, write_file
+from .vector_store import VectorStore
+
+def make_pipeline(tmp_path, backend, **kwargs):
+    vector_store = VectorStore(str(tmp_path / 'index'), backend='faiss')
+    manifest = IngestionManifest(str(tmp_path / 'manifest.json'))
+    embeddings_manager = EmbeddingsManager(None, embedding_backend=backend, max_retries=0)
+    return IngestionPipeline(embeddings_manager, vector_store, None, manifest, read_workers=2, embed_workers=2,
+                             **kwargs)
+
+def long_text(topic, sentences=120):
+    return ' '.join(f"Sentence {i} about {topic} and how farmers manage it in the field." for i in range(sentences))
+
+def test_run_streams_files_in_batches_and_records_them(tmp_path):
+    kb_path = tmp_path / 'kb'
+    write_file(kb_path, 'crops/rice.txt', long_text('rice irrigation'))
+    write_file(kb_path, 'crops/banana.txt', long_text('banana fertilizer'))
+    pipeline = make_pipeline(tmp_path, FlakyBackend(), embed_batch_size=2)
+
+    report = asyncio.run(pipeline.run_directory(str(kb_path)))
+    chunks = sum(len(entry['chunks']) for entry in pipeline.manifest.files.values())
+    assert report['files_failed'] == 0
+    assert sorted(pipeline.manifest.files) == ['crops/banana.txt', 'crops/rice.txt']
+    assert report['stages']['read']['items'] == chunks
+    assert report['stages']['embed']['calls'] > 2
+    assert pipeline.vector_store.collection.count() == chunks
+
+    report = asyncio.run(pipeline.run_directory(str(kb_path)))
+    assert report['files_unchanged'] == 2
+
+def test_embedding_failure_is_counted_and_keeps_the_old_chunks(tmp_path):
+    kb_path = tmp_path / 'kb'
+    write_file(kb_path, 'crops/rice.txt', long_text('rice irrigation'))
+    backend = FlakyBackend()
+    pipeline = make_pipeline(tmp_path, backend, embed_batch_size=2)
+    asyncio.run(pipeline.run_directory(str(kb_path)))
+    old_chunks = dict(pipeline.manifest.get_file('crops/rice.txt')['chunks'])
+
+    write_file(kb_path, 'crops/rice.txt', long_text('rice blast'))
+    backend.down = True
+    report = asyncio.run(pipeline.run_directory(str(kb_path)))
+
+    assert report['files_failed'] == 1
+    assert pipeline.manifest.get_file('crops/rice.txt')['chunks'] == old_chunks
+    stored = pipeline.vector_store.collection.get(include=[])['ids']
+    assert sorted(stored) == sorted(old_chunks)
+
+def test_write_failure_is_counted_and_removes_written_chunks(tmp_path):
+    kb_path = tmp_path / 'kb'
+    write_file(kb_path, 'crops/rice.txt', long_text('rice irrigation'))
+    pipeline = make_pipeline(tmp_path, FlakyBackend(), embed_batch_size=2, write_batch_size=2)
+
+    vector_store = pipeline.vector_store
+    upsert_documents = vector_store.upsert_documents
+    writes = []
+
+    def failing_upsert(documents, embeddings):
+        writes.append(len(documents))
+        # The first write succeeds, the second fails
+        return upsert_documents(documents, embeddings) and len(writes) < 2
+
+    vector_store.upsert_documents = failing_upsert
+    report = asyncio.run(pipeline.run_directory(str(kb_path)))
+
+    assert report['files_failed'] == 1
+    assert pipeline.manifest.get_file('crops/rice.txt') is None
+    assert vector_store.collection.count() == 0
+
+def test_unreadable_file_is_counted_as_failed(tmp_path):
+    kb_path = tmp_path / 'kb'
+    write_file(kb_path, 'crops/rice.json', '[{"crop": "rice"}, {"crop": ')
+    write_file(kb_path, 'crops/okra.txt', long_text('okra pests', sentences=5))
+    pipeline = make_pipeline(tmp_path, FlakyBackend())
+
+    report = asyncio.run(pipeline.run_directory(str(kb_path)))
+    assert report['files_failed'] == 1
+    assert list(pipeline.manifest.files) == ['crops/okra.txt']
+
+def test_emptied_file_drops_its_chunks(tmp_path):
+    kb_path = tmp_path / 'kb'
+    write_file(kb_path, 'crops/rice.txt', long_text('rice irrigation', sentences=5))
+    pipeline = make_pipeline(tmp_path, FlakyBackend())
+    asyncio.run(pipeline.run_directory(str(kb_path)))
+    assert pipeline.vector_store.collection.count() > 0
+
+    write_file(kb_path, 'crops/rice.txt', '')
+    report = asyncio.run(pipeline.run_directory(str(kb_path)))
+    assert report['files_failed'] == 0
+    assert pipeline.manifest.get_file('crops/rice.txt')['chunks'] == {}
+    assert pipeline.vector_store.collection.count() == 0
+    assert os.path.exists(kb_path / 'crops' / 'rice.txt')
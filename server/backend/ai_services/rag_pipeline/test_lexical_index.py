@@ -0,0 +1,55 @@
+import numpy as np
+
+from .lexical_index import BM25Index, tokenize
+from .vector_store import VectorStore
+
+def make_index(refresh_interval=60.0):
+    index = BM25Index(refresh_interval=refresh_interval)
+    index.build(['npk', 'urea', 'ml-urea', 'blank'],
+                ["Apply NPK 12:32:16 at planting, then urea", "urea urea urea top dressing for paddy",
+                 "യൂറിയ urea വളം", ""],
+                [{'language': 'en'}, {'language': 'en'}, {'language': 'ml'}, None])
+    return index
+
+def test_compound_terms_are_indexed_joined_and_split():
+    assert tokenize("NPK 12:32:16, 2,4-D") == ['npk', '123216', '12', '32', '16', '24d', '2', '4', 'd']
+
+def test_bm25_ranks_by_term_frequency_and_rarity():
+    index = make_index()
+
+    results = index.search("urea npk", n_results=3)
+
+    assert [result['id'] for result in results] == ['npk', 'urea', 'ml-urea']
+    assert results[0]['matched_terms'] == 2
+    assert results[0]['score'] > results[1]['score'] > results[2]['score'] > 0
+    assert index.search("123216")[0]['id'] == 'npk'
+
+def test_language_filter_and_query_coverage():
+    index = make_index()
+
+    assert [result['id'] for result in index.search("urea", language_filter='ml')] == ['ml-urea']
+    assert index.search("urea", language_filter='hi') == []
+    assert index.covers_query("urea, NPK 12:32:16")
+    assert not index.covers_query("urea potash")
+    assert index.search("potash") == []
+
+def add_chunks(store, ids, texts):
+    rng = np.random.default_rng(len(ids))
+    store.add_documents([{'id': chunk_id, 'content': text, 'metadata': {'language': 'en'}}
+                         for chunk_id, text in zip(ids, texts)], rng.normal(size=(len(ids), 8)).tolist())
+
+def test_index_rebuilds_after_the_store_changes(tmp_path):
+    store = VectorStore(str(tmp_path / 'index'), backend='faiss')
+    add_chunks(store, ['a', 'b'], ["banana bunchy top", "coconut mite"])
+    index = BM25Index(refresh_interval=0.0)
+
+    index.ensure_fresh(store)
+    assert [result['id'] for result in index.search("banana")] == ['a']
+
+    # Same count, different content: the store version still changes
+    store.delete_documents(['a'])
+    add_chunks(store, ['c'], ["banana pseudostem weevil"])
+    assert index.is_stale(store)
+    index.ensure_fresh(store)
+    assert [result['id'] for result in index.search("banana")] == ['c']
+    assert not index.is_stale(store)
@@ -0,0 +1,90 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from .ingestion_manifest import IngestionManifest
+from .local_embedder import DEFAULT_LOCAL_MODEL, LocalEmbedder, local_embedder_from_env
+
+class FakeModel:
+    """Stands in for a SentenceTransformer: one row per text, first column is its length."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    def encode(self, texts, **kwargs):
+        if self.fail:
+            raise RuntimeError("out of memory")
+        vectors = np.zeros((len(texts), 4), dtype=np.float32)
+        vectors[:, 0] = [len(text) for text in texts]
+        vectors[:, 1] = 1.0
+        return vectors
+
+def loaded_embedder(fail=False, **kwargs):
+    embedder = LocalEmbedder(**kwargs)
+    embedder._model = FakeModel(fail)
+    embedder._dim = 4
+    return embedder
+
+def test_model_names_distinguish_runtime_variants():
+    assert LocalEmbedder().model_name == 'local:paraphrase-multilingual-MiniLM-L12-v2'
+    assert LocalEmbedder(onnx_path='/models/minilm/').model_name == 'local:minilm-onnx'
+    assert LocalEmbedder(onnx_path='/models/minilm', quantize=True).model_name == 'local:minilm-onnx-int8'
+
+def test_concurrent_requests_share_forward_passes():
+    embedder = loaded_embedder(max_wait_ms=20, max_batch_size=64)
+    requests = [["urea"], ["a", "bb"], ["ccc"]]
+
+    async def run():
+        return await asyncio.gather(*(embedder.embed_async(texts) for texts in requests))
+
+    results = asyncio.run(run())
+
+    assert [[row[0] for row in result] for result in results] == [[4.0], [1.0, 2.0], [3.0]]
+    assert embedder.forward_passes == 1
+    assert embedder.get_stats()['max_batch_seen'] == 4
+
+def test_full_batches_flush_without_waiting():
+    embedder = loaded_embedder(max_wait_ms=10_000, max_batch_size=4)
+
+    async def run():
+        batch = asyncio.gather(embedder.embed_async(["a", "b"]), embedder.embed_async(["c", "d"]))
+        return await asyncio.wait_for(batch, timeout=2)
+
+    assert len(asyncio.run(run())) == 2
+    assert embedder.forward_passes == 1
+
+def test_batch_errors_reach_every_waiter():
+    embedder = loaded_embedder(fail=True, max_wait_ms=5)
+
+    async def run():
+        return await asyncio.gather(embedder.embed_async(["a"]), embedder.embed_async(["b"]), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(run()))
+
+def test_environment_selects_the_local_backend(monkeypatch):
+    monkeypatch.delenv('EMBEDDING_BACKEND', raising=False)
+    assert local_embedder_from_env() is None
+
+    monkeypatch.setenv('EMBEDDING_BACKEND', 'local')
+    monkeypatch.delenv('LOCAL_EMBEDDING_MODEL', raising=False)
+    monkeypatch.setenv('EMBEDDING_THREADS', '2')
+    monkeypatch.setenv('LOCAL_EMBEDDING_ONNX', '/models/minilm')
+    monkeypatch.setenv('LOCAL_EMBEDDING_INT8', 'true')
+    embedder = local_embedder_from_env()
+
+    assert embedder.model_name_or_path == DEFAULT_LOCAL_MODEL
+    assert (embedder.num_threads, embedder.onnx_path, embedder.quantize) == (2, '/models/minilm', True)
+    assert not embedder.is_loaded
+
+@pytest.mark.parametrize('recorded, expected', [(None, False), ('local:minilm', False), ('gemini', True)])
+def test_manifest_detects_a_changed_embedding_model(tmp_path, recorded, expected):
+    path = str(tmp_path / 'manifest.json')
+    manifest = IngestionManifest(path)
+    manifest.files = {'crops/rice.txt': {'hash': 'abc'}}
+    manifest.embedding_model = recorded
+    manifest.save()
+
+    reopened = IngestionManifest(path)
+    assert reopened.embedding_model == recorded
+    assert reopened.embedding_model_changed('local:minilm') is expected
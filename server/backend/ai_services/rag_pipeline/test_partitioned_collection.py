@@ -0,0 +1,72 @@
+import numpy as np
+
+from .partitioned_collection import PartitionedCollection, partition_slug
+from .vector_store import VectorStore
+
+LANGUAGES = ('en', 'ml')
+CATEGORIES = ('crops', 'Pest Control')
+
+def make_documents(count=24):
+    return [{'id': f"chunk-{i}", 'content': f"text {i}", 'language': LANGUAGES[i % 2],
+             'category': CATEGORIES[(i // 2) % 2]} for i in range(count)]
+
+def make_stores(tmp_path, count=24):
+    vectors = np.random.default_rng(0).normal(size=(count, 8)).tolist()
+    stores = []
+    for name, partitioned in (('flat', False), ('partitioned', True)):
+        store = VectorStore(str(tmp_path / name), backend='faiss', partition_collections=partitioned)
+        store.add_documents(make_documents(count), vectors)
+        stores.append(store)
+    return stores, vectors
+
+def test_partition_slugs_are_collection_name_safe():
+    assert partition_slug('Pest Control') == 'pest-control'
+    assert partition_slug('') == 'none'
+
+def test_writes_are_routed_by_language_and_category(tmp_path):
+    (_, store), _ = make_stores(tmp_path)
+
+    assert isinstance(store.collection, PartitionedCollection)
+    assert store.collection.get_partition_stats() == {'en/crops': 6, 'en/pest-control': 6,
+                                                      'ml/crops': 6, 'ml/pest-control': 6}
+    assert store.collection.count() == 24
+
+def test_queries_match_an_unpartitioned_store(tmp_path):
+    (flat, partitioned), vectors = make_stores(tmp_path)
+    queries = vectors[:3]
+
+    for filters in ({}, {'language_filter': 'ml'}, {'language_filter': 'en', 'category_filter': 'Pest Control'}):
+        expected = flat.search_many(queries, n_results=5, **filters)
+        assert all(len(results['ids']) == 5 for results in expected)
+        assert partitioned.search_many(queries, n_results=5, **filters) == expected
+
+def test_pinned_filters_touch_only_the_matching_partitions(tmp_path):
+    (_, store), _ = make_stores(tmp_path)
+    collection = store.collection
+
+    assert len(collection._targets({'$and': [{'language': 'ml'}, {'category': {'$eq': 'crops'}}]})) == 1
+    assert len(collection._targets({'language': 'en'})) == 2
+    assert len(collection._targets({'source': 'rice.txt'})) == 4
+
+def test_paging_spans_partitions_and_reopens_them(tmp_path):
+    (_, store), _ = make_stores(tmp_path)
+    collection = store.collection
+    collection.persist()
+
+    pages = [collection.get(limit=5, offset=offset)['ids'] for offset in range(0, 24, 5)]
+    filtered = collection.get(where={'language': 'ml'}, limit=4, offset=10)['ids']
+    reopened = VectorStore(str(tmp_path / 'partitioned'), backend='faiss', partition_collections=True)
+
+    assert sorted(doc_id for page in pages for doc_id in page) == sorted(f"chunk-{i}" for i in range(24))
+    assert len(filtered) == 2
+    assert reopened.collection.get_partition_stats() == collection.get_partition_stats()
+
+def test_delete_and_update_find_the_owning_partition(tmp_path):
+    (_, store), _ = make_stores(tmp_path)
+    collection = store.collection
+
+    collection.delete(where={'language': 'ml'})
+    collection.update(ids=['chunk-0'], documents=['updated'])
+
+    assert collection.count() == 12
+    assert collection.get(ids=['chunk-0'])['documents'] == ['updated']
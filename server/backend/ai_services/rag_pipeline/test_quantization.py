@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from . import quantization
+from .quantization import QUANTIZERS, ProductQuantizer, ScalarQuantizer
+
+def unit_vectors(count, dim=32, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def test_int8_round_trip_is_within_half_a_step():
+    vectors = unit_vectors(500)
+    quantizer = ScalarQuantizer()
+    quantizer.train(vectors)
+
+    codes = quantizer.encode(vectors)
+    # Values outside the trained percentile range are clipped to its ends
+    clipped = np.clip(vectors, quantizer.low, quantizer.low + 255 * quantizer.scale)
+
+    assert codes.dtype == np.uint8 and codes.shape == vectors.shape
+    assert np.all(np.abs(quantizer.decode(codes) - clipped) <= quantizer.scale / 2 + 1e-6)
+
+def test_pq_round_trip_keeps_vectors_close():
+    vectors = unit_vectors(1000)
+    quantizer = ProductQuantizer(subvector_dim=4, train_iterations=10)
+    quantizer.train(vectors)
+
+    codes = quantizer.encode(vectors)
+    decoded = quantizer.decode(codes)
+
+    assert codes.shape == (1000, quantizer.code_size(32)) == (1000, 8)
+    cosine = (decoded * vectors).sum(axis=1) / np.linalg.norm(decoded, axis=1)
+    assert cosine.mean() > 0.9
+
+@pytest.mark.parametrize('kind', ['int8', 'pq'])
+def test_scores_match_inner_products_with_decoded_vectors(kind, monkeypatch):
+    # A small scan block exercises the blocked loop
+    monkeypatch.setattr(quantization, 'SCAN_BLOCK', 64)
+    vectors = unit_vectors(300)
+    queries = unit_vectors(3, seed=1)
+    quantizer = QUANTIZERS[kind]()
+    quantizer.train(vectors)
+    codes = quantizer.encode(vectors)
+
+    scores = quantizer.scores(queries, codes)
+
+    assert scores.shape == (300, 3)
+    assert np.allclose(scores, quantizer.decode(codes) @ queries.T, atol=1e-4)
+
+@pytest.mark.parametrize('kind', ['int8', 'pq'])
+def test_state_round_trip_reproduces_codes(kind):
+    vectors = unit_vectors(300)
+    trained = QUANTIZERS[kind]()
+    trained.train(vectors)
+
+    restored = QUANTIZERS[kind]()
+    restored.load_state(trained.state())
+
+    assert restored.is_trained
+    assert np.array_equal(restored.encode(vectors), trained.encode(vectors))
+
+def test_pq_rejects_dimensions_not_divisible_by_the_subvector_size():
+    with pytest.raises(ValueError):
+        ProductQuantizer(subvector_dim=5).train(unit_vectors(10))
@@ -0,0 +1,62 @@
+import os
+
+import numpy as np
+import pytest
+
+from .quantized_backend import QuantizedCollection
+
+def random_vectors(count, dim=16, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def add_chunks(collection, start, count, seed):
+    ids = [f"chunk-{i}" for i in range(start, start + count)]
+    collection.add(ids=ids, embeddings=random_vectors(count, seed=seed).tolist(), documents=ids,
+                   metadatas=[{'language': 'en'} for _ in ids])
+    return ids
+
+@pytest.mark.parametrize('quantization', ['int8', 'pq'])
+def test_persisted_index_reopens_memory_mapped(tmp_path, quantization):
+    collection = QuantizedCollection(str(tmp_path), quantization=quantization)
+    ids = add_chunks(collection, 0, 300, seed=1)
+    query = random_vectors(1, seed=1)[0]
+    expected = collection.query([query.tolist()], n_results=3)['ids'][0]
+
+    collection.persist()
+    assert isinstance(collection.vectors, np.memmap)
+    assert not collection.get_memory_stats()['float_vectors_resident']
+
+    reopened = QuantizedCollection(str(tmp_path), quantization=quantization)
+    assert reopened.count() == len(ids)
+    assert reopened.quantizer.is_trained
+    assert reopened.query([query.tolist()], n_results=3)['ids'][0][0] == expected[0]
+
+def test_crash_before_switch_keeps_previous_generation(tmp_path, monkeypatch):
+    collection = QuantizedCollection(str(tmp_path), quantization='int8')
+    add_chunks(collection, 0, 50, seed=1)
+    collection.persist()
+    first_generation = collection.generation
+
+    add_chunks(collection, 50, 50, seed=2)
+    real_replace = os.replace
+
+    def crash_on_switch(source, target):
+        if target == collection.current_path:
+            raise OSError("simulated crash")
+        real_replace(source, target)
+
+    monkeypatch.setattr(os, 'replace', crash_on_switch)
+    with pytest.raises(OSError):
+        collection.persist()
+    monkeypatch.setattr(os, 'replace', real_replace)
+
+    # The half-written generation is ignored; rows without vectors are reconciled away
+    reopened = QuantizedCollection(str(tmp_path), quantization='int8')
+    assert reopened.generation == first_generation
+    assert len(reopened.row_ids) == 50
+    assert reopened.count() == 50
+
+    add_chunks(reopened, 100, 10, seed=3)
+    reopened.persist()
+    index_files = sorted(name for name in os.listdir(tmp_path) if name.startswith('krishi_knowledge.int8'))
+    assert index_files == [f"krishi_knowledge.int8.{reopened.generation}", 'krishi_knowledge.int8.current']
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from . import query_cache
+from .hashing_embedder import FallbackEmbedding
+from .query_cache import QueryEmbeddingCache, normalize_query
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(query_cache.time, 'monotonic', fake.monotonic)
+    return fake
+
+def test_queries_are_normalised_before_lookup():
+    cache = QueryEmbeddingCache()
+    cache.put("  Rice   BLAST\ttreatment ", [1.0])
+
+    assert normalize_query("Rice\nblast  treatment") == "rice blast treatment"
+    assert cache.get("rice blast treatment") == [1.0]
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = QueryEmbeddingCache(ttl_seconds=60)
+    cache.put("neem oil", [1.0])
+
+    clock.now += 59
+    assert cache.get("neem oil") == [1.0]
+    clock.now += 2
+    assert cache.get("neem oil") is None
+    assert cache.get_stats()['expirations'] == 1
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryEmbeddingCache(max_size=2)
+    cache.put("a", [1.0])
+    cache.put("b", [2.0])
+    cache.get("a")
+    cache.put("c", [3.0])
+
+    assert cache.get("b") is None
+    assert cache.get("a") == [1.0] and cache.get("c") == [3.0]
+    assert cache.evictions == 1
+
+def test_concurrent_misses_share_one_computation():
+    cache = QueryEmbeddingCache()
+    calls = []
+
+    async def compute(query):
+        calls.append(query)
+        await asyncio.sleep(0.01)
+        return [float(len(query))]
+
+    async def burst():
+        return await asyncio.gather(*(cache.get_or_compute(query, compute)
+                                      for query in ["Banana wilt", "banana  WILT", "banana wilt"]))
+
+    assert asyncio.run(burst()) == [[11.0]] * 3
+    assert calls == ["banana wilt"]
+    assert cache.get_stats()['coalesced'] == 2
+
+def test_failed_computation_is_raised_to_every_waiter_and_not_cached():
+    cache = QueryEmbeddingCache()
+
+    async def compute(query):
+        await asyncio.sleep(0.01)
+        raise ConnectionError("provider unavailable")
+
+    async def burst():
+        return await asyncio.gather(cache.get_or_compute("urea", compute), cache.get_or_compute("urea", compute),
+                                    return_exceptions=True)
+
+    assert all(isinstance(result, ConnectionError) for result in asyncio.run(burst()))
+    assert cache.get("urea") is None
+    assert not cache._in_flight
+
+def test_fallback_embeddings_are_returned_but_not_cached():
+    cache = QueryEmbeddingCache()
+
+    async def compute(query):
+        return FallbackEmbedding([0.5])
+
+    assert asyncio.run(cache.get_or_compute("coconut mite", compute)) == [0.5]
+    assert cache.get("coconut mite") is None
+    assert cache.fallbacks_skipped == 1
+
+def test_batch_lookup_embeds_only_the_distinct_misses():
+    cache = QueryEmbeddingCache()
+    cache.put("rice", [1.0])
+    batches = []
+
+    async def compute_many(queries):
+        batches.append(queries)
+        return [[float(len(query))] for query in queries]
+
+    results = asyncio.run(cache.get_or_compute_many(["Rice", "banana", "BANANA", "coconut"], compute_many))
+
+    assert results == [[1.0], [6.0], [6.0], [7.0]]
+    assert batches == [["banana", "coconut"]]
@@ -0,0 +1,97 @@
+import asyncio
+
+import numpy as np
+
+from .embeddings_manager import EmbeddingsManager
+from .retriever import DocumentRetriever
+from .vector_store import VectorStore
+
+TOPICS = ('rice', 'banana', 'coconut')
+
+class TopicBackend:
+    """Embeds a text as the normalised sum of the topics it mentions."""
+
+    model_name = 'topics'
+    dim = len(TOPICS)
+    is_local = True
+
+    def __call__(self, texts, task_type):
+        vectors = []
+        for text in texts:
+            vector = np.array([float(topic in text.lower()) for topic in TOPICS]) + 1e-3
+            vectors.append((vector / np.linalg.norm(vector)).tolist())
+        return vectors
+
+DOCUMENTS = [
+    ('rice-blast', "Rice blast: spray tricyclazole when lesions appear on rice leaves."),
+    ('banana-note', "Banana bunchy top spreads by aphids; tricyclazole does not control it."),
+    ('coconut-mite', "Coconut eriophyid mite causes nut damage on young coconut bunches."),
+]
+
+def make_retriever(tmp_path, **kwargs):
+    backend = TopicBackend()
+    vector_store = VectorStore(str(tmp_path / 'index'), backend='faiss')
+    vector_store.add_documents([{'id': doc_id, 'content': content, 'metadata': {'file_name': f"{doc_id}.txt"}}
+                                for doc_id, content in DOCUMENTS],
+                               backend([content for _, content in DOCUMENTS], 'retrieval_document'))
+    embeddings_manager = EmbeddingsManager(None, embedding_backend=backend)
+    return DocumentRetriever(embeddings_manager, vector_store, mmr_lambda=None, merge_adjacent=False, **kwargs)
+
+def test_lexical_only_hits_keep_cosine_similarity_and_the_threshold(tmp_path):
+    retriever = make_retriever(tmp_path)
+
+    results = asyncio.run(retriever.retrieve_relevant_documents("rice tricyclazole dose", similarity_threshold=0.7))
+
+    assert [doc['id'] for doc in results] == ['rice-blast']
+    assert results[0]['retrieval'] == 'hybrid'
+    assert results[0]['similarity'] > 0.99
+    assert results[0]['lexical_score'] == 1.0
+    # The banana chunk matches "tricyclazole" but is semantically unrelated, so it stays below the threshold
+    assert retriever.hybrid_queries == 1
+
+def test_lexical_fast_path_reports_lexical_score_only(tmp_path):
+    retriever = make_retriever(tmp_path)
+
+    results = asyncio.run(retriever.retrieve_relevant_documents("eriophyid"))
+
+    assert retriever.lexical_fast_paths == 1
+    assert results[0]['id'] == 'coconut-mite'
+    assert 'similarity' not in results[0]
+    assert results[0]['lexical_score'] == 1.0
+    assert "Keyword match: 1.00" in retriever.format_context(results)
+
+def test_fuse_results_ranks_by_reciprocal_rank(tmp_path):
+    retriever = make_retriever(tmp_path, rrf_k=60)
+    vector_docs = [{'id': 'a', 'content': '', 'metadata': {}, 'similarity': 0.9},
+                   {'id': 'b', 'content': '', 'metadata': {}, 'similarity': 0.8}]
+    lexical = [{'id': 'b', 'content': '', 'metadata': {}, 'score': 4.0},
+               {'id': 'c', 'content': '', 'metadata': {}, 'score': 2.0},
+               {'id': 'd', 'content': '', 'metadata': {}, 'score': 1.0}]
+
+    fused = retriever._fuse_results(vector_docs, lexical, top_k=5, lexical_similarities={'c': 0.75, 'd': 0.2},
+                                    similarity_threshold=0.7)
+
+    assert [doc['id'] for doc in fused] == ['b', 'a', 'c']
+    assert fused[0]['retrieval'] == 'hybrid' and fused[0]['similarity'] == 0.8
+    assert fused[2]['similarity'] == 0.75 and fused[2]['lexical_score'] == 0.5
+
+def test_retrieve_many_matches_single_queries_with_one_embedding_call(tmp_path):
+    retriever = make_retriever(tmp_path)
+    queries = ["rice tricyclazole dose", "eriophyid", "care for young coconut palms", "banana growing tips"]
+    singles = [asyncio.run(retriever.retrieve_relevant_documents(query, similarity_threshold=0.7))
+               for query in queries]
+    retriever.query_cache.clear()
+    backend = retriever.embeddings_manager.embedding_backend
+    calls = []
+
+    def recording_backend(texts, task_type):
+        calls.append(texts)
+        return backend(texts, task_type)
+
+    retriever.embeddings_manager.embedding_backend = recording_backend
+
+    batched = asyncio.run(retriever.retrieve_many(queries, similarity_threshold=0.7))
+
+    assert [[doc['id'] for doc in docs] for docs in batched] == [[doc['id'] for doc in docs] for docs in singles]
+    assert all(singles)
+    assert len(calls) == 1 and len(calls[0]) == 3  # "eriophyid" takes the lexical fast path
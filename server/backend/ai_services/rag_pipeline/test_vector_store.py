@@ -0,0 +1,29 @@
+import numpy as np
+
+from .vector_store import VectorStore
+
+def make_store(tmp_path, count=12, dim=8):
+    vectors = np.random.default_rng(0).normal(size=(count, dim))
+    store = VectorStore(str(tmp_path / 'index'), backend='faiss')
+    store.add_documents([{'id': f"chunk-{i}", 'content': f"text {i}", 'language': 'ml' if i % 3 == 0 else 'en',
+                          'category': 'crops' if i % 2 else 'pests'} for i in range(count)], vectors.tolist())
+    return store, vectors
+
+def test_search_many_matches_individual_searches(tmp_path):
+    store, vectors = make_store(tmp_path)
+    queries = vectors[[1, 4, 7]].tolist()
+
+    batched = store.search_many(queries, n_results=3)
+
+    assert batched == [store.search(query, n_results=3) for query in queries]
+    assert [results['ids'][0] for results in batched] == ['chunk-1', 'chunk-4', 'chunk-7']
+    assert store.search_many([]) == []
+
+def test_search_many_applies_language_and_category_filters(tmp_path):
+    store, vectors = make_store(tmp_path)
+
+    results = store.search_many(vectors[:2].tolist(), n_results=12, language_filter='ml', category_filter='crops')
+
+    for query_results in results:
+        assert sorted(query_results['ids']) == ['chunk-3', 'chunk-9']
+        assert all(metadata['category'] == 'crops' for metadata in query_results['metadatas'])
@@ -0,0 +1,20 @@
+import math
+import re
+
+WORD_PATTERN = re.compile(r'\S+')
+MALAYALAM_PATTERN = re.compile(r'[\u0D00-\u0D7F]')
+
+def estimate_word_tokens(word: str) -> int:
+    """Rough subword token count for a single whitespace-delimited word.
+
+    Latin-script words average about four characters per token. Malayalam is
+    split far more aggressively by multilingual tokenizers, so it is counted at
+    about two characters per token.
+    """
+    malayalam_chars = len(MALAYALAM_PATTERN.findall(word))
+    other_chars = len(word) - malayalam_chars
+    return max(1, math.ceil(malayalam_chars / 2) + math.ceil(other_chars / 4))
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for a piece of text without loading a tokenizer."""
+    return sum(estimate_word_tokens(match.group()) for match in WORD_PATTERN.finditer(text))
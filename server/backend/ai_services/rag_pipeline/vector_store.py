@@ -3,42 +3,204 @@ from chromadb.config import Settings
 from typing import List, Dict, Any, Optional
 import json
 import os
+import threading
+import time
+from types import SimpleNamespace
+import numpy as np
+
+from .index_versions import read_active_version, version_directory
+
+COLLECTION_NAME = "krishi_knowledge"
 
 class VectorStore:
-    def __init__(self, persist_directory: str = "./data/embeddings"):
-        self.persist_directory = persist_directory
+    BACKENDS = ('chroma', 'faiss', 'int8', 'pq')
+    
+    def __init__(self, persist_directory: str = "./data/embeddings", backend: str = "chroma",
+                 faiss_index_factory: str = "Flat", rerank_factor: int = 4,
+                 partition_collections: bool = False, version: Optional[str] = None,
+                 refresh_interval: float = 5.0):
+        """Open the knowledge collection with the chosen backend.
+
+        ``chroma`` uses a Chroma PersistentClient; ``faiss`` keeps an in-process
+        FAISS index with a SQLite metadata side table under ``<persist_directory>/faiss``.
+        ``int8`` and ``pq`` keep only compressed codes in memory and re-rank the
+        top ``rerank_factor`` x candidates with float vectors read from disk.
+        With ``partition_collections`` every (language, category) pair gets its
+        own collection. All expose the same collection API, so callers are
+        backend-agnostic.
+
+        Full rebuilds go into versioned directories under ``persist_directory``
+        (see index_versions). Without an explicit ``version`` the store opens the
+        active one and, every ``refresh_interval`` seconds, checks whether a new
+        version was activated; it then opens and warms the new index in the
+        background and switches to it in one step, so queries only ever see a
+        complete index. Stores built before versioning open the root directory.
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown vector store backend: {backend}")
+        self.root_directory = persist_directory
+        self.backend = backend
+        self.faiss_index_factory = faiss_index_factory
+        self.rerank_factor = rerank_factor
+        self.partition_collections = partition_collections
+        # A pinned version (e.g. one being built) never follows the active pointer
+        self.follow_active = version is None
+        self.refresh_interval = refresh_interval
+        self._last_refresh_check = time.monotonic()
+        self._switch_lock = threading.Lock()
+        self._switch_listeners = []
+        # Writes made through this process; ingestion in other processes shows up as a manifest change
+        self.write_count = 0
+        
+        self._apply_index(self._open_index(read_active_version(persist_directory) if version is None else version))
+    
+    def _open_index(self, version: Optional[str]) -> SimpleNamespace:
+        """Open one index version (None: the unversioned root) without touching the live state."""
+        persist_directory = version_directory(self.root_directory, version) if version else self.root_directory
+        # Each backend keeps its own files (and ingestion manifest) so switching never mixes indexes
+        index_directory = persist_directory if self.backend == "chroma" else os.path.join(persist_directory, self.backend)
         os.makedirs(persist_directory, exist_ok=True)
         
         # Initialize ChromaDB
-        self.client = chromadb.PersistentClient(
-            path=persist_directory,
-            settings=Settings(
-                anonymized_telemetry=False,
-                allow_reset=True
+        client = None
+        if self.backend == "chroma":
+            client = chromadb.PersistentClient(
+                path=persist_directory,
+                settings=Settings(
+                    anonymized_telemetry=False,
+                    allow_reset=True
+                )
             )
-        )
+        
+        def open_collection(name: str):
+            return self._open_collection(name, index_directory, client)
         
         # Create collection for agricultural knowledge
-        self.collection = self.client.get_or_create_collection(
-            name="krishi_knowledge",
+        if self.partition_collections:
+            from .partitioned_collection import PartitionedCollection
+            collection = PartitionedCollection(open_collection, self._existing_collection_names(index_directory, client),
+                                               name=COLLECTION_NAME)
+        else:
+            collection = open_collection(COLLECTION_NAME)
+        return SimpleNamespace(version=version, persist_directory=persist_directory,
+                               index_directory=index_directory, client=client, collection=collection)
+    
+    def _apply_index(self, index: SimpleNamespace):
+        self.version = index.version
+        self.persist_directory = index.persist_directory
+        self.index_directory = index.index_directory
+        self.client = index.client
+        # Queries read self.collection once per call, so this assignment is the switch
+        self.collection = index.collection
+    
+    def _open_collection(self, name: str, index_directory: str, client):
+        # In-process backends are imported lazily so Chroma-only deployments do not need faiss installed
+        if self.backend == "faiss":
+            from .faiss_backend import FaissCollection
+            return FaissCollection(index_directory, name=name, index_factory=self.faiss_index_factory)
+        if self.backend in ("int8", "pq"):
+            from .quantized_backend import QuantizedCollection
+            return QuantizedCollection(index_directory, name=name, quantization=self.backend,
+                                       rerank_factor=self.rerank_factor)
+        return client.get_or_create_collection(
+            name=name,
             metadata={"hnsw:space": "cosine"}
         )
     
+    @staticmethod
+    def _existing_collection_names(index_directory: str, client) -> List[str]:
+        if client:
+            # Older Chroma clients return collection objects, newer ones return names
+            return [getattr(collection, 'name', collection) for collection in client.list_collections()]
+        if not os.path.isdir(index_directory):
+            return []
+        return [file_name[:-len('.sqlite3')] for file_name in os.listdir(index_directory)
+                if file_name.endswith('.sqlite3')]
+    
+    def add_switch_listener(self, listener):
+        """Call ``listener(index)`` with a new, warmed index version just before queries switch to it."""
+        self._switch_listeners.append(listener)
+    
+    def maybe_refresh(self):
+        """Start switching to a newly activated index version, checking at most every refresh_interval."""
+        if not self.follow_active or time.monotonic() - self._last_refresh_check < self.refresh_interval:
+            return
+        self._last_refresh_check = time.monotonic()
+        version = read_active_version(self.root_directory)
+        if version and version != self.version and self._switch_lock.acquire(blocking=False):
+            # Opening and warming a large index takes a while; queries keep using the current one meanwhile
+            threading.Thread(target=self._switch_to, args=(version,), name='index-switch', daemon=True).start()
+    
+    def _switch_to(self, version: str):
+        try:
+            index = self._open_index(version)
+            # Load the new index into memory before the first real query hits it
+            sample = index.collection.get(limit=1, include=['embeddings'])
+            if sample['ids']:
+                index.collection.query(query_embeddings=[list(sample['embeddings'][0])], n_results=1)
+            for listener in self._switch_listeners:
+                listener(index)
+            previous = self.version
+            self._apply_index(index)
+            print(f"Vector store switched from index version {previous} to {version}")
+        except Exception as e:
+            print(f"Error switching to index version {version}: {str(e)}")
+        finally:
+            self._switch_lock.release()
+    
+    def index_version(self, index: Optional[SimpleNamespace] = None) -> str:
+        """Changes whenever the live index (or ``index``, an opened version) changes:
+        by a version switch, by ingestion in another process, or by a write through this store."""
+        index = index or self
+        try:
+            mtime = os.stat(self._manifest_path(index.index_directory)).st_mtime_ns
+        except FileNotFoundError:
+            mtime = 'missing'
+        return f"{index.version or 'root'}:{mtime}:{self.write_count}"
+    
+    def _manifest_path(self, index_directory: str) -> str:
+        file_name = "ingestion_manifest.partitioned.json" if self.partition_collections else "ingestion_manifest.json"
+        return os.path.join(index_directory, file_name)
+    
+    @property
+    def manifest_path(self) -> str:
+        """Ingestion manifest tracking what this backend's index contains."""
+        return self._manifest_path(self.index_directory)
+    
+    def flush(self):
+        """Persist pending index changes; Chroma writes through, so this only matters for in-process backends."""
+        try:
+            persist = getattr(self.collection, 'persist', None)
+            if persist:
+                persist()
+            return True
+        except Exception as e:
+            print(f"Error persisting vector store: {str(e)}")
+            return False
+    
+    def _prepare_documents(self, documents: List[Dict[str, Any]]):
+        """Split documents into ids, contents and metadata with language and source info."""
+        ids = [doc['id'] for doc in documents]
+        contents = [doc['content'] for doc in documents]
+        metadatas = [doc.get('metadata', {}) for doc in documents]
+        
+        # Add language and source info to metadata
+        for i, doc in enumerate(documents):
+            metadatas[i].update({
+                'language': doc.get('language', 'en'),
+                'category': doc.get('category', 'general'),
+                'source': doc.get('source', ''),
+                'chunk_index': doc.get('chunk_index', 0)
+            })
+        
+        return ids, contents, metadatas
+    
     def add_documents(self, documents: List[Dict[str, Any]], embeddings: List[List[float]]):
         """Add documents with embeddings to the vector store."""
         try:
-            ids = [doc['id'] for doc in documents]
-            contents = [doc['content'] for doc in documents]
-            metadatas = [doc.get('metadata', {}) for doc in documents]
-            
-            # Add language and source info to metadata
-            for i, doc in enumerate(documents):
-                metadatas[i].update({
-                    'language': doc.get('language', 'en'),
-                    'source': doc.get('source', ''),
-                    'chunk_index': doc.get('chunk_index', 0)
-                })
+            ids, contents, metadatas = self._prepare_documents(documents)
             
+            self.write_count += 1
             self.collection.add(
                 embeddings=embeddings,
                 documents=contents,
@@ -52,34 +214,108 @@ class VectorStore:
             print(f"Error adding documents to vector store: {str(e)}")
             return False
     
+    def upsert_documents(self, documents: List[Dict[str, Any]], embeddings: List[List[float]]):
+        """Insert new documents and overwrite existing ones with the same ids."""
+        try:
+            ids, contents, metadatas = self._prepare_documents(documents)
+            
+            self.write_count += 1
+            self.collection.upsert(
+                embeddings=embeddings,
+                documents=contents,
+                metadatas=metadatas,
+                ids=ids
+            )
+            
+            return True
+            
+        except Exception as e:
+            print(f"Error upserting documents to vector store: {str(e)}")
+            return False
+    
+    def delete_documents(self, doc_ids: List[str]):
+        """Delete several documents by ID."""
+        if not doc_ids:
+            return True
+        try:
+            self.write_count += 1
+            self.collection.delete(ids=doc_ids)
+            return True
+        except Exception as e:
+            print(f"Error deleting documents: {str(e)}")
+            return False
+    
+    def delete_by_source(self, source: str):
+        """Delete every chunk that was ingested from the given source file."""
+        try:
+            self.write_count += 1
+            self.collection.delete(where={"source": source})
+            return True
+        except Exception as e:
+            print(f"Error deleting documents for source {source}: {str(e)}")
+            return False
+    
+    @staticmethod
+    def build_where(language_filter: Optional[str] = None,
+                    category_filter: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Equality filter on the first-class language/category metadata fields."""
+        conditions = []
+        if language_filter:
+            conditions.append({"language": language_filter})
+        if category_filter:
+            conditions.append({"category": category_filter})
+        if not conditions:
+            return None
+        return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+    
     def search(self, query_embedding: List[float], n_results: int = 5, 
-               language_filter: Optional[str] = None) -> Dict[str, Any]:
+               language_filter: Optional[str] = None, category_filter: Optional[str] = None) -> Dict[str, Any]:
         """Search for similar documents."""
+        return self.search_many([query_embedding], n_results, language_filter, category_filter)[0]
+    
+    def search_many(self, query_embeddings: List[List[float]], n_results: int = 5,
+                    language_filter: Optional[str] = None,
+                    category_filter: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Search for several queries in one collection call; returns one result dict per query."""
+        if not query_embeddings:
+            return []
+        self.maybe_refresh()
         try:
-            where_clause = {}
-            if language_filter:
-                where_clause["language"] = language_filter
-            
             results = self.collection.query(
-                query_embeddings=[query_embedding],
+                query_embeddings=query_embeddings,
                 n_results=n_results,
-                where=where_clause if where_clause else None,
+                where=self.build_where(language_filter, category_filter),
                 include=['documents', 'metadatas', 'distances']
             )
             
-            return {
-                'documents': results['documents'][0],
-                'metadatas': results['metadatas'][0],
-                'distances': results['distances'][0]
-            }
+            return [{
+                'ids': results['ids'][i],
+                'documents': results['documents'][i],
+                'metadatas': results['metadatas'][i],
+                'distances': results['distances'][i]
+            } for i in range(len(query_embeddings))]
             
         except Exception as e:
             print(f"Error searching vector store: {str(e)}")
-            return {'documents': [], 'metadatas': [], 'distances': []}
+            return [{'ids': [], 'documents': [], 'metadatas': [], 'distances': []} for _ in query_embeddings]
     
+    def get_embeddings(self, ids: List[str]) -> Dict[str, np.ndarray]:
+        """Stored embeddings for the given chunk ids as float32 rows; unknown ids are left out."""
+        if not ids:
+            return {}
+        try:
+            results = self.collection.get(ids=list(ids), include=['embeddings'])
+            if not results['ids']:
+                return {}
+            return dict(zip(results['ids'], np.asarray(results['embeddings'], dtype=np.float32)))
+        except Exception as e:
+            print(f"Error fetching embeddings: {str(e)}")
+            return {}
+
     def update_document(self, doc_id: str, content: str, embedding: List[float], metadata: Dict[str, Any]):
         """Update an existing document."""
         try:
+            self.write_count += 1
             self.collection.update(
                 ids=[doc_id],
                 embeddings=[embedding],
@@ -94,6 +330,7 @@ class VectorStore:
     def delete_document(self, doc_id: str):
         """Delete a document by ID."""
         try:
+            self.write_count += 1
             self.collection.delete(ids=[doc_id])
             return True
         except Exception as e:
@@ -104,10 +341,13 @@ class VectorStore:
         """Get statistics about the collection."""
         try:
             count = self.collection.count()
-            return {
+            stats = {
                 'total_documents': count,
                 'collection_name': self.collection.name
             }
+            if self.partition_collections:
+                stats['partitions'] = self.collection.get_partition_stats()
+            return stats
         except Exception as e:
             print(f"Error getting collection stats: {str(e)}")
             return {'total_documents': 0, 'collection_name': ''}
@@ -0,0 +1,117 @@
+from typing import Dict, Any, List, Optional, Callable, Iterable
+import asyncio
+import time
+
+class ServiceRegistry:
+    """Services built on first use, or in parallel at startup.
+
+    Each service is registered with a factory and the names of the services
+    it needs; those are built first (concurrently with each other) and passed
+    to the factory as keyword arguments. Factories are synchronous and often
+    import heavy SDKs or configure API clients, so they run in worker threads
+    and independent services build at the same time. The registry is ready
+    once every service marked ``critical`` has been built. A failed build is
+    retried by the first caller after ``retry_interval`` seconds; until then
+    callers get the failure straight away.
+    """
+
+    def __init__(self, retry_interval: float = 10.0):
+        self.retry_interval = retry_interval
+        self._factories: Dict[str, Callable[..., Any]] = {}
+        self._dependencies: Dict[str, List[str]] = {}
+        self._builds: Dict[str, asyncio.Task] = {}
+        self.critical: List[str] = []
+        self.services: Dict[str, Any] = {}
+        self.build_seconds: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self._failed_at: Dict[str, float] = {}
+
+    def register(self, name: str, factory: Callable[..., Any], dependencies: Iterable[str] = (),
+                 critical: bool = False):
+        self._factories[name] = factory
+        self._dependencies[name] = list(dependencies)
+        if critical:
+            self.critical.append(name)
+
+    @property
+    def ready(self) -> bool:
+        """True once every critical service (and so everything it depends on) is built."""
+        return all(name in self.services for name in self.critical)
+
+    @property
+    def failed(self) -> List[str]:
+        """Critical services whose last build failed (themselves or through a dependency), none retrying."""
+        return [name for name in self.critical if name not in self.services and self._build_failed(name)]
+
+    def _build_failed(self, name: str) -> bool:
+        build = self._builds.get(name)
+        return build is not None and build.done() and (build.cancelled() or build.exception() is not None)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.services
+
+    async def get(self, name: str) -> Any:
+        """The named service, building it (and its dependencies) if needed.
+
+        Concurrent callers share one build. A failed build is retried by the
+        first caller after ``retry_interval``; earlier callers get its error.
+        """
+        if name in self.services:
+            return self.services[name]
+        if name not in self._factories:
+            raise KeyError(f"Unknown service: {name}")
+
+        build = self._builds.get(name)
+        if build is not None and self._build_failed(name):
+            if time.monotonic() - self._failed_at.get(name, 0.0) < self.retry_interval and not build.cancelled():
+                raise build.exception()
+            build = None
+        if build is None:
+            build = asyncio.ensure_future(self._build(name))
+            self._builds[name] = build
+        # A cancelled request must not cancel a build other requests are waiting for
+        return await asyncio.shield(build)
+
+    async def _build(self, name: str) -> Any:
+        dependencies = self._dependencies[name]
+        try:
+            resolved = await asyncio.gather(*(self.get(dependency) for dependency in dependencies))
+            start = time.perf_counter()
+            service = await asyncio.to_thread(self._factories[name], **dict(zip(dependencies, resolved)))
+        except Exception as e:
+            self.errors[name] = str(e)
+            self._failed_at[name] = time.monotonic()
+            print(f"Error initializing service {name}: {str(e)}")
+            raise
+        self.build_seconds[name] = time.perf_counter() - start
+        self.errors.pop(name, None)
+        self.services[name] = service
+        return service
+
+    async def start(self, names: Optional[Iterable[str]] = None) -> bool:
+        """Build the given services (default: the critical ones) in parallel; returns readiness."""
+        names = list(names) if names is not None else self.critical
+        await asyncio.gather(*(self.get(name) for name in names), return_exceptions=True)
+        return self.ready
+
+    def status(self) -> Dict[str, Any]:
+        """Per-service state (ready, building, failed or lazy) with build times."""
+        services = {}
+        for name in self._factories:
+            build = self._builds.get(name)
+            if name in self.services:
+                state = 'ready'
+            elif name in self.errors:
+                state = 'failed'
+            elif build is not None and not build.done():
+                state = 'building'
+            else:
+                state = 'lazy'
+            services[name] = {
+                'status': state,
+                'critical': name in self.critical,
+                'type': type(self.services[name]).__name__ if name in self.services else None,
+                'build_seconds': self.build_seconds.get(name),
+                'error': self.errors.get(name)
+            }
+        return {'ready': self.ready, 'failed': self.failed, 'services': services}
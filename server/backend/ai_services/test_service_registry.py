@@ -0,0 +1,76 @@
+import asyncio
+import time
+
+import pytest
+
+from .service_registry import ServiceRegistry
+
+class FlakyFactory:
+    """Factory that raises for its first ``failures`` calls."""
+
+    def __init__(self, failures: int = 0, delay: float = 0.0):
+        self.failures = failures
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self, **dependencies):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.calls <= self.failures:
+            raise RuntimeError("backend unavailable")
+        return {'built': self.calls, **dependencies}
+
+def test_dependencies_are_built_once_and_passed_in():
+    async def scenario():
+        registry = ServiceRegistry()
+        store = FlakyFactory()
+        registry.register('store', store)
+        registry.register('retriever', FlakyFactory(), ['store'])
+        registry.register('handler', FlakyFactory(), ['store', 'retriever'], critical=True)
+
+        assert await registry.start()
+        handler = await registry.get('handler')
+        assert handler['store'] is registry.services['store']
+        assert handler['retriever']['store'] is registry.services['store']
+        assert store.calls == 1
+
+    asyncio.run(scenario())
+
+def test_concurrent_callers_share_one_build():
+    async def scenario():
+        registry = ServiceRegistry()
+        factory = FlakyFactory(delay=0.05)
+        registry.register('model', factory)
+        results = await asyncio.gather(*(registry.get('model') for _ in range(5)))
+        assert all(result is results[0] for result in results)
+        assert factory.calls == 1
+
+    asyncio.run(scenario())
+
+def test_failed_critical_build_is_reported_and_retried_after_interval():
+    async def scenario():
+        registry = ServiceRegistry(retry_interval=0.1)
+        store = FlakyFactory(failures=1)
+        registry.register('store', store)
+        registry.register('handler', FlakyFactory(), ['store'], critical=True)
+
+        assert not await registry.start()
+        assert registry.failed == ['handler']
+        assert registry.status()['services']['store']['status'] == 'failed'
+
+        # Within the retry interval callers get the error without another build
+        with pytest.raises(RuntimeError):
+            await registry.get('handler')
+        assert store.calls == 1
+
+        await asyncio.sleep(0.15)
+        assert await registry.start()
+        assert registry.failed == []
+        assert store.calls == 2
+        assert registry.status()['services']['handler']['error'] is None
+
+    asyncio.run(scenario())
+
+def test_unknown_service():
+    with pytest.raises(KeyError):
+        asyncio.run(ServiceRegistry().get('missing'))
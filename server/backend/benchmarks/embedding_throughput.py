@@ -0,0 +1,91 @@
+# server/backend/benchmarks/embedding_throughput.py
+"""Offline throughput benchmark for EmbeddingsManager batching.
+
+Run from server/backend:
+    python -m benchmarks.embedding_throughput --chunks 2000 --latency 0.05
+"""
+import argparse
+import asyncio
+import hashlib
+import time
+from typing import List
+
+import numpy as np
+
+from ai_services.rag_pipeline.embeddings_manager import EmbeddingsManager
+
+class StubEmbeddingBackend:
+    """Local stand-in for a remote provider: fixed per-call latency plus per-text cost."""
+
+    def __init__(self, dim: int = 768, call_latency: float = 0.05, per_text_latency: float = 0.0005):
+        self.dim = dim
+        self.call_latency = call_latency
+        self.per_text_latency = per_text_latency
+        self.calls = 0
+
+    def __call__(self, texts: List[str], task_type: str) -> List[List[float]]:
+        self.calls += 1
+        time.sleep(self.call_latency + self.per_text_latency * len(texts))
+        vectors = []
+        for text in texts:
+            seed = int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=4).digest(), 'little')
+            vectors.append(np.random.default_rng(seed).standard_normal(self.dim).tolist())
+        return vectors
+
+async def run_sequential_baseline(backend: StubEmbeddingBackend, texts: List[str]) -> float:
+    """Reproduce the previous behaviour: one call per text and a 0.1s pause per 10 texts."""
+    start = time.perf_counter()
+    for i in range(0, len(texts), 10):
+        for text in texts[i:i + 10]:
+            await asyncio.to_thread(backend, [text], "retrieval_document")
+        await asyncio.sleep(0.1)
+    return time.perf_counter() - start
+
+async def run_batched(backend: StubEmbeddingBackend, texts: List[str], batch_size: int,
+                      concurrency: int, rate: float) -> float:
+    manager = EmbeddingsManager(
+        None,
+        batch_size=batch_size,
+        max_concurrent_batches=concurrency,
+        requests_per_second=rate,
+        embedding_backend=backend
+    )
+    start = time.perf_counter()
+    embeddings = await manager.generate_batch_embeddings(texts)
+    elapsed = time.perf_counter() - start
+
+    # Batched results must come back in input order
+    expected = backend([texts[0], texts[-1]], "retrieval_document")
+    assert np.allclose(embeddings[0], expected[0]) and np.allclose(embeddings[-1], expected[1])
+    return elapsed
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding throughput against a stub backend")
+    parser.add_argument('--chunks', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=20.0, help="Initial provider requests per second")
+    parser.add_argument('--latency', type=float, default=0.05, help="Stub per-call latency in seconds")
+    parser.add_argument('--baseline-chunks', type=int, default=200,
+                        help="Chunks used for the slow sequential baseline")
+    args = parser.parse_args()
+
+    texts = [f"Rice cultivation chunk {i}: maintain 2-3 cm water depth during tillering." for i in range(args.chunks)]
+
+    baseline_backend = StubEmbeddingBackend(call_latency=args.latency)
+    baseline_texts = texts[:args.baseline_chunks]
+    baseline_time = await run_sequential_baseline(baseline_backend, baseline_texts)
+
+    batched_backend = StubEmbeddingBackend(call_latency=args.latency)
+    batched_time = await run_batched(batched_backend, texts, args.batch_size, args.concurrency, args.rate)
+
+    baseline_rate = len(baseline_texts) / baseline_time
+    batched_rate = len(texts) / batched_time
+    print(f"Sequential baseline: {len(baseline_texts)} chunks in {baseline_time:.2f}s "
+          f"({baseline_rate:.1f} chunks/s, {baseline_backend.calls} calls)")
+    print(f"Batched concurrent: {len(texts)} chunks in {batched_time:.2f}s "
+          f"({batched_rate:.1f} chunks/s, {batched_backend.calls - 1} calls)")
+    print(f"Speedup: {batched_rate / baseline_rate:.1f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,168 @@
+# server/backend/benchmarks/local_embedding.py
+"""Latency and throughput of local embedding backends against the remote provider.
+
+Every backend is driven through EmbeddingsManager (without the embedding
+cache) in three scenarios:
+  * sequential single queries (p50/p95 per query),
+  * concurrent clients issuing single queries, where LocalEmbedder
+    micro-batches requests across clients,
+  * bulk ingestion of chunks with generate_batch_embeddings.
+
+The remote provider is emulated by a stub with a fixed per-call latency plus
+exponential jitter, so the run is offline; pass --provider gemini to call
+the real API instead (needs GEMINI_API_KEY). Local backends need
+sentence-transformers, or an exported ONNX model directory for the onnx
+variants.
+
+Run from server/backend:
+    python -m benchmarks.local_embedding --local st onnx-int8 --onnx-path ./models/minilm-onnx --threads 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+from typing import List, Dict, Any
+
+import numpy as np
+
+from ai_services.rag_pipeline.embeddings_manager import EmbeddingsManager
+from ai_services.rag_pipeline.local_embedder import LocalEmbedder, DEFAULT_LOCAL_MODEL
+from benchmarks.embedding_throughput import StubEmbeddingBackend
+
+GOLDEN_DIR = os.path.join(os.path.dirname(__file__), 'golden')
+
+class JitteryProviderBackend(StubEmbeddingBackend):
+    """Remote provider stand-in: fixed call latency plus exponentially distributed network jitter."""
+
+    def __init__(self, dim: int = 768, call_latency: float = 0.08, jitter: float = 0.04, seed: int = 0):
+        super().__init__(dim=dim, call_latency=call_latency)
+        self.jitter = jitter
+        self.rng = np.random.default_rng(seed)
+
+    def __call__(self, texts: List[str], task_type: str) -> List[List[float]]:
+        time.sleep(self.rng.exponential(self.jitter))
+        return super().__call__(texts, task_type)
+
+def load_texts() -> Dict[str, List[str]]:
+    """Golden queries and corpus sentences (English and Malayalam) as benchmark inputs."""
+    with open(os.path.join(GOLDEN_DIR, 'queries.json'), 'r', encoding='utf-8') as f:
+        queries = [query['query'] for query in json.load(f)['queries']]
+    chunks = []
+    corpus = os.path.join(GOLDEN_DIR, 'corpus')
+    for root, _, files in os.walk(corpus):
+        for file_name in sorted(files):
+            with open(os.path.join(root, file_name), 'r', encoding='utf-8') as f:
+                chunks.extend(sentence.strip() for sentence in re.split(r'(?<=[.!?])\s+', f.read())
+                              if len(sentence.split()) > 3)
+    return {'queries': queries, 'chunks': chunks}
+
+def percentiles(latencies: List[float]) -> Dict[str, float]:
+    values = np.asarray(latencies) * 1000
+    return {'p50_ms': float(np.percentile(values, 50)), 'p95_ms': float(np.percentile(values, 95)),
+            'mean_ms': float(values.mean())}
+
+async def timed_query(manager: EmbeddingsManager, query: str) -> float:
+    start = time.perf_counter()
+    await manager.generate_embedding(query, task_type="retrieval_query")
+    return time.perf_counter() - start
+
+async def benchmark_backend(name: str, backend, texts: Dict[str, List[str]], args) -> Dict[str, Any]:
+    # No backend means the real provider: EmbeddingsManager's default Gemini backend
+    manager = EmbeddingsManager(os.getenv("GEMINI_API_KEY") if backend is None else None,
+                                requests_per_second=args.rate, embedding_backend=backend)
+    queries = (texts['queries'] * (args.queries // len(texts['queries']) + 1))[:args.queries]
+    result: Dict[str, Any] = {'backend': name, 'model': manager.model_name}
+
+    start = time.perf_counter()
+    await timed_query(manager, queries[0])
+    result['first_query_ms'] = (time.perf_counter() - start) * 1000
+
+    result['sequential'] = percentiles([await timed_query(manager, query) for query in queries])
+
+    start = time.perf_counter()
+    latencies = []
+    for offset in range(0, len(queries), args.clients):
+        latencies.extend(await asyncio.gather(*(timed_query(manager, query)
+                                                for query in queries[offset:offset + args.clients])))
+    elapsed = time.perf_counter() - start
+    result['concurrent'] = dict(percentiles(latencies), clients=args.clients,
+                                queries_per_second=len(queries) / elapsed)
+
+    chunks = (texts['chunks'] * (args.chunks // len(texts['chunks']) + 1))[:args.chunks]
+    # Distinct texts, so the manager's de-duplication does not shrink the batch
+    chunks = [f"{chunk} ({i})" for i, chunk in enumerate(chunks)]
+    start = time.perf_counter()
+    await manager.generate_batch_embeddings(chunks)
+    elapsed = time.perf_counter() - start
+    result['bulk'] = {'chunks': len(chunks), 'seconds': elapsed, 'chunks_per_second': len(chunks) / elapsed}
+    result['fallback_batches'] = manager.fallback_batches
+    if hasattr(backend, 'get_stats'):
+        result['backend_stats'] = backend.get_stats()
+    return result
+
+def build_local(variant: str, args) -> LocalEmbedder:
+    onnx_path = args.onnx_path if variant.startswith('onnx') else None
+    if variant.startswith('onnx') and not onnx_path:
+        raise ValueError("--onnx-path is required for ONNX variants")
+    return LocalEmbedder(args.model, num_threads=args.threads, onnx_path=onnx_path,
+                         quantize=variant == 'onnx-int8', max_wait_ms=args.batch_wait_ms)
+
+async def main():
+    parser = argparse.ArgumentParser(description="Compare local embedding backends with the remote provider")
+    parser.add_argument('--provider', choices=['stub', 'gemini', 'none'], default='stub')
+    parser.add_argument('--provider-latency', type=float, default=0.08, help="Stub per-call latency in seconds")
+    parser.add_argument('--provider-jitter', type=float, default=0.04, help="Stub mean extra jitter in seconds")
+    parser.add_argument('--rate', type=float, default=20.0, help="Provider requests per second")
+    parser.add_argument('--local', nargs='*', choices=['st', 'onnx', 'onnx-int8'], default=['st'])
+    parser.add_argument('--model', default=DEFAULT_LOCAL_MODEL)
+    parser.add_argument('--onnx-path', help="Directory with model.onnx and tokenizer.json")
+    parser.add_argument('--threads', type=int, default=None, help="Inference threads for local backends")
+    parser.add_argument('--batch-wait-ms', type=float, default=2.0, help="Micro-batching window; 0 disables")
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--chunks', type=int, default=1000)
+    parser.add_argument('--output', help="Optional JSON report path")
+    args = parser.parse_args()
+
+    texts = load_texts()
+    backends = []
+    if args.provider == 'stub':
+        backends.append(('provider-stub', JitteryProviderBackend(call_latency=args.provider_latency,
+                                                                 jitter=args.provider_jitter)))
+    elif args.provider == 'gemini':
+        backends.append(('gemini', None))
+
+    load_seconds = {}
+    for variant in args.local:
+        try:
+            embedder = build_local(variant, args)
+            start = time.perf_counter()
+            embedder.load()
+            load_seconds[variant] = time.perf_counter() - start
+        except Exception as e:
+            print(f"{variant:<14} skipped: {str(e)}")
+            continue
+        backends.append((variant, embedder))
+
+    results = []
+    print(f"{'backend':<14} {'load s':>7} {'seq p50':>8} {'seq p95':>8} {'conc p95':>9} {'q/s':>8} {'bulk/s':>8}")
+    for name, backend in backends:
+        result = await benchmark_backend(name, backend, texts, args)
+        result['load_seconds'] = load_seconds.get(name)
+        results.append(result)
+        load = f"{result['load_seconds']:.2f}" if result['load_seconds'] is not None else '-'
+        print(f"{name:<14} {load:>7} {result['sequential']['p50_ms']:>8.1f} {result['sequential']['p95_ms']:>8.1f} "
+              f"{result['concurrent']['p95_ms']:>9.1f} {result['concurrent']['queries_per_second']:>8.1f} "
+              f"{result['bulk']['chunks_per_second']:>8.1f}")
+        if result['fallback_batches']:
+            print(f"{'':<14} warning: {result['fallback_batches']} batches fell back to hashing embeddings")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=2)
+        print(f"Report written to {args.output}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+# server/backend/benchmarks/quantization_report.py
+"""Memory versus recall report for the quantized VectorStore backends.
+
+Run from server/backend:
+    python -m benchmarks.quantization_report --chunks 20000 --queries 300
+"""
+import argparse
+import tempfile
+
+from ai_services.rag_pipeline.vector_store import VectorStore
+from benchmarks.vector_search import make_corpus, make_queries, exact_neighbours, build_store, run_queries
+
+def main():
+    parser = argparse.ArgumentParser(description="Report resident memory and recall for int8 and PQ storage")
+    parser.add_argument('--chunks', type=int, default=20000)
+    parser.add_argument('--dim', type=int, default=768)
+    parser.add_argument('--queries', type=int, default=300)
+    parser.add_argument('--n-results', type=int, default=10)
+    parser.add_argument('--rerank-factors', type=int, nargs='+', default=[0, 4, 10])
+    parser.add_argument('--project-to', type=int, default=1_000_000,
+                        help="Corpus size used for the projected resident memory column")
+    args = parser.parse_args()
+
+    documents, vectors, languages, rng = make_corpus(args.chunks, args.dim)
+    queries = make_queries(rng, vectors, args.queries)
+    truth = exact_neighbours(vectors, languages, queries, args.n_results)
+
+    print(f"{args.chunks} chunks x {args.dim} dims, {args.queries} queries, recall@{args.n_results}")
+    print(f"{'storage':<8} {'rerank':>6} {'bytes/vec':>10} {f'MB @ {args.project_to}':>14} "
+          f"{'recall':>7} {'p50 ms':>8} {'p99 ms':>8}")
+
+    float_bytes = args.dim * 4 + 8
+    print(f"{'float32':<8} {'-':>6} {float_bytes:>10.0f} {float_bytes * args.project_to / 2**20:>14.0f} "
+          f"{1.0:>7.3f} {'-':>8} {'-':>8}")
+
+    for backend in ('int8', 'pq'):
+        with tempfile.TemporaryDirectory() as directory:
+            store = build_store(backend, directory, documents, vectors)
+            memory = store.collection.get_memory_stats()
+            if memory['float_vectors_resident']:
+                print(f"{backend:<8} warning: float vectors are still resident; bytes/vec includes them")
+            for rerank_factor in args.rerank_factors:
+                store.collection.rerank_factor = rerank_factor
+                stats = run_queries(store, queries, args.n_results, None, truth)
+                print(f"{backend:<8} {rerank_factor:>6} {memory['bytes_per_vector']:>10.0f} "
+                      f"{memory['bytes_per_vector'] * args.project_to / 2**20:>14.0f} {stats['recall']:>7.3f} "
+                      f"{stats['p50_ms']:>8.2f} {stats['p99_ms']:>8.2f}")
+
+if __name__ == "__main__":
+    main()
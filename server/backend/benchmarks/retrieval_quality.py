@@ -0,0 +1,224 @@
+# server/backend/benchmarks/retrieval_quality.py
+"""Retrieval quality and latency benchmark over a golden English/Malayalam set.
+
+The golden corpus in benchmarks/golden/corpus is ingested with the real
+chunker and ingester, embedded with the deterministic HashingEmbedder, and
+every golden query is run through DocumentRetriever. Results are written as
+a JSON report (recall@k, MRR, p50/p95 latency per backend, threshold and
+retrieval mode) so runs can be compared over time.
+
+Run from server/backend:
+    python -m benchmarks.retrieval_quality --backends chroma faiss --output retrieval_report.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from ai_services.rag_pipeline.chunker import SentenceChunker
+from ai_services.rag_pipeline.document_processor import DocumentProcessor
+from ai_services.rag_pipeline.embeddings_manager import EmbeddingsManager
+from ai_services.rag_pipeline.hashing_embedder import HashingEmbedder
+from ai_services.rag_pipeline.incremental_ingester import IncrementalIngester
+from ai_services.rag_pipeline.ingestion_manifest import IngestionManifest
+from ai_services.rag_pipeline.rate_limiter import AdaptiveRateLimiter
+from ai_services.rag_pipeline.retriever import DocumentRetriever
+from ai_services.rag_pipeline.token_estimator import estimate_tokens
+from ai_services.rag_pipeline.vector_store import VectorStore
+
+GOLDEN_DIR = os.path.join(os.path.dirname(__file__), 'golden')
+
+def load_golden_set(queries_path: str, corpus_path: str) -> List[Dict[str, Any]]:
+    """Load golden queries and resolve each expected phrase to its character offset in the corpus."""
+    with open(queries_path, 'r', encoding='utf-8') as f:
+        queries = json.load(f)['queries']
+
+    texts: Dict[str, str] = {}
+    for query in queries:
+        for expected in query['expected']:
+            source = expected['source']
+            if source not in texts:
+                with open(os.path.join(corpus_path, source), 'r', encoding='utf-8') as f:
+                    texts[source] = f.read()
+            offset = texts[source].find(expected['text'])
+            if offset < 0:
+                raise ValueError(f"Golden query {query['id']}: phrase not found in {source}: {expected['text']!r}")
+            expected['offset'] = offset
+    return queries
+
+def is_relevant(doc: Dict[str, Any], expected: Dict[str, Any], corpus_path: str) -> bool:
+    """A retrieved chunk matches an expected entry when it comes from the file and spans the phrase."""
+    metadata = doc.get('metadata') or {}
+    source = os.path.relpath(metadata.get('source', ''), corpus_path).replace(os.sep, '/')
+    return (source == expected['source']
+            and metadata.get('start_offset', -1) <= expected['offset'] < metadata.get('end_offset', -1))
+
+def local_embeddings_manager(embedder: HashingEmbedder) -> EmbeddingsManager:
+    manager = EmbeddingsManager(None, embedding_backend=embedder)
+    # The provider rate limit would dominate latency; a local embedder has no quota
+    manager.rate_limiter = AdaptiveRateLimiter(initial_rate=1e6, max_rate=1e6, burst=1000)
+    return manager
+
+async def build_store(backend: str, directory: str, corpus_path: str, max_tokens: int,
+                      embedder: HashingEmbedder) -> VectorStore:
+    """Ingest the golden corpus into a fresh store through the production ingestion path."""
+    store = VectorStore(persist_directory=directory, backend=backend)
+    embeddings_manager = local_embeddings_manager(embedder)
+    processor = DocumentProcessor(None, chunker=SentenceChunker(max_tokens=max_tokens))
+    ingester = IncrementalIngester(processor, embeddings_manager, store,
+                                   IngestionManifest(os.path.join(directory, 'manifest.json')))
+    # The ingester logs every file; keep the report output readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = await ingester.sync_directory(corpus_path)
+    if stats['files_failed']:
+        raise RuntimeError(f"Failed to ingest {stats['files_failed']} golden corpus files")
+    return store
+
+def summarize(results: List[Dict[str, Any]], ks: List[int]) -> Dict[str, Any]:
+    latencies = np.asarray([latency for result in results for latency in result['latencies_ms']])
+    summary = {'queries': len(results)}
+    for k in ks:
+        summary[f'recall@{k}'] = float(np.mean([result['recall'][k] for result in results]))
+    summary['mrr'] = float(np.mean([1.0 / result['first_relevant_rank'] if result['first_relevant_rank'] else 0.0
+                                    for result in results]))
+    summary['context_tokens'] = float(np.mean([result['context_tokens'] for result in results]))
+    summary['p50_ms'] = float(np.percentile(latencies, 50))
+    summary['p95_ms'] = float(np.percentile(latencies, 95))
+    return summary
+
+async def evaluate(retriever: DocumentRetriever, queries: List[Dict[str, Any]], corpus_path: str,
+                   ks: List[int], similarity_threshold: float, repeats: int) -> List[Dict[str, Any]]:
+    results = []
+    top_k = max(ks)
+    for query in queries:
+        latencies = []
+        for _ in range(repeats):
+            # Measure cold queries: the embedding cache would otherwise hide embedding cost
+            retriever.query_cache.clear()
+            start = time.perf_counter()
+            documents = await retriever.retrieve_relevant_documents(
+                query['query'], language=query['language'], top_k=top_k,
+                similarity_threshold=similarity_threshold
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        relevant_ranks = [rank for rank, doc in enumerate(documents, 1)
+                          if any(is_relevant(doc, expected, corpus_path) for expected in query['expected'])]
+        recall = {}
+        for k in ks:
+            found = sum(1 for expected in query['expected']
+                        if any(is_relevant(doc, expected, corpus_path) for doc in documents[:k]))
+            recall[k] = found / len(query['expected'])
+
+        results.append({
+            'id': query['id'],
+            'language': query['language'],
+            'first_relevant_rank': relevant_ranks[0] if relevant_ranks else None,
+            'recall': recall,
+            'retrieved': [doc['id'] for doc in documents],
+            'retrieval': [doc.get('retrieval', 'vector') for doc in documents],
+            'context_tokens': sum(estimate_tokens(doc['content']) for doc in documents),
+            'latencies_ms': latencies
+        })
+    return results
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+async def main():
+    parser = argparse.ArgumentParser(description="Measure recall@k, MRR and latency on the golden retrieval set")
+    parser.add_argument('--queries', default=os.path.join(GOLDEN_DIR, 'queries.json'))
+    parser.add_argument('--corpus', default=os.path.join(GOLDEN_DIR, 'corpus'))
+    parser.add_argument('--backends', nargs='+', default=['chroma', 'faiss'])
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0.7, 0.3, 0.0],
+                        help="similarity_threshold values passed to retrieve_relevant_documents")
+    parser.add_argument('--modes', nargs='+', choices=['hybrid', 'vector'], default=['hybrid', 'vector'])
+    parser.add_argument('--k', type=int, nargs='+', default=[1, 3, 5])
+    parser.add_argument('--max-tokens', type=int, default=256, help="Chunker token budget")
+    parser.add_argument('--mmr-lambda', type=float, default=0.7, help="Negative disables MMR selection")
+    parser.add_argument('--no-merge', action='store_true', help="Keep adjacent chunks separate")
+    parser.add_argument('--dim', type=int, default=768)
+    parser.add_argument('--repeats', type=int, default=5, help="Timed runs per query")
+    parser.add_argument('--output', default='retrieval_report.json')
+    args = parser.parse_args()
+
+    queries = load_golden_set(args.queries, args.corpus)
+    embedder = HashingEmbedder(dim=args.dim)
+    ks = sorted(set(args.k))
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'git_revision': git_revision(),
+        'config': {
+            'embedder': embedder.model_name,
+            'max_tokens': args.max_tokens,
+            'mmr_lambda': args.mmr_lambda if args.mmr_lambda >= 0 else None,
+            'merge_adjacent': not args.no_merge,
+            'k': ks,
+            'repeats': args.repeats,
+            'queries': len(queries),
+            'languages': sorted({query['language'] for query in queries})
+        },
+        'runs': []
+    }
+
+    print(f"{len(queries)} golden queries, chunk budget {args.max_tokens} tokens, {embedder.model_name}")
+    print(f"{'backend':<8} {'mode':<7} {'thresh':>6} " + ' '.join(f"{f'R@{k}':>6}" for k in ks)
+          + f" {'MRR':>6} {'tokens':>7} {'p50 ms':>8} {'p95 ms':>8}")
+    for backend in args.backends:
+        with tempfile.TemporaryDirectory() as directory:
+            try:
+                store = await build_store(backend, directory, args.corpus, args.max_tokens, embedder)
+            except Exception as e:
+                print(f"{backend:<8} skipped: {str(e)}")
+                continue
+            embeddings_manager = local_embeddings_manager(embedder)
+
+            for mode in args.modes:
+                for threshold in args.thresholds:
+                    retriever = DocumentRetriever(
+                        embeddings_manager, store, hybrid=mode == 'hybrid',
+                        mmr_lambda=args.mmr_lambda if args.mmr_lambda >= 0 else None,
+                        merge_adjacent=not args.no_merge
+                    )
+                    # Build the BM25 index outside the timed queries
+                    await retriever.retrieve_relevant_documents(queries[0]['query'], queries[0]['language'])
+                    results = await evaluate(retriever, queries, args.corpus, ks, threshold, args.repeats)
+                    retriever.async_store.close()
+                    metrics = {'all': summarize(results, ks)}
+                    for language in report['config']['languages']:
+                        metrics[language] = summarize([r for r in results if r['language'] == language], ks)
+
+                    overall = metrics['all']
+                    print(f"{backend:<8} {mode:<7} {threshold:>6.2f} "
+                          + ' '.join(f"{overall[f'recall@{k}']:>6.3f}" for k in ks)
+                          + f" {overall['mrr']:>6.3f} {overall['context_tokens']:>7.0f} "
+                          f"{overall['p50_ms']:>8.2f} {overall['p95_ms']:>8.2f}")
+                    report['runs'].append({
+                        'backend': backend,
+                        'mode': mode,
+                        'similarity_threshold': threshold,
+                        'chunks': store.collection.count(),
+                        'metrics': metrics,
+                        'retriever': retriever.get_cache_stats(),
+                        'queries': results
+                    })
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Report written to {args.output}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,126 @@
+# server/backend/benchmarks/startup_time.py
+"""Import-time budget check and cold-start timing for the AI service.
+
+Each run imports the service module in a fresh interpreter, so nothing is
+cached between runs. The check fails (exit status 1) when the median import
+time exceeds the budget, or when a heavy SDK that should only load with its
+service (Gemini, Chroma, speech, OpenCV, ...) is imported at module import.
+With --ready, the chat services are also built and the time until the
+readiness flag flips is reported per service.
+
+Run from server/backend:
+    python -m benchmarks.startup_time --budget-ms 1500
+    python -m benchmarks.startup_time --ready
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from typing import List, Dict, Any
+
+import numpy as np
+
+# Loaded by service factories, never by importing the app module itself
+HEAVY_MODULES = ['google.generativeai', 'chromadb', 'speech_recognition', 'gtts', 'cv2', 'spacy',
+                 'langdetect', 'googletrans', 'faiss', 'torch', 'sentence_transformers', 'onnxruntime']
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{'seconds': time.perf_counter() - start, 'modules': sorted(sys.modules)}}))
+"""
+
+READY_SCRIPT = """
+import asyncio, json, time
+start = time.perf_counter()
+import {module} as app_module
+imported = time.perf_counter() - start
+ready = asyncio.run(app_module.services.start())
+print(json.dumps({{'import_seconds': imported, 'ready_seconds': time.perf_counter() - start, 'ready': ready,
+                  'build_seconds': app_module.services.build_seconds, 'errors': app_module.services.errors}}))
+"""
+
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s+(.+)$')
+
+def run_python(script: str, extra_args: List[str] = ()) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *extra_args, '-c', script], capture_output=True, text=True,
+                          cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def measure_import(module: str) -> Dict[str, Any]:
+    result = run_python(IMPORT_SCRIPT.format(module=module))
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def slowest_imports(module: str, top: int) -> List[Dict[str, Any]]:
+    """Modules with the largest cumulative import time, from ``python -X importtime``."""
+    result = run_python(IMPORT_SCRIPT.format(module=module), ['-X', 'importtime'])
+    entries = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            entries.append({'module': match.group(3).strip(), 'cumulative_ms': int(match.group(2)) / 1000})
+    return sorted(entries, key=lambda entry: entry['cumulative_ms'], reverse=True)[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the AI service import-time budget")
+    parser.add_argument('--module', default='ai_services.main')
+    parser.add_argument('--budget-ms', type=float, default=1500.0, help="Median import time budget")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help="Slowest imports to list")
+    parser.add_argument('--allow', nargs='*', default=[], help="Heavy modules allowed at import time")
+    parser.add_argument('--ready', action='store_true',
+                        help="Also build the chat services and time readiness (needs GEMINI_API_KEY)")
+    parser.add_argument('--output', help="Optional JSON report path")
+    args = parser.parse_args()
+
+    runs = [measure_import(args.module) for _ in range(args.runs)]
+    seconds = np.asarray([run['seconds'] for run in runs]) * 1000
+    loaded = set(runs[-1]['modules'])
+    heavy = [name for name in HEAVY_MODULES if name in loaded and name not in args.allow]
+
+    report = {
+        'module': args.module,
+        'budget_ms': args.budget_ms,
+        'median_ms': float(np.median(seconds)),
+        'max_ms': float(seconds.max()),
+        'modules_loaded': len(loaded),
+        'heavy_modules': heavy,
+        'slowest_imports': slowest_imports(args.module, args.top)
+    }
+    print(f"import {args.module}: median {report['median_ms']:.0f} ms, max {report['max_ms']:.0f} ms "
+          f"over {args.runs} runs (budget {args.budget_ms:.0f} ms), {len(loaded)} modules")
+    for entry in report['slowest_imports']:
+        print(f"  {entry['cumulative_ms']:>8.1f} ms  {entry['module']}")
+
+    if args.ready:
+        result = run_python(READY_SCRIPT.format(module=args.module))
+        if result.returncode != 0:
+            raise RuntimeError(f"Building services failed:\n{result.stderr}")
+        report['startup'] = json.loads(result.stdout.strip().splitlines()[-1])
+        startup = report['startup']
+        print(f"ready={startup['ready']} after {startup['ready_seconds']:.2f}s "
+              f"(import {startup['import_seconds']:.2f}s)")
+        for name, build in sorted(startup['build_seconds'].items(), key=lambda item: -item[1]):
+            print(f"  {build:>8.2f} s  {name}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    failures = []
+    if report['median_ms'] > args.budget_ms:
+        failures.append(f"median import time {report['median_ms']:.0f} ms exceeds {args.budget_ms:.0f} ms")
+    if heavy:
+        failures.append(f"heavy modules imported at module load: {', '.join(heavy)}")
+    if args.ready and not report['startup']['ready']:
+        failures.append(f"services not ready: {report['startup']['errors']}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import asyncio
+import os
+
+import pytest
+
+from ai_services.rag_pipeline.hashing_embedder import HashingEmbedder
+from ai_services.rag_pipeline.retriever import DocumentRetriever
+
+from .retrieval_quality import (GOLDEN_DIR, build_store, evaluate, is_relevant, load_golden_set,
+                                local_embeddings_manager, summarize)
+
+CORPUS = os.path.join(GOLDEN_DIR, 'corpus')
+QUERIES = os.path.join(GOLDEN_DIR, 'queries.json')
+
+def test_every_golden_phrase_resolves_to_a_corpus_offset():
+    queries = load_golden_set(QUERIES, CORPUS)
+
+    assert {query['language'] for query in queries} == {'en', 'ml'}
+    for query in queries:
+        for expected in query['expected']:
+            with open(os.path.join(CORPUS, expected['source']), encoding='utf-8') as f:
+                assert f.read()[expected['offset']:].startswith(expected['text'])
+
+def test_missing_golden_phrase_is_reported(tmp_path):
+    queries = tmp_path / 'queries.json'
+    queries.write_text('{"queries": [{"id": "q1", "query": "x", "language": "en",'
+                       ' "expected": [{"source": "crops/rice.txt", "text": "not in the corpus"}]}]}')
+
+    with pytest.raises(ValueError, match="q1"):
+        load_golden_set(str(queries), CORPUS)
+
+def test_relevance_requires_the_chunk_to_span_the_phrase():
+    expected = {'source': 'crops/rice.txt', 'offset': 120}
+    chunk = {'metadata': {'source': os.path.join(CORPUS, 'crops', 'rice.txt'), 'start_offset': 100, 'end_offset': 200}}
+
+    assert is_relevant(chunk, expected, CORPUS)
+    assert not is_relevant({'metadata': {**chunk['metadata'], 'start_offset': 121}}, expected, CORPUS)
+    assert not is_relevant(chunk, {**expected, 'source': 'crops/banana.txt'}, CORPUS)
+
+def test_summary_reports_recall_mrr_and_latency_percentiles():
+    results = [
+        {'recall': {1: 1.0, 3: 1.0}, 'first_relevant_rank': 1, 'context_tokens': 100, 'latencies_ms': [1.0, 3.0]},
+        {'recall': {1: 0.0, 3: 0.5}, 'first_relevant_rank': 2, 'context_tokens': 50, 'latencies_ms': [2.0]},
+        {'recall': {1: 0.0, 3: 0.0}, 'first_relevant_rank': None, 'context_tokens': 0, 'latencies_ms': [4.0]},
+    ]
+
+    summary = summarize(results, [1, 3])
+
+    assert summary['recall@1'] == pytest.approx(1 / 3) and summary['recall@3'] == pytest.approx(0.5)
+    assert summary['mrr'] == pytest.approx(0.5)
+    assert summary['p50_ms'] == pytest.approx(2.5)
+
+def test_golden_set_evaluates_end_to_end_on_faiss(tmp_path):
+    embedder = HashingEmbedder(dim=256)
+    queries = load_golden_set(QUERIES, CORPUS)
+
+    async def run():
+        store = await build_store('faiss', str(tmp_path), CORPUS, 256, embedder)
+        retriever = DocumentRetriever(local_embeddings_manager(embedder), store)
+        try:
+            return await evaluate(retriever, queries, CORPUS, [1, 5], similarity_threshold=0.0, repeats=1)
+        finally:
+            retriever.async_store.close()
+
+    summary = summarize(asyncio.run(run()), [1, 5])
+
+    assert summary['queries'] == len(queries)
+    assert 0 < summary['recall@1'] <= summary['recall@5'] <= 1
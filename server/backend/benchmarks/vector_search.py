@@ -0,0 +1,106 @@
+# server/backend/benchmarks/vector_search.py
+"""Search latency benchmark for the VectorStore backends on the same collection.
+
+Run from server/backend:
+    python -m benchmarks.vector_search --chunks 20000 --queries 500 --backends chroma faiss
+"""
+import argparse
+import tempfile
+import time
+from typing import List, Dict, Any
+
+import numpy as np
+
+from ai_services.rag_pipeline.vector_store import VectorStore
+
+def make_corpus(chunks: int, dim: int, clusters: int = 64, seed: int = 0):
+    """Clustered unit vectors, so nearest neighbours are meaningful, with a 30% Malayalam share."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, chunks)] + 0.5 * rng.standard_normal((chunks, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    languages = np.where(rng.random(chunks) < 0.3, 'ml', 'en')
+    documents = [{
+        'id': f"chunk_{i}",
+        'content': f"Synthetic agricultural chunk {i}",
+        'language': str(languages[i]),
+        'source': f"./data/knowledge_base/category_{i % 8}/file_{i % 100}.txt",
+        'chunk_index': i
+    } for i in range(chunks)]
+    return documents, vectors, languages, rng
+
+def make_queries(rng, vectors: np.ndarray, count: int) -> np.ndarray:
+    """Perturbed corpus vectors, so every query has close neighbours."""
+    picks = vectors[rng.integers(0, len(vectors), count)]
+    queries = picks + 0.3 * rng.standard_normal(picks.shape).astype(np.float32) / np.sqrt(vectors.shape[1])
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+def exact_neighbours(vectors: np.ndarray, languages: np.ndarray, queries: np.ndarray,
+                     n_results: int, language: str = None) -> List[set]:
+    candidates = np.flatnonzero(languages == language) if language else np.arange(len(vectors))
+    scores = queries @ vectors[candidates].T
+    top = np.argsort(-scores, axis=1)[:, :n_results]
+    return [{f"chunk_{candidates[i]}" for i in row} for row in top]
+
+def build_store(backend: str, directory: str, documents: List[Dict[str, Any]], vectors: np.ndarray,
+                faiss_index_factory: str = "Flat", batch_size: int = 1000) -> VectorStore:
+    store = VectorStore(persist_directory=directory, backend=backend, faiss_index_factory=faiss_index_factory)
+    for i in range(0, len(documents), batch_size):
+        if not store.upsert_documents(documents[i:i + batch_size], vectors[i:i + batch_size].tolist()):
+            raise RuntimeError(f"Failed to load the {backend} collection")
+    store.flush()
+    return store
+
+def run_queries(store: VectorStore, queries: np.ndarray, n_results: int, language: str,
+                truth: List[set]) -> Dict[str, float]:
+    latencies = []
+    recall = 0.0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        results = store.search(query.tolist(), n_results=n_results, language_filter=language)
+        latencies.append(time.perf_counter() - start)
+        recall += len(expected & set(results['ids'])) / len(expected)
+
+    latencies = np.asarray(latencies) * 1000
+    return {
+        'qps': len(queries) / (latencies.sum() / 1000),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'recall': recall / len(queries)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare QPS and tail latency of VectorStore backends")
+    parser.add_argument('--chunks', type=int, default=20000)
+    parser.add_argument('--dim', type=int, default=768)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--n-results', type=int, default=10)
+    parser.add_argument('--backends', nargs='+', default=list(VectorStore.BACKENDS))
+    parser.add_argument('--faiss-index', default="Flat", help="FAISS index factory string, e.g. Flat or HNSW32")
+    args = parser.parse_args()
+
+    documents, vectors, languages, rng = make_corpus(args.chunks, args.dim)
+    queries = make_queries(rng, vectors, args.queries)
+    truth = {language: exact_neighbours(vectors, languages, queries, args.n_results, language)
+             for language in (None, 'ml')}
+
+    print(f"{args.chunks} chunks x {args.dim} dims, {args.queries} queries, top {args.n_results}, "
+          f"FAISS index {args.faiss_index}")
+    print(f"{'backend':<10} {'filter':<8} {'build s':>8} {'QPS':>9} {'p50 ms':>8} {'p99 ms':>8} {'recall':>7}")
+    for backend in args.backends:
+        with tempfile.TemporaryDirectory() as directory:
+            try:
+                start = time.perf_counter()
+                store = build_store(backend, directory, documents, vectors, args.faiss_index)
+                build_seconds = time.perf_counter() - start
+            except Exception as e:
+                print(f"{backend:<10} skipped: {str(e)}")
+                continue
+
+            for language in (None, 'ml'):
+                stats = run_queries(store, queries, args.n_results, language, truth[language])
+                print(f"{backend:<10} {language or 'none':<8} {build_seconds:>8.1f} {stats['qps']:>9.1f} "
+                      f"{stats['p50_ms']:>8.2f} {stats['p99_ms']:>8.2f} {stats['recall']:>7.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,100 @@
 # server/initialize_knowledge_base.py
+import argparse
 import asyncio
+import json
 import os
+import shutil
 from ai_services.rag_pipeline.document_processor import DocumentProcessor
 from ai_services.rag_pipeline.embeddings_manager import EmbeddingsManager
+from ai_services.rag_pipeline.embedding_cache import EmbeddingCache
+from ai_services.rag_pipeline.local_embedder import local_embedder_from_env
 from ai_services.rag_pipeline.vector_store import VectorStore
+from ai_services.rag_pipeline.ingestion_manifest import IngestionManifest
+from ai_services.rag_pipeline.incremental_ingester import IncrementalIngester
+from ai_services.rag_pipeline.ingestion_pipeline import IngestionPipeline
+from ai_services.rag_pipeline.index_versions import (
+    new_version, version_directory, activate_version, collect_garbage, validate_index
+)
 
-async def initialize_knowledge_base():
+async def initialize_knowledge_base(use_pipeline: bool = False, read_workers: int = None,
+                                    embed_workers: int = 4, backend: str = "chroma",
+                                    partition_collections: bool = False, rebuild: bool = False,
+                                    keep_versions: int = 2, min_ratio: float = 0.9):
+    """Sync the knowledge base into the live index, or with ``rebuild`` build a new index version
+    side by side, validate it and atomically make it the live one."""
     # Initialize components
     gemini_api_key = os.getenv("GEMINI_API_KEY")
     processor = DocumentProcessor(gemini_api_key)
-    embeddings_manager = EmbeddingsManager(gemini_api_key)
-    vector_store = VectorStore()
+    embedding_cache = EmbeddingCache()
+    # EMBEDDING_BACKEND=local must match the setting the service queries with
+    embeddings_manager = EmbeddingsManager(gemini_api_key, cache=embedding_cache,
+                                           embedding_backend=local_embedder_from_env())
+    vector_store = VectorStore(backend=backend, partition_collections=partition_collections)
+    if rebuild:
+        # Serving processes keep querying the live version while this one is built
+        previous_count = vector_store.collection.count()
+        version = new_version()
+        vector_store = VectorStore(backend=backend, partition_collections=partition_collections, version=version)
+        print(f"Building index version {version} (live index has {previous_count} chunks)")
+    manifest = IngestionManifest(vector_store.manifest_path)
+    if manifest.embedding_model_changed(embeddings_manager.model_name):
+        # Unchanged files would keep vectors from the old model, which are not comparable with new ones
+        print(f"Index was embedded with {manifest.embedding_model} but the configured model is "
+              f"{embeddings_manager.model_name}; run with --rebuild to re-embed the whole knowledge base")
+        return False
+    manifest.embedding_model = embeddings_manager.model_name
     
-    # Process all documents in knowledge base
+    # Sync the knowledge base; only changed files are re-chunked and re-embedded
     kb_path = "./data/knowledge_base"
-    for category in os.listdir(kb_path):
-        category_path = os.path.join(kb_path, category)
-        if os.path.isdir(category_path):
-            for filename in os.listdir(category_path):
-                file_path = os.path.join(category_path, filename)
-                if filename.endswith('.txt'):
-                    print(f"Processing {file_path}...")
-                    
-                    # Process document
-                    documents = processor.process_agricultural_document(file_path)
-                    
-                    if documents:
-                        # Generate embeddings
-                        contents = [doc['content'] for doc in documents]
-                        embeddings = await embeddings_manager.generate_batch_embeddings(contents)
-                        
-                        # Store in vector database
-                        vector_store.add_documents(documents, embeddings)
-                        print(f"Added {len(documents)} chunks from {filename}")
+    if use_pipeline:
+        # Parallel streaming ingestion for large corpora
+        pipeline = IngestionPipeline(
+            embeddings_manager, vector_store, gemini_api_key, manifest,
+            read_workers=read_workers, embed_workers=embed_workers
+        )
+        stats = await pipeline.run_directory(kb_path)
+        print(f"Knowledge base pipeline report:\n{json.dumps(stats, indent=2)}")
+    else:
+        ingester = IncrementalIngester(processor, embeddings_manager, vector_store, manifest)
+        stats = await ingester.sync_directory(kb_path)
+        print(f"Knowledge base sync: {stats}")
+    
+    if rebuild:
+        vector_store.flush()
+        problems = validate_index(vector_store, previous_count, min_ratio)
+        if stats.get('files_failed'):
+            problems.append(f"{stats['files_failed']} files failed to ingest")
+        if problems:
+            print(f"Index version {version} rejected, live index unchanged: {'; '.join(problems)}")
+            shutil.rmtree(version_directory(vector_store.root_directory, version), ignore_errors=True)
+            return False
+        activate_version(vector_store.root_directory, version, {'chunks': vector_store.collection.count()})
+        removed = collect_garbage(vector_store.root_directory, keep=keep_versions)
+        print(f"Index version {version} is live; removed old versions: {removed or 'none'}")
+    
+    print(f"Embedding cache: {embedding_cache.get_stats()}")
 
 if __name__ == "__main__":
-    asyncio.run(initialize_knowledge_base())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Sync data/knowledge_base into the vector store")
+    parser.add_argument('--pipeline', action='store_true', help="Use the parallel streaming ingestion pipeline")
+    parser.add_argument('--read-workers', type=int, default=None)
+    parser.add_argument('--embed-workers', type=int, default=4)
+    parser.add_argument('--backend', choices=VectorStore.BACKENDS,
+                        default=os.getenv("VECTOR_STORE_BACKEND", "chroma"))
+    parser.add_argument('--partition-collections', action='store_true',
+                        default=os.getenv("PARTITION_COLLECTIONS", "").lower() == "true",
+                        help="Store each language/category pair in its own collection")
+    parser.add_argument('--rebuild', action='store_true',
+                        help="Build a new index version side by side and switch to it once validated")
+    parser.add_argument('--keep-versions', type=int, default=2, help="Index versions kept after a rebuild")
+    parser.add_argument('--min-ratio', type=float, default=0.9,
+                        help="Reject a rebuild with fewer chunks than this share of the live index")
+    parser.add_argument('--nice', type=int, default=10,
+                        help="Lower this process's CPU priority by this much during a rebuild")
+    args = parser.parse_args()
+    if args.rebuild and args.nice and hasattr(os, 'nice'):
+        # Keep the rebuild from competing with the serving process for CPU
+        os.nice(args.nice)
+    asyncio.run(initialize_knowledge_base(args.pipeline, args.read_workers, args.embed_workers, args.backend,
+                                          args.partition_collections, args.rebuild, args.keep_versions,
+                                          args.min_ratio))